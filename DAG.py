@@ -4,7 +4,10 @@ from collections import defaultdict
 from Trapezoid import Trapezoid
 from LineSegment import LineSegment
 from Point import Point
-import pandas as pd
+import numpy as np
+
+# largest number of DAG objects build_adjacency_matrix accepts by default, the matrix is quadratic in it
+DENSE_MATRIX_LIMIT = 2000
 
 class DAG:
     def __init__(self, root):
@@ -40,14 +43,67 @@ class DAG:
         #         print(n)
         #     print()
         return a_list
+
+    # returns every DAG node once, in breadth-first order starting at the root
+    def bfs_nodes(self):
+        seen = {id(self.root)}
+        order = [self.root]
+        i = 0
+        while i < len(order):
+            node = order[i]
+            i += 1
+            if isinstance(node.graph_object, Trapezoid):
+                continue
+            for child in (node.left_child, node.right_child):
+                if id(child) not in seen:
+                    seen.add(id(child))
+                    order.append(child)
+        return order
+
+    # number of nodes a point query for point visits, the leaf included. Like
+    # RandomizedIncrementalConstruction.locate a point on the vertical line through a point node goes right
+    def path_length(self, point):
+        node = self.root
+        visits = 1
+        while not isinstance(node.graph_object, Trapezoid):
+            obj = node.graph_object
+            if isinstance(obj, Point):
+                node = node.left_child if point.x < obj.x else node.right_child
+            else:
+                node = node.left_child if obj.aboveLine(point) else node.right_child
+            visits += 1
+        return visits
+
+    # number of comparisons on the longest path from the root to a leaf
+    def max_depth(self):
+        height = {}
+        stack = [self.root]
+        while stack:
+            node = stack[-1]
+            if id(node) in height:
+                stack.pop()
+            elif isinstance(node.graph_object, Trapezoid):
+                height[id(node)] = 0
+                stack.pop()
+            elif id(node.left_child) in height and id(node.right_child) in height:
+                height[id(node)] = 1 + max(height[id(node.left_child)], height[id(node.right_child)])
+                stack.pop()
+            else:
+                stack.append(node.left_child)
+                stack.append(node.right_child)
+        return height[id(self.root)]
+
+    # returns the leaf trapezoids in breadth-first order. The position of a trapezoid in
+    # this list is its trapezoid ID, so ID i is printed as T(i+1) in the adjacency matrix
+    def trapezoids(self):
+        return [node.graph_object for node in self.bfs_nodes() if isinstance(node.graph_object, Trapezoid)]
     
-    # builds adjacency matrix for DAG
-    def build_adjacency_matrix(self, segments):
-        # get adjacency list
-        a_list = self.build_adjacency_list()
-        # get all keys within list
-        nodes = a_list.keys()
-        # rename nodes to make matrix more readable
+    # names the DAG objects for the adjacency output: S<i> for the i-th segment, P<i> and Q<i> for its
+    # left and right point (unless an earlier segment already named the point) and T<i> for the
+    # trapezoids in breadth-first order. The nodes RandomizedIncrementalConstruction.delete leaves
+    # behind hold points and segments no segment of the map has, they are X<i> and Y<i> in
+    # breadth-first order
+    def node_names(self, segments):
         node_names = {}
         ls_count, t_count = 1,1
         for seg in segments:
@@ -60,10 +116,61 @@ class DAG:
             if seg.right not in node_names:
                 node_names[seg.right] = "Q"+str(ls_count)
             ls_count += 1
-        for node in nodes:
-            if isinstance(node, Trapezoid):
-                node_names[node] = "T"+str(t_count)
+        x_count, y_count = 1, 1
+        for node in self.bfs_nodes():
+            obj = node.graph_object
+            if isinstance(obj, Trapezoid):
+                node_names[obj] = "T"+str(t_count)
                 t_count += 1
+            elif obj not in node_names:
+                if isinstance(obj, Point):
+                    node_names[obj] = "X"+str(x_count)
+                    x_count += 1
+                else:
+                    node_names[obj] = "Y"+str(y_count)
+                    y_count += 1
+        return node_names
+
+    # yields the edges of the DAG as (parent name, child name) pairs in breadth-first order, in time
+    # and memory linear in the size of the DAG
+    def iter_edges(self, segments):
+        node_names = self.node_names(segments)
+        for node in self.bfs_nodes():
+            if not isinstance(node.graph_object, Trapezoid):
+                parent = node_names[node.graph_object]
+                yield parent, node_names[node.left_child.graph_object]
+                yield parent, node_names[node.right_child.graph_object]
+
+    # sparse form of the adjacency matrix: row i lists the children of names[i], as in a
+    # scipy.sparse.csr_matrix (indptr, indices). Like in the dense matrix, DAG nodes holding
+    # the same object share one row
+    def build_adjacency_csr(self, segments):
+        node_names = self.node_names(segments)
+        rows = {}
+        children = []
+        for node in self.bfs_nodes():
+            if node.graph_object not in rows:
+                rows[node.graph_object] = len(children)
+                children.append([])
+            if not isinstance(node.graph_object, Trapezoid):
+                children[rows[node.graph_object]] += [node.left_child.graph_object, node.right_child.graph_object]
+        names = [node_names[obj] for obj in rows]
+        indptr = np.zeros(len(children) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(c) for c in children])
+        indices = np.array([rows[child] for c in children for child in c], dtype=np.int32)
+        return names, indptr, indices
+
+    # builds adjacency matrix for DAG. The matrix is dense, so it is refused for DAGs with more than
+    # max_nodes objects, use iter_edges or build_adjacency_csr for those
+    def build_adjacency_matrix(self, segments, max_nodes=DENSE_MATRIX_LIMIT):
+        # get adjacency list
+        a_list = self.build_adjacency_list()
+        # get all keys within list
+        nodes = a_list.keys()
+        if max_nodes is not None and len(nodes) > max_nodes:
+            raise ValueError('the dense adjacency matrix would have %d rows, more than %d' % (len(nodes), max_nodes))
+        # rename nodes to make matrix more readable
+        node_names = self.node_names(segments)
         node_indices = {node: i for i, node in enumerate(nodes)}  # Map each node to an index
 
         # Initialize an n x n matrix with zeros
@@ -108,8 +215,7 @@ class DAG:
         # index = [row[0] for row in adj_matrix[1:]]  # First item in each row as index
         # values = [row[1:] for row in adj_matrix[1:]] 
         
-        print("-------OUTPUT ADJACENCY MATRIX-------\n")
+        # pandas is only needed for the dense matrix
+        import pandas as pd
         df = pd.DataFrame(adj_matrix[1:], columns=columns)
-    
-        print(df)
         return df, node_names
\ No newline at end of file
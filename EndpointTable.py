@@ -0,0 +1,40 @@
+import numpy as np
+
+from Point import Point
+
+
+class EndpointTable:
+    # the distinct end points of an (n, 4) segment array of (x1, y1, x2, y2) rows. points is an
+    # (m, 2) float64 array of the distinct coordinates in lexicographic order, ids an (n, 2) int64
+    # array with the point IDs (rows of points) of the (x1, y1) and (x2, y2) end of every segment.
+    # Two segments share an end point exactly when they have the same point ID there
+    def __init__(self, segment_array):
+        segment_array = np.asarray(segment_array, dtype=np.float64)
+        if segment_array.ndim != 2 or segment_array.shape[1] != 4:
+            raise ValueError('segment array must have shape (n, 4)')
+        points, inverse = np.unique(segment_array.reshape(-1, 2), axis=0, return_inverse=True)
+        self.points = np.ascontiguousarray(points)
+        self.ids = inverse.reshape(-1, 2).astype(np.int64)
+        # one Point object per ID, made on first use
+        self._objects = [None] * len(self.points)
+
+    def __len__(self):
+        return len(self.points)
+
+    # the Point with ID i. Every call with the same ID returns the same object, so the segments made
+    # from the table share their end points and comparing them is an identity check
+    def point(self, i):
+        p = self._objects[i]
+        if p is None:
+            x, y = self.points[i].tolist()
+            p = self._objects[i] = Point(x, y)
+        return p
+
+    # the two end points of segment row i
+    def segment_points(self, i):
+        a, b = self.ids[i].tolist()
+        return self.point(a), self.point(b)
+
+    # number of segments ending in every point
+    def degrees(self):
+        return np.bincount(self.ids.ravel(), minlength=len(self.points))
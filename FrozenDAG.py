@@ -0,0 +1,264 @@
+import mmap
+import struct
+
+import numpy as np
+
+import Instrumentation
+from Predicates import orient2d, orient2d_signs
+from Point import Point
+from LineSegment import LineSegment
+from Trapezoid import Trapezoid
+
+# node kinds
+X_NODE, Y_NODE, LEAF = 0, 1, 2
+
+# Map file layout (little endian):
+#   header: magic, format version, seed of the build, SHA-256 of the source segments (see
+#   SegmentFile.checksum), then (offset, rows) of every array in _ARRAYS order
+#   body: the arrays, each starting at a multiple of 64 bytes
+MAP_MAGIC = b'TRAPMAP\x00'
+MAP_VERSION = 1
+_ARRAYS = (('kind', '<u1', ()), ('key', '<f8', ()), ('seg', '<i4', ()), ('left', '<i4', ()),
+           ('right', '<i4', ()), ('trap', '<i4', ()), ('segments', '<f8', (4,)),
+           ('trap_points', '<f8', (4,)), ('trap_segments', '<i4', (2,)))
+_HEADER = struct.Struct('<8sIIq32s' + 'QQ' * len(_ARRAYS))
+_ALIGN = 64
+
+
+class FrozenDAG:
+    """
+    Read-only copy of the search structure stored as contiguous typed arrays (struct of arrays).
+    Node i has kind[i], key[i] (x of the point for X-nodes), seg[i] (row of the segment table for
+    Y-nodes), left[i], right[i] (child node numbers) and trap[i] (trapezoid ID for leaves).
+    Nodes are numbered in breadth-first order, so the root is node 0 and the top levels that every
+    query passes through sit next to each other in memory.
+    """
+
+    def __init__(self, kind, key, seg, left, right, trap, segments, trap_points, trap_segments,
+                 seed=None, source_checksum=None):
+        self.kind = kind
+        self.key = key
+        self.seg = seg
+        self.left = left
+        self.right = right
+        self.trap = trap
+        # segment table, one row (left.x, left.y, right.x, right.y) per segment
+        self.segments = segments
+        # trapezoid table, row i describes trapezoid ID i:
+        # (left_p.x, left_p.y, right_p.x, right_p.y) and (top, bottom) as rows of the segment table
+        self.trap_points = trap_points
+        self.trap_segments = trap_segments
+        # seed of the build and SHA-256 of the input segments, stored with the map by save
+        self.seed = seed
+        self.source_checksum = source_checksum
+        self._left_side = None
+        # flat memoryviews on the arrays for locate, made on first use
+        self._views = None
+
+    @classmethod
+    def from_dag(cls, dag):
+        order = dag.bfs_nodes()
+        node_index = {id(node): i for i, node in enumerate(order)}
+        seg_index = {}
+        seg_rows = []
+        trap_index = {}
+        trap_rows = []
+
+        def segment_row(segment):
+            if id(segment) not in seg_index:
+                seg_index[id(segment)] = len(seg_rows)
+                seg_rows.append((segment.left.x, segment.left.y, segment.right.x, segment.right.y))
+            return seg_index[id(segment)]
+
+        n = len(order)
+        kind = np.empty(n, dtype=np.uint8)
+        key = np.zeros(n, dtype=np.float64)
+        seg = np.full(n, -1, dtype=np.int32)
+        left = np.full(n, -1, dtype=np.int32)
+        right = np.full(n, -1, dtype=np.int32)
+        trap = np.full(n, -1, dtype=np.int32)
+        for i, node in enumerate(order):
+            obj = node.graph_object
+            if isinstance(obj, Point):
+                kind[i] = X_NODE
+                key[i] = obj.x
+            elif isinstance(obj, LineSegment):
+                kind[i] = Y_NODE
+                seg[i] = segment_row(obj)
+            elif isinstance(obj, Trapezoid):
+                kind[i] = LEAF
+                if id(obj) not in trap_index:
+                    trap_index[id(obj)] = len(trap_rows)
+                    trap_rows.append(obj)
+                trap[i] = trap_index[id(obj)]
+                continue
+            else:
+                raise ValueError('invalid DAG node!')
+            left[i] = node_index[id(node.left_child)]
+            right[i] = node_index[id(node.right_child)]
+
+        trap_points = np.array([(t.left_p.x, t.left_p.y, t.right_p.x, t.right_p.y) for t in trap_rows],
+                               dtype=np.float64).reshape(-1, 4)
+        trap_segments = np.array([(segment_row(t.top), segment_row(t.bottom)) for t in trap_rows],
+                                 dtype=np.int32).reshape(-1, 2)
+        segments = np.array(seg_rows, dtype=np.float64).reshape(-1, 4)
+        return cls(kind, key, seg, left, right, trap, segments, trap_points, trap_segments)
+
+    # writes the map to file_path, see the layout above
+    def save(self, file_path):
+        arrays = [np.ascontiguousarray(getattr(self, name), dtype=dtype) for name, dtype, _ in _ARRAYS]
+        directory = []
+        offset = -(-_HEADER.size // _ALIGN) * _ALIGN
+        for a in arrays:
+            directory += [offset, len(a)]
+            offset += -(-a.nbytes // _ALIGN) * _ALIGN
+        seed = -1 if self.seed is None else self.seed
+        header = _HEADER.pack(MAP_MAGIC, MAP_VERSION, 0, seed, self.source_checksum or bytes(32), *directory)
+        with open(file_path, 'wb') as file:
+            file.write(header)
+            for a, start in zip(arrays, directory[::2]):
+                file.write(bytes(start - file.tell()))
+                file.write(a.tobytes())
+
+    # reads a map written by save. The arrays are read-only views on the memory-mapped file, so
+    # loading does not depend on the size of the map. When source_checksum is given, the map must
+    # have been built from those segments
+    @classmethod
+    def load(cls, file_path, source_checksum=None):
+        with open(file_path, 'rb') as file:
+            if file.read(len(MAP_MAGIC)) != MAP_MAGIC:
+                raise ValueError('%s is not a map file' % file_path)
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, seed, checksum, *directory = _HEADER.unpack_from(buffer)
+        if version != MAP_VERSION:
+            raise ValueError('%s: unsupported map file version %d' % (file_path, version))
+        if source_checksum is not None and checksum != source_checksum:
+            raise ValueError('%s was not built from these segments' % file_path)
+        arrays = []
+        for (name, dtype, shape), offset, rows in zip(_ARRAYS, directory[::2], directory[1::2]):
+            count = rows * int(np.prod(shape, dtype=np.int64))
+            arrays.append(np.frombuffer(buffer, dtype=dtype, count=count, offset=offset).reshape((rows,) + shape))
+        return cls(*arrays, seed=None if seed < 0 else seed,
+                   source_checksum=None if checksum == bytes(32) else checksum)
+
+    def __len__(self):
+        return len(self.kind)
+
+    @property
+    def trapezoid_count(self):
+        return len(self.trap_points)
+
+    # total size of the arrays in bytes
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.kind, self.key, self.seg, self.left, self.right, self.trap,
+                                      self.segments, self.trap_points, self.trap_segments))
+
+    # bounding box of the map as (bottom left x, bottom left y, top right x, top right y): the x range of
+    # the trapezoids and the y range of the segment table, which holds the bounding box top and bottom
+    @property
+    def bbox(self):
+        return (float(self.trap_points[:, 0].min()), float(self.segments[:, [1, 3]].min()),
+                float(self.trap_points[:, 2].max()), float(self.segments[:, [1, 3]].max()))
+
+    # x of the bounding box's left side, computed on first use so that loading stays independent of
+    # the size of the map
+    @property
+    def left_side(self):
+        if self._left_side is None:
+            self._left_side = float(self.trap_points[:, 0].min()) if len(self.trap_points) else 0.0
+        return self._left_side
+
+    # trapezoid ID for a single point, -1 when the point lies on a wall: the vertical line through
+    # a segment end point, up and down to the next segments. Every other point on that vertical line
+    # gets the trapezoid it lies inside, so the answer depends on the segments only, not on the DAG
+    # that was built for them. start is the node the descent begins at, a node every path of the
+    # point passes through (see GridAccelerator).
+    # The loop reads the arrays through memoryviews, which return Python numbers without the cost of
+    # NumPy scalars and without copying the arrays. Still, every level costs interpreter time; for
+    # many points locate_many is several times faster per point
+    def locate(self, x, y, start=0):
+        if Instrumentation.sink is not None:
+            _, visits = self._descend(np.array([x], dtype=np.float64), np.array([y], dtype=np.float64), True,
+                                      np.array([start], dtype=np.int32))
+            Instrumentation.sink.record('query_node_visits', int(visits[0]))
+        if self._views is None:
+            self._views = tuple(memoryview(np.ascontiguousarray(a).reshape(-1)) for a in (
+                self.kind, self.key, self.seg, self.left, self.right, self.trap, self.segments, self.trap_points))
+        kind, key, seg, left, right, trap, segments, trap_points = self._views
+        i = start
+        while True:
+            k = kind[i]
+            if k == LEAF:
+                t = trap[i]
+                return -1 if t >= 0 and x == trap_points[4 * t] and x > self.left_side else t
+            if k == X_NODE:
+                # a point on the vertical line goes right, see _descend
+                i = left[i] if x < key[i] else right[i]
+            else:
+                s = 4 * seg[i]
+                # same predicate as LineSegment.aboveLine, points above (or on) the segment go left
+                i = left[i] if orient2d(segments[s], segments[s + 1], segments[s + 2], segments[s + 3], x, y) >= 0 \
+                    else right[i]
+
+    # trapezoid IDs for arrays of x and y coordinates. All queries move down the structure
+    # together, one level per iteration. starts optionally gives the node every query begins at
+    def locate_many(self, xs, ys, starts=None):
+        xs = np.ascontiguousarray(xs, dtype=np.float64)
+        ys = np.ascontiguousarray(ys, dtype=np.float64)
+        if xs.shape != ys.shape or xs.ndim != 1:
+            raise ValueError('xs and ys must be 1-d arrays of the same length')
+
+        stats = Instrumentation.sink
+        result, visits = self._descend(xs, ys, stats is not None, starts)
+        if stats is not None:
+            stats.record_many('query_node_visits', visits)
+        return result
+
+    # descent of locate_many. With count_visits it also returns the number of nodes every query
+    # visited, leaf included, otherwise None
+    def _descend(self, xs, ys, count_visits, starts=None):
+        result = np.full(len(xs), -1, dtype=np.int32)
+        nodes = np.zeros(len(xs), dtype=np.int32) if starts is None else np.array(starts, dtype=np.int32)
+        active = np.arange(len(xs))
+        visits = np.zeros(len(xs), dtype=np.int32) if count_visits else None
+        while len(active):
+            if visits is not None:
+                visits[active] += 1
+            cur = nodes[active]
+            k = self.kind[cur]
+            # queries that reached a leaf are done
+            leaf = k == LEAF
+            result[active[leaf]] = self.trap[cur[leaf]]
+
+            x, y = xs[active], ys[active]
+            # X-node: go left if the query point is left of the node's point, right otherwise
+            go_left = x < self.key[cur]
+            # Y-node: points above (or on) the segment go left
+            is_y = k == Y_NODE
+            s = self.segments[self.seg[cur[is_y]]]
+            yx, yy = x[is_y], y[is_y]
+            go_left[is_y] = orient2d_signs(s[:, 0], s[:, 1], s[:, 2], s[:, 3], yx, yy) >= 0
+
+            nodes[active] = np.where(go_left, self.left[cur], self.right[cur])
+            active = active[~leaf]
+        # a point on the vertical line through an X-node's point went right, like a point just right of
+        # that line. It lies on a wall exactly when it lies on the left side of the trapezoid it reached,
+        # unless that side is the bounding box's left side
+        wall = (result >= 0) & (xs == self.trap_points[result, 0]) & (xs > self.left_side)
+        result[wall] = -1
+        return result, visits
+
+    # number of comparisons on the longest path from the root to a leaf
+    def max_depth(self):
+        depth = np.zeros(len(self.kind), dtype=np.int32)
+        depth[0] = 1
+        # children always come after their first parent in breadth-first order, but a node can be
+        # reached by a longer path through a parent that comes later, so repeat until nothing changes
+        inner = np.nonzero(self.kind != LEAF)[0]
+        while True:
+            before = depth.copy()
+            for children in (self.left[inner], self.right[inner]):
+                np.maximum.at(depth, children, depth[inner] + 1)
+            if np.array_equal(before, depth):
+                return int(depth.max()) - 1
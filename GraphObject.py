@@ -1,6 +1,8 @@
 class GraphObject:
+    __slots__ = ()
+
     def __init__(self):
         pass
 
     def __hash__(self):
-        return hash(str(self))
\ No newline at end of file
+        return hash(str(self))
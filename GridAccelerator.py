@@ -0,0 +1,120 @@
+import numpy as np
+
+from FrozenDAG import X_NODE, Y_NODE, LEAF
+from Predicates import orient2d_signs
+
+
+class GridAccelerator:
+    """
+    Uniform grid over the bounding box of a FrozenDAG. Every cell stores the deepest DAG node that
+    all points of the cell pass through, found by descending with the whole cell until a node splits
+    it. A query looks up its cell and descends from that node; points outside the bounding box start
+    at the root. The answers are those of FrozenDAG.locate, -1 included.
+    resolution: cells along x and y, an int for a square grid or an (nx, ny) pair.
+    """
+
+    def __init__(self, frozen, resolution=256):
+        self.frozen = frozen
+        self.nx, self.ny = (resolution, resolution) if np.isscalar(resolution) else resolution
+        if self.nx < 1 or self.ny < 1:
+            raise ValueError('the grid needs at least one cell along each axis')
+        self.bbox = frozen.bbox
+        x0, y0, x1, y1 = self.bbox
+        self.cell_width = (x1 - x0) / self.nx
+        self.cell_height = (y1 - y0) / self.ny
+        # cell node of cell (i, j) at j * nx + i, and the number of levels a query of the cell skips
+        self.cell_node, self.cell_levels = self._build()
+
+    def _build(self):
+        frozen = self.frozen
+        x0, y0, x1, y1 = self.bbox
+        # a query can land in a neighboring cell when its coordinate rounds across a cell wall, so
+        # every cell is widened by far more than that rounding error
+        margin_x = 1e-9 * (abs(x0) + abs(x1) + self.cell_width)
+        margin_y = 1e-9 * (abs(y0) + abs(y1) + self.cell_height)
+        j, i = np.divmod(np.arange(self.nx * self.ny), self.nx)
+        cx0 = x0 + i * self.cell_width - margin_x
+        cx1 = x0 + (i + 1) * self.cell_width + margin_x
+        cy0 = y0 + j * self.cell_height - margin_y
+        cy1 = y0 + (j + 1) * self.cell_height + margin_y
+
+        nodes = np.zeros(len(i), dtype=np.int32)
+        levels = np.zeros(len(i), dtype=np.int32)
+        active = np.arange(len(i))
+        while len(active):
+            cur = nodes[active]
+            k = frozen.kind[cur]
+            go_left = np.zeros(len(active), dtype=bool)
+            go_right = np.zeros(len(active), dtype=bool)
+
+            # X-node: the whole cell on one side of the point's vertical line
+            is_x = k == X_NODE
+            key = frozen.key[cur[is_x]]
+            go_left[is_x] = cx1[active[is_x]] < key
+            go_right[is_x] = cx0[active[is_x]] > key
+
+            # Y-node: all four corners above (or on) the segment's line, or all below it
+            is_y = np.nonzero(k == Y_NODE)[0]
+            s = frozen.segments[frozen.seg[cur[is_y]]]
+            cells = active[is_y]
+            above = np.ones(len(is_y), dtype=bool)
+            below = np.ones(len(is_y), dtype=bool)
+            for cx, cy in ((cx0, cy0), (cx0, cy1), (cx1, cy0), (cx1, cy1)):
+                signs = orient2d_signs(s[:, 0], s[:, 1], s[:, 2], s[:, 3], cx[cells], cy[cells])
+                above &= signs >= 0
+                below &= signs < 0
+            go_left[is_y] = above
+            go_right[is_y] = below
+
+            move = (go_left | go_right) & (k != LEAF)
+            nodes[active[move]] = np.where(go_left, frozen.left[cur], frozen.right[cur])[move]
+            levels[active[move]] += 1
+            active = active[move]
+        return nodes, levels
+
+    # cell number of every query point and whether the point lies inside the bounding box
+    def cells(self, xs, ys):
+        x0, y0, x1, y1 = self.bbox
+        inside = (xs >= x0) & (xs <= x1) & (ys >= y0) & (ys <= y1)
+        # the top and right walls of the bounding box belong to the last cells
+        i = np.clip(np.floor((xs - x0) / self.cell_width), 0, self.nx - 1).astype(np.int64)
+        j = np.clip(np.floor((ys - y0) / self.cell_height), 0, self.ny - 1).astype(np.int64)
+        return j * self.nx + i, inside
+
+    # start node of every query, the root for points outside the bounding box
+    def start_nodes(self, xs, ys):
+        cells, inside = self.cells(xs, ys)
+        return np.where(inside, self.cell_node[cells], 0)
+
+    def locate(self, x, y):
+        x0, y0, x1, y1 = self.bbox
+        start = 0
+        if x0 <= x <= x1 and y0 <= y <= y1:
+            i = min(int((x - x0) / self.cell_width), self.nx - 1)
+            j = min(int((y - y0) / self.cell_height), self.ny - 1)
+            start = int(self.cell_node[j * self.nx + i])
+        return self.frozen.locate(x, y, start)
+
+    def locate_many(self, xs, ys):
+        xs = np.ascontiguousarray(xs, dtype=np.float64)
+        ys = np.ascontiguousarray(ys, dtype=np.float64)
+        if xs.shape != ys.shape or xs.ndim != 1:
+            raise ValueError('xs and ys must be 1-d arrays of the same length')
+        return self.frozen.locate_many(xs, ys, self.start_nodes(xs, ys))
+
+    # bytes the queries need: the cell node table
+    @property
+    def nbytes(self):
+        return self.cell_node.nbytes
+
+    # memory of the grid against the DAG levels it saves: mean levels skipped over the cells (the
+    # average for uniform queries) and, when query points are given, over those queries
+    def report(self, xs=None, ys=None):
+        report = {'cells': self.nx * self.ny, 'bytes': self.nbytes, 'dag_bytes': self.frozen.nbytes,
+                  'mean_levels_skipped': float(self.cell_levels.mean())}
+        if xs is not None:
+            xs, ys = np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+            cells, inside = self.cells(xs, ys)
+            skipped = np.where(inside, self.cell_levels[cells], 0)
+            report['query_levels_skipped'] = float(skipped.mean()) if len(skipped) else 0.0
+        return report
@@ -0,0 +1,56 @@
+import math
+
+
+class Histogram:
+    """
+    Histogram over log-spaced buckets for positive values such as latencies. Its memory does not
+    grow with the number of recorded values, percentiles are accurate to the bucket width
+    (about 6% with the default 40 buckets per decade).
+    """
+
+    def __init__(self, low=1e-9, high=1e3, buckets_per_decade=40):
+        self.low = low
+        self.buckets_per_decade = buckets_per_decade
+        self.counts = [0] * (int(math.ceil(math.log10(high / low) * buckets_per_decade)) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _bucket(self, value):
+        if value <= self.low:
+            return 0
+        return min(int(math.log10(value / self.low) * self.buckets_per_decade), len(self.counts) - 1)
+
+    # records value count times
+    def record(self, value, count=1):
+        self.counts[self._bucket(value)] += count
+        self.total += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        assert len(self.counts) == len(other.counts)
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.total += other.total
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self):
+        return self.sum / self.total if self.total else math.nan
+
+    # value below which p percent of the recorded values fall (upper edge of that bucket)
+    def percentile(self, p):
+        if not self.total:
+            return math.nan
+        rank = p / 100 * self.total
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= rank:
+                return min(self.low * 10 ** ((i + 1) / self.buckets_per_decade), self.max)
+        return self.max
@@ -0,0 +1,160 @@
+import contextlib
+import json
+import time
+
+import numpy as np
+
+from Histogram import Histogram
+
+# Build and query counters. Instrumented code reads the module global sink once per inserted
+# segment, per query or per query batch and skips all counting while it is None, so switched off
+# the instrumentation costs one global lookup per operation.
+#
+# Metrics, one value per event:
+#   segments_inserted   1 per insert_segment call
+#   walk_length         trapezoids crossed by the inserted segment
+#   trapezoids_created  trapezoids the insertion added to the map
+#   trapezoids_merged   split parts joined into a merged trapezoid
+#   dag_nodes_added     DAG nodes the insertion added
+#   query_node_visits   DAG nodes visited by a point query, leaf included
+METRICS = ('segments_inserted', 'walk_length', 'trapezoids_created', 'trapezoids_merged', 'dag_nodes_added',
+           'query_node_visits')
+
+sink = None
+
+# Phase timers of the builder, see PhaseProfiler. Like sink it is None by default, then every
+# insertion pays one global lookup and a few None checks for them
+profiler = None
+
+
+# makes new_sink receive the metrics, returns the sink it replaces. None switches the instrumentation off
+def enable(new_sink):
+    global sink
+    previous, sink = sink, new_sink
+    return previous
+
+
+def disable():
+    return enable(None)
+
+
+# sends the metrics of the with block to new_sink and flushes it at the end
+@contextlib.contextmanager
+def recording(new_sink):
+    previous = enable(new_sink)
+    try:
+        yield new_sink
+    finally:
+        enable(previous)
+        new_sink.flush()
+
+
+# makes new_profiler time the build phases, returns the profiler it replaces. None switches the timers off
+def enable_profiler(new_profiler):
+    global profiler
+    previous, profiler = profiler, new_profiler
+    return previous
+
+
+# times the build phases of the with block, with a new PhaseProfiler unless one is given
+@contextlib.contextmanager
+def profiling(new_profiler=None):
+    new_profiler = new_profiler if new_profiler is not None else PhaseProfiler()
+    previous = enable_profiler(new_profiler)
+    try:
+        yield new_profiler
+    finally:
+        enable_profiler(previous)
+
+
+class PhaseProfiler:
+    """
+    Cumulative wall time and call count per phase of RandomizedIncrementalConstruction.insert_segment:
+      locate     DAG search for the trapezoid containing the segment's left end point
+      walk       walk through the neighbor slots to the trapezoid containing the right end point
+      split      top and bottom parts of the crossed trapezoids, one per run with the same top or bottom segment
+      neighbors  neighbor slots of the new trapezoids
+      dag        new DAG nodes and the rewiring of the old leaves
+      conflicts  redistribution of the conflict lists of the crossed trapezoids (conflict_lists builds)
+    """
+    PHASES = ('locate', 'walk', 'split', 'neighbors', 'dag', 'conflicts')
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(self.PHASES, 0.0)
+        self.calls = dict.fromkeys(self.PHASES, 0)
+
+    # adds the time since start to phase and returns the current time, the start of the next phase
+    def lap(self, phase, start):
+        now = time.perf_counter()
+        self.seconds[phase] += now - start
+        self.calls[phase] += 1
+        return now
+
+    # {phase: {'seconds': cumulative wall time, 'calls': number of timed calls}}
+    def totals(self):
+        return {phase: {'seconds': self.seconds[phase], 'calls': self.calls[phase]} for phase in self.seconds}
+
+    def table(self):
+        total = sum(self.seconds.values())
+        lines = ['%-10s %10s %8s %10s %7s' % ('phase', 'seconds', 'calls', 'us/call', 'share')]
+        for phase in self.seconds:
+            seconds, calls = self.seconds[phase], self.calls[phase]
+            lines.append('%-10s %10.4f %8d %10.2f %6.1f%%' % (phase, seconds, calls, 1e6 * seconds / calls if calls else 0,
+                                                            100 * seconds / total if total else 0))
+        lines.append('%-10s %10.4f' % ('total', total))
+        return '\n'.join(lines)
+
+
+class JsonLinesSink:
+    """
+    Writes every event as one JSON object per line: {"metric": name, "value": value}. A batch of
+    values (record_many) is written as one line with its count, sum, min and max.
+    """
+
+    def __init__(self, file):
+        self.file = file
+
+    def record(self, name, value):
+        self.file.write('{"metric": "%s", "value": %s}\n' % (name, value))
+
+    def record_many(self, name, values):
+        values = np.asarray(values)
+        if len(values):
+            self.file.write(json.dumps({'metric': name, 'count': int(len(values)), 'sum': values.sum().item(),
+                                        'min': values.min().item(), 'max': values.max().item()}) + '\n')
+
+    def flush(self):
+        self.file.flush()
+
+
+class HistogramSink:
+    """
+    Keeps one in-memory Histogram per metric, summary() returns count, mean, percentiles and max of each.
+    """
+
+    def __init__(self, buckets_per_decade=20):
+        self.buckets_per_decade = buckets_per_decade
+        self.histograms = {}
+
+    def _histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            # the metrics are counts, 0 lands in the first bucket and 1 in its own one
+            histogram = self.histograms[name] = Histogram(low=0.5, high=1e9, buckets_per_decade=self.buckets_per_decade)
+        return histogram
+
+    def record(self, name, value):
+        self._histogram(name).record(value)
+
+    def record_many(self, name, values):
+        histogram = self._histogram(name)
+        for value, count in zip(*np.unique(np.asarray(values), return_counts=True)):
+            histogram.record(value.item(), int(count))
+
+    def flush(self):
+        pass
+
+    def summary(self):
+        return {name: {'count': h.total, 'total': h.sum, 'mean': h.mean, 'p50': h.percentile(50),
+                       'p99': h.percentile(99), 'max': h.max}
+                for name, h in self.histograms.items()}
@@ -1,10 +1,15 @@
 import math
 from Point import Point
 from GraphObject import GraphObject
+from Predicates import orientation
 
 
 class LineSegment(GraphObject):
 
+    # segments are never modified after they are created, so the line coefficients and the hash
+    # are computed once here
+    __slots__ = ('left', 'right', 'isVertical', 'slope', 'intercept', 'len', '_hash')
+
     def __init__(self, left, right):
         super().__init__()
         assert isinstance(left, Point) and isinstance(right, Point)
@@ -12,7 +17,7 @@ class LineSegment(GraphObject):
         if left.x < right.x:
             self.left = left
             self.right = right
-        elif left.x > left.x:
+        elif left.x > right.x:
             self.left = right
             self.right = left
         else:
@@ -25,22 +30,16 @@ class LineSegment(GraphObject):
 
         if left.x == right.x:
             self.isVertical = True
+            self.slope = None
+            self.intercept = None
         else:
             self.isVertical = False
+            self.slope = (self.right.y - self.left.y) / (self.right.x - self.left.x)
+            self.intercept = self.left.y - self.slope * self.left.x
+        # squared length
+        self.len = math.pow(self.right.x - self.left.x, 2) + math.pow(self.right.y - self.left.y, 2)
+        self._hash = hash((self.left, self.right))
 
-    @property
-    def len(self):
-        return math.pow(self.right.x - self.left.x, 2) + math.pow(self.right.y - self.left.y, 2)
-
-    @property
-    def slope(self):
-        return None if self.isVertical else (self.right.y - self.left.y) / (self.right.x - self.left.x)
-
-    @property
-    def intercept(self):
-        return self.left.y - self.slope * self.left.x
-
-    @property
     def get_Y(self, x):
         return Point(x, self.slope * x + self.intercept)
 
@@ -54,7 +53,7 @@ class LineSegment(GraphObject):
     # Check if pqr is counter-clockwise
     def ccw(p, q, r) -> int:
         assert isinstance(p, Point) and isinstance(q, Point) and isinstance(r, Point)
-        val = (q.y - p.y) * (r.x - q.x) - (q.x - p.x) * (r.y - q.y)
+        val = orientation(p, q, r)
 
         # this shows that the points are collinear
         if val == 0:
@@ -62,24 +61,15 @@ class LineSegment(GraphObject):
 
         # -1 for clockwise
         #  1 for counter-clockwise
-        return -1 if val > 0 else 1
+        return 1 if val > 0 else -1
 
     def aboveLine(self, point) -> bool:
         # Return true if point lies above line segment 'self'.
         assert isinstance(point, Point)
         if self.isVertical:
             raise ValueError("Above line is not defined for Vertical segments")
-        v1x = self.right.x - self.left.x  
-        v1y = self.right.y - self.left.y  
-        v2x = self.right.x - point.x  
-        v2y = self.right.y - point.y 
-        xp = v1x * v2y - v1y * v2x  # Cross product
-        # when its larger than zero, return false
-        # so we assume that if it lies on the line that it is "above"
-        if xp > 0:
-            return False
-        else:
-            return True
+        # we assume that if it lies on the line that it is "above"
+        return orientation(self.left, self.right, point) >= 0
 
     def intersects(self, other) -> bool:
         assert isinstance(other, LineSegment)
@@ -124,15 +114,17 @@ class LineSegment(GraphObject):
         return False
 
     def __hash__(self):
-        return super().__hash__()
+        return self._hash
 
     def __eq__(self, other):
-        if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+        if self is other:
+            return True
+        if isinstance(other, LineSegment):
+            return self._hash == other._hash and self.left == other.left and self.right == other.right
         return NotImplemented
 
     def __ne__(self, other):
-        if isinstance(other, self.__class__):
+        if isinstance(other, LineSegment):
             return not self == other
         return NotImplemented
 
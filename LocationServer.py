@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import struct
+import time
+
+import numpy as np
+
+from Histogram import Histogram
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+import SegmentFile
+
+# Protocol, requests of both kinds can be mixed on one connection:
+#   text lines:    "LOCATE x1 y1 [x2 y2 ...]" -> "OK id1 [id2 ...]"
+#                  "HEALTH" -> "OK healthy",  "STATS" -> "OK {json}",  errors -> "ERR message"
+#   binary frames: 0x01, uint32 count, count (x, y) float64 pairs -> 0x01, uint32 count, count int32 IDs
+# Numbers are little endian. IDs are trapezoid IDs as returned by locate_many (-1 on the wall through
+# a segment end point).
+BINARY_FRAME = 0x01
+_COUNT = struct.Struct('<BI')
+MAX_FRAME_POINTS = 1 << 24
+
+
+class QueryBatcher:
+    """
+    Coalesces concurrent locate requests: the first request of a batch waits at most window
+    seconds for others to join, then all of them are answered by one locate_many call.
+    A batch is also sent as soon as it holds max_batch points.
+    """
+
+    def __init__(self, locate_many, window=0.001, max_batch=65536):
+        self.locate_many = locate_many
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []
+        self._pending_points = 0
+        self._timer = None
+        self.batches = 0
+        self.batch_sizes = Histogram(low=1, high=1e8, buckets_per_decade=10)
+
+    async def locate(self, xs, ys):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((xs, ys, future))
+        self._pending_points += len(xs)
+        if self._pending_points >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._pending_points = self._pending, [], 0
+        if not pending:
+            return
+        try:
+            ids = self.locate_many(np.concatenate([p[0] for p in pending]), np.concatenate([p[1] for p in pending]))
+        except Exception as e:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.batch_sizes.record(len(ids))
+        start = 0
+        for xs, _, future in pending:
+            if not future.done():
+                future.set_result(ids[start:start + len(xs)])
+            start += len(xs)
+
+
+class LocationServer:
+    def __init__(self, R, window=0.001, max_batch=65536):
+        self.R = R
+        R.freeze()
+        self.batcher = QueryBatcher(R.locate_many, window, max_batch)
+        self.started = time.time()
+        self.connections = 0
+        self.requests = 0
+        self.queries = 0
+        self.errors = 0
+        self.latency = Histogram()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                first = await reader.read(1)
+                if not first:
+                    break
+                start = time.perf_counter()
+                if first[0] == BINARY_FRAME:
+                    response = await self._binary_request(reader)
+                else:
+                    response = await self._text_request(first + await reader.readline())
+                writer.write(response)
+                self.latency.record(time.perf_counter() - start)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _binary_request(self, reader):
+        count, = struct.unpack('<I', await reader.readexactly(4))
+        if count > MAX_FRAME_POINTS:
+            raise ConnectionError('frame too large')
+        points = np.frombuffer(await reader.readexactly(16 * count), dtype='<f8').reshape(count, 2)
+        ids = await self._locate(points[:, 0], points[:, 1])
+        return _COUNT.pack(BINARY_FRAME, count) + ids.astype('<i4').tobytes()
+
+    async def _text_request(self, line):
+        parts = line.decode('ascii', 'replace').split()
+        if not parts:
+            return b''
+        command = parts[0].upper()
+        try:
+            if command == 'LOCATE':
+                values = np.array(parts[1:], dtype=np.float64)
+                if len(values) == 0 or len(values) % 2:
+                    raise ValueError('LOCATE needs x y pairs')
+                ids = await self._locate(values[0::2], values[1::2])
+                return ('OK ' + ' '.join(map(str, ids.tolist())) + '\n').encode()
+            if command == 'HEALTH':
+                return b'OK healthy\n'
+            if command == 'STATS':
+                return ('OK ' + json.dumps(self.stats()) + '\n').encode()
+            raise ValueError('unknown command %s' % command)
+        except ValueError as e:
+            self.errors += 1
+            return ('ERR %s\n' % e).encode()
+
+    async def _locate(self, xs, ys):
+        self.requests += 1
+        self.queries += len(xs)
+        return await self.batcher.locate(xs, ys)
+
+    def stats(self):
+        uptime = time.time() - self.started
+        return {
+            'uptime': uptime,
+            'connections': self.connections,
+            'requests': self.requests,
+            'queries': self.queries,
+            'errors': self.errors,
+            'queries_per_second': self.queries / uptime if uptime else 0.0,
+            'batches': self.batcher.batches,
+            'mean_batch_size': self.batcher.batch_sizes.mean if self.batcher.batches else 0.0,
+            'latency_p50': self.latency.percentile(50) if self.latency.total else None,
+            'latency_p99': self.latency.percentile(99) if self.latency.total else None,
+            'dag_nodes': len(self.R.freeze()),
+        }
+
+    async def serve(self, host=None, port=None, unix_path=None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="serve point location queries over a TCP or Unix socket")
+    parser.add_argument('file_path', nargs='?', help="text or binary file with the bounding box and the line segments")
+    parser.add_argument('--load-map', metavar='PATH', help="serve a map written by main.py --save-map instead of building one")
+    parser.add_argument('--seed', type=int, help="seed of the random insertion order")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('--window', type=float, default=0.001, help="seconds a request waits for others to join its batch")
+    parser.add_argument('--max-batch', type=int, default=65536, help="largest number of points located together")
+    args = parser.parse_args()
+    if args.file_path is None and args.load_map is None:
+        parser.error("file_path is required unless --load-map is given")
+
+    segment_array, bbox = SegmentFile.load(args.file_path) if args.file_path else (None, None)
+    if args.load_map:
+        R = RandomizedIncrementalConstruction.load(args.load_map, segment_array)
+    else:
+        R = RandomizedIncrementalConstruction(segment_array, Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3]),
+                                              seed=args.seed)
+    server = LocationServer(R, args.window, args.max_batch)
+    print("Serving %d DAG nodes on %s" % (len(R.freeze()), args.unix or '%s:%d' % (args.host, args.port)), flush=True)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(server.serve(args.host, args.port, args.unix))
@@ -0,0 +1,112 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from Point import Point
+from Predicates import orient2d
+
+
+class LocatorSession:
+    """
+    Point location for coherent query streams, such as the GPS fixes of one vehicle. A query is
+    answered by the first of:
+      cache     an LRU of exact repeat points
+      previous  the trapezoid of the last query, when it contains the point
+      walk      a walk of at most max_steps trapezoids through the neighbor slots from there
+      dag       a full descent of the map's DAG
+    The answers are the trapezoid IDs RandomizedIncrementalConstruction.locate returns, -1 included.
+    The session needs the object DAG (not a map loaded from a file or frozen with release=True) and
+    starts over when the map is edited. On a compacted map (see compact) the walk finds no neighbors.
+    """
+    SOURCES = ('cache', 'previous', 'walk', 'dag')
+
+    def __init__(self, R, max_steps=8, cache_size=1024):
+        if R.DAG is None:
+            raise ValueError('a locator session needs the object DAG of the map')
+        self.R = R
+        self.max_steps = max_steps
+        self.cache_size = cache_size
+        self.hits = dict.fromkeys(self.SOURCES, 0)
+        self._trap_ids = None
+
+    # called when the map's trapezoid IDs changed: forget everything that refers to the old trapezoids
+    def _reset(self, trap_ids):
+        self._trap_ids = trap_ids
+        self._trapezoids = self.R.DAG.trapezoids()
+        self._cache = OrderedDict()
+        self._previous = None
+
+    def locate(self, x, y):
+        trap_ids = self.R.trapezoid_ids()
+        if trap_ids is not self._trap_ids:
+            self._reset(trap_ids)
+        key = (x, y)
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+            self.hits['cache'] += 1
+            if result >= 0:
+                self._previous = self._trapezoids[result]
+            return result
+
+        # a point on a wall is strictly inside no trapezoid, so neither previous nor the walk finds it
+        # and the DAG answers -1
+        t = self._previous
+        if t is not None:
+            if contains(t, x, y):
+                self.hits['previous'] += 1
+            else:
+                t = self._walk(t, x, y)
+                if t is not None:
+                    self.hits['walk'] += 1
+        if t is not None:
+            result = trap_ids[id(t)]
+        else:
+            self.hits['dag'] += 1
+            result = self.R.locate(Point(x, y))
+            if result >= 0:
+                t = self._trapezoids[result]
+        if t is not None:
+            self._previous = t
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    # locate for arrays of x and y coordinates, one query after the other
+    def locate_many(self, xs, ys):
+        return np.array([self.locate(x, y) for x, y in zip(xs.tolist(), ys.tolist())], dtype=np.int32)
+
+    # walks from t towards the point through the left and right neighbor slots, returns the trapezoid
+    # containing the point or None when it is not reached within max_steps. The walk only moves
+    # sideways, a point above the top or below the bottom segment of the current trapezoid ends it
+    def _walk(self, t, x, y):
+        for _ in range(self.max_steps):
+            if x <= t.left_p.x:
+                upper, lower, wall = t.upper_left, t.lower_left, t.left_p
+            elif x >= t.right_p.x:
+                upper, lower, wall = t.upper_right, t.lower_right, t.right_p
+            else:
+                return None
+            # cross the wall above or below its end point, on the side of the query point
+            t = upper if (y >= wall.y and upper is not None) or lower is None else lower
+            if t is None:
+                return None
+            if contains(t, x, y):
+                return t
+        return None
+
+    # share of the queries answered by every source
+    def hit_rates(self):
+        total = sum(self.hits.values())
+        return {source: count / total if total else 0.0 for source, count in self.hits.items()}
+
+
+# True when (x, y) lies strictly between the walls of t, below its top segment and above (or on) its
+# bottom segment, the side DAG queries take for points on a segment
+def contains(t, x, y):
+    if not t.left_p.x < x < t.right_p.x:
+        return False
+    top, bottom = t.top, t.bottom
+    return orient2d(top.left.x, top.left.y, top.right.x, top.right.y, x, y) < 0 and \
+        orient2d(bottom.left.x, bottom.left.y, bottom.right.x, bottom.right.y, x, y) >= 0
@@ -0,0 +1,64 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+from FrozenDAG import FrozenDAG
+
+# map used by the worker processes. With fork it is set before the pool starts and inherited:
+# the FrozenDAG is a handful of large arrays, so the workers share its pages copy-on-write and
+# never write to them. With map_path every worker memory-maps the saved map instead, which
+# shares the pages through the page cache and also works with the spawn start method
+_frozen = None
+
+
+def _load_map(map_path):
+    global _frozen
+    _frozen = FrozenDAG.load(map_path)
+
+
+def _locate_chunk(chunk):
+    xs, ys = chunk
+    return _frozen.locate_many(xs, ys)
+
+
+class ParallelLocator:
+    """
+    Splits large query batches over a pool of worker processes that all read one frozen map.
+    locate_many returns the trapezoid IDs in query order, like RandomizedIncrementalConstruction.locate_many.
+    Batches smaller than min_parallel points are answered in the calling process.
+    """
+
+    def __init__(self, R, workers=None, map_path=None, min_parallel=4096):
+        global _frozen
+        self.workers = workers or os.cpu_count()
+        self.min_parallel = min_parallel
+        if map_path is None:
+            self.frozen = R.freeze()
+            _frozen = self.frozen
+            self.pool = multiprocessing.get_context('fork').Pool(self.workers)
+        else:
+            self.frozen = FrozenDAG.load(map_path)
+            self.pool = multiprocessing.Pool(self.workers, initializer=_load_map, initargs=(map_path,))
+
+    def locate_many(self, xs, ys):
+        xs = np.ascontiguousarray(xs, dtype=np.float64)
+        ys = np.ascontiguousarray(ys, dtype=np.float64)
+        if xs.shape != ys.shape or xs.ndim != 1:
+            raise ValueError('xs and ys must be 1-d arrays of the same length')
+        if len(xs) < self.min_parallel or self.workers == 1:
+            return self.frozen.locate_many(xs, ys)
+        # a few chunks per worker, so a slow chunk does not hold up the whole batch
+        bounds = np.linspace(0, len(xs), self.workers * 4 + 1).astype(np.int64)
+        chunks = [(xs[a:b], ys[a:b]) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        return np.concatenate(self.pool.map(_locate_chunk, chunks))
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
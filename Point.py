@@ -2,42 +2,38 @@ from GraphObject import GraphObject
 
 
 class Point(GraphObject):
+    # points are never modified after they are created, the hash is computed once
+    __slots__ = ('x', 'y', '_hash')
+
     def __init__(self, x, y):
-        super().__init__()
+        assert isinstance(float(x), float), \
+            'Points must have positive integer x-coordinate: %d' % x
+        assert isinstance(float(y), float), \
+            'Points must have positive integer y-coordinate: %d' % y
         self.x = x
         self.y = y
+        self._hash = hash((x, y))
 
     def get_x(self):
-        return self._x
+        return self.x
 
     def get_y(self):
-        return self._y
-
-    def set_x(self, x):
-        assert isinstance(float(x), float), \
-            'Points must have positive integer x-coordinate: %d' % x
-        self._x = x
-
-    def set_y(self, y):
-        assert isinstance(float(y), float), \
-            'Points must have positive integer y-coordinate: %d' % y
-        self._y = y
-
-    x = property(get_x, set_x)
-    y = property(get_y, set_y)
+        return self.y
 
     def __hash__(self):
-        return super().__hash__()
+        return self._hash
 
     def __eq__(self, other):
-        if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+        if self is other:
+            return True
+        if isinstance(other, Point):
+            return self.x == other.x and self.y == other.y
         return NotImplemented
 
     def __ne__(self, other):
-        if isinstance(other, self.__class__):
+        if isinstance(other, Point):
             return not self == other
         return NotImplemented
 
     def __repr__(self):
-        return 'POINT(%.2f, %.2f)' % (float(self.x), float(self.y))
\ No newline at end of file
+        return 'POINT(%.2f, %.2f)' % (float(self.x), float(self.y))
@@ -0,0 +1,70 @@
+import numpy as np
+
+# Orientation test with a floating point filter. orient2d evaluates the cross product in floats and
+# returns it when its magnitude is larger than the forward error bound of that evaluation, so its
+# sign is certain. Otherwise the coordinates are converted to integers (every float is an integer
+# times a power of two) and the determinant is computed exactly. The bound is Shewchuk's
+# ccwerrboundA from "Adaptive Precision Floating-Point Arithmetic and Fast Robust Geometric
+# Predicates"; it assumes that no product underflows.
+EPSILON = 2.0 ** -53
+ORIENT_BOUND = (3.0 + 16.0 * EPSILON) * EPSILON
+
+# number of orient2d evaluations that needed the exact fallback, for benchmarks.predicates
+exact_evaluations = 0
+
+
+# exact (ax - cx) * (by - cy) - (ay - cy) * (bx - cx) of the coordinates, scaled by a positive power
+# of two. Returns an int with the sign of the determinant
+def orient2d_exact(ax, ay, bx, by, cx, cy):
+    global exact_evaluations
+    exact_evaluations += 1
+    ratios = [v.as_integer_ratio() for v in (ax, ay, bx, by, cx, cy)]
+    # the denominators are powers of two, so the largest one is a multiple of all others
+    scale = max(d for _, d in ratios)
+    ax, ay, bx, by, cx, cy = (n * (scale // d) for n, d in ratios)
+    return (ax - cx) * (by - cy) - (ay - cy) * (bx - cx)
+
+
+# a value with the sign of the orientation of c against the line from a to b: > 0 when c lies left of
+# (above, for a left of b) the directed line, < 0 when it lies right of it and 0 when the three
+# points are collinear. The value is the float determinant unless its sign was uncertain
+def orient2d(ax, ay, bx, by, cx, cy):
+    detleft = (ax - cx) * (by - cy)
+    detright = (ay - cy) * (bx - cx)
+    det = detleft - detright
+    # products of opposite signs (or a zero one) give the sign of det without rounding doubts
+    if detleft > 0:
+        if detright <= 0:
+            return det
+        detsum = detleft + detright
+    elif detleft < 0:
+        if detright >= 0:
+            return det
+        detsum = -detleft - detright
+    else:
+        return det
+    if det >= ORIENT_BOUND * detsum or -det >= ORIENT_BOUND * detsum:
+        return det
+    return orient2d_exact(ax, ay, bx, by, cx, cy)
+
+
+# orient2d of point c against the segment from a to b, for Point objects
+def orientation(a, b, c):
+    return orient2d(a.x, a.y, b.x, b.y, c.x, c.y)
+
+
+# orient2d for arrays of coordinates. Returns an int8 array of signs -1, 0 and 1; only the
+# entries whose float determinant is within the error bound are recomputed exactly, one by one
+def orient2d_signs(ax, ay, bx, by, cx, cy):
+    detleft = (ax - cx) * (by - cy)
+    detright = (ay - cy) * (bx - cx)
+    det = detleft - detright
+    signs = np.sign(det).astype(np.int8)
+    # strict, so that two zero products (an exact zero) are not recomputed
+    uncertain = np.abs(det) < ORIENT_BOUND * (np.abs(detleft) + np.abs(detright))
+    index = np.nonzero(uncertain)[0]
+    if len(index):
+        columns = [np.broadcast_to(v, det.shape)[index].tolist() for v in (ax, ay, bx, by, cx, cy)]
+        exact = [orient2d_exact(*row) for row in zip(*columns)]
+        signs[index] = [(v > 0) - (v < 0) for v in exact]
+    return signs
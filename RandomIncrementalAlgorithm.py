@@ -1,24 +1,609 @@
-from DAGNode import Point, LineSegment, DAGNode
+from Point import Point
+from LineSegment import LineSegment
+from DAGNode import DAGNode
 from DAG import DAG
+from EndpointTable import EndpointTable
+from FrozenDAG import FrozenDAG
 from Trapezoid import Trapezoid
-from itertools import groupby
+import SegmentFile
+import Instrumentation
+import Predicates
+from Predicates import orientation, orient2d_signs
+import gc
+import math
 import random
+import time
+import tracemalloc
+import numpy as np
+
+
+# smallest number of points _redistribute classifies with array operations
+CONFLICT_BATCH = 128
+
+# bound on the depth of an edited map in units of ln(n + 1) when no depth_factor is given, see
+# _rebuildIfDegraded
+EDIT_DEPTH_FACTOR = 8
 
 
 class RandomizedIncrementalConstruction:
-    def __init__(self, segments, boundBottomLeft, boundTopRight):
-        for segment in segments:
-            assert isinstance(segment, LineSegment)
-        self.segements = segments
+    # segments: a list of LineSegments, or an (n, 4) array of (x1, y1, x2, y2) rows as returned by
+    # the SegmentFile loaders. Segments given as an array become LineSegment objects only when
+    # they are inserted.
+    # seed: seed of the random insertion order, a random one is drawn when it is None.
+    # depth_factor: when set, a build whose max query depth exceeds depth_factor * ln(n + 1) is
+    # thrown away and redone with a new seed, at most max_attempts builds are made.
+    # conflict_lists: find the trapezoid of every left end point from conflict lists instead of a DAG
+    # search (see _conflictStart), the map is the same. This is for the bound, not for speed: the
+    # conflict list work is O(n log n) expected in total for every input, whatever the depth of the
+    # DAG, but in CPython the build is slower than with DAG searches, which take only about a tenth
+    # of it
+    # intern_endpoints: for a segment array, segments with a common end point get the same Point
+    # object for it from an EndpointTable (self.endpoints), instead of one Point per segment end
+    def __init__(self, segments, boundBottomLeft, boundTopRight, seed=None, depth_factor=None, max_attempts=10,
+                 conflict_lists=False, intern_endpoints=True):
+        self.endpoints = None
+        if isinstance(segments, np.ndarray):
+            if segments.ndim != 2 or segments.shape[1] != 4:
+                raise ValueError('segment array must have shape (n, 4)')
+            self.segment_array = segments
+            self.segements = [None] * len(segments)
+            if intern_endpoints:
+                self.endpoints = EndpointTable(segments)
+        else:
+            for segment in segments:
+                assert isinstance(segment, LineSegment)
+            self.segment_array = None
+            self.segements = segments
         self.DAG = None
         self.boundBottomLeft = boundBottomLeft
         self.boundTopRight = boundTopRight
+        self.seed = seed
+        self.depth_factor = depth_factor
+        self.max_attempts = max_attempts
+        self.conflict_lists = conflict_lists
+        # conflict lists of the build, see _initConflicts
+        self._conflicts = None
+        # seed, max query depth and number of builds of the last computeDecomposition
+        self.build_report = None
+        self._frozen = None
+        self._trap_ids = None
+        # segment -> position in self.segements, see _segmentIndex
+        self._segment_index = None
+        # segment -> (face above, face below), see set_face_labels
+        self._segment_faces = {}
+        self.outer_face = -1
+        self._faces = None
+        # set by compact, the map can then no longer be edited
+        self._compacted = False
+        # number of times an edit rebuilt the map, see _rebuildIfDegraded
+        self.edit_rebuilds = 0
         self.computeDecomposition()
 
     def computeDecomposition(self):
-        self.computeBoundingBox(self.boundBottomLeft, self.boundTopRight)
-        for segment in self.segements:
-            self.insert_segment(segment)
+        seed = self.seed if self.seed is not None else random.randrange(2 ** 32)
+        max_depth = None if self.depth_factor is None else self.depth_factor * math.log(len(self.segements) + 1)
+        attempt = 1
+        while True:
+            order = list(range(len(self.segements)))
+            random.Random(seed).shuffle(order)
+            self.computeBoundingBox(self.boundBottomLeft, self.boundTopRight)
+            if self.conflict_lists:
+                self._initConflicts(order)
+                for k, i in enumerate(order):
+                    self.insert_segment(self.getSegment(i), self._conflictStart(k))
+                self._conflicts = self._owner = self._ends = self._end_array = None
+            else:
+                for i in order:
+                    self.insert_segment(self.getSegment(i))
+            depth = self.DAG.max_depth()
+            if max_depth is None or depth <= max_depth or attempt == self.max_attempts:
+                break
+            # the next seed is derived from the last one, so a build can always be
+            # reproduced from the seed it reports
+            seed = random.Random(seed).randrange(2 ** 32)
+            attempt += 1
+        self.seed = seed
+        self.build_report = {'seed': seed, 'depth': depth, 'attempts': attempt}
+
+    # returns segment i of the input, creating it from the segment array on first use
+    def getSegment(self, i):
+        segment = self.segements[i]
+        if segment is None:
+            if self.endpoints is not None:
+                segment = self.segements[i] = LineSegment(*self.endpoints.segment_points(i))
+            else:
+                x1, y1, x2, y2 = self.segment_array[i].tolist()
+                segment = self.segements[i] = LineSegment(Point(x1, y1), Point(x2, y2))
+        return segment
+
+    # returns the trapezoid ID (see DAG.trapezoids) of the trapezoid containing query_point, or -1
+    # when the point lies on a wall: the vertical line through a segment end point, up and down to the
+    # next segments. The answer does not depend on the seed, see FrozenDAG.locate
+    def locate(self, query_point):
+        assert isinstance(query_point, Point)
+        if self.DAG is None:
+            return self._frozen.locate(query_point.x, query_point.y)
+        trap_ids = self.trapezoid_ids()
+        if Instrumentation.sink is not None:
+            Instrumentation.sink.record('query_node_visits', self.DAG.path_length(query_point))
+        node = self.DAG.root
+        while True:
+            if isinstance(node.graph_object, Point):
+                # a point on the vertical line goes right, into a trapezoid whose left wall it lies on
+                # when it is on a wall
+                if query_point.x < node.graph_object.x:
+                    node = node.left_child
+                else:
+                    node = node.right_child
+            elif isinstance(node.graph_object, LineSegment):
+                if node.graph_object.aboveLine(query_point):
+                    node = node.left_child
+                else:
+                    node = node.right_child
+            elif isinstance(node.graph_object, Trapezoid):
+                t = node.graph_object
+                if query_point.x == t.left_p.x and query_point.x > self.boundBottomLeft.x:
+                    return -1
+                return trap_ids[id(t)]
+            else:
+                raise ValueError('invalid DAG node!')
+
+    # id() of every trapezoid -> its trapezoid ID. The dict is cached until the map changes, a new
+    # dict is built after every insert or delete
+    def trapezoid_ids(self):
+        if self._trap_ids is None:
+            self._trap_ids = {id(t): i for i, t in enumerate(self.DAG.trapezoids())}
+        return self._trap_ids
+
+    # labels the faces on both sides of the segments: above[i] and below[i] are the face IDs above and
+    # below segment i of self.segements (its left and right side seen from its left end point).
+    # Segments inserted later have no labels, the trapezoids of a face then get the label of any of
+    # its labeled segments. outer is the face of the parts of the bounding box no label reaches
+    def set_face_labels(self, above, below, outer=-1):
+        if self.DAG is None:
+            raise ValueError('faces are labeled on the object DAG, this map has none')
+        if self._compacted:
+            raise ValueError('faces must be labeled before the map is compacted')
+        if len(above) != len(self.segements) or len(below) != len(self.segements):
+            raise ValueError('need one face above and one below each of the %d segments' % len(self.segements))
+        self._segment_faces = {self.getSegment(i): (int(a), int(b)) for i, (a, b) in enumerate(zip(above, below))}
+        self.outer_face = outer
+        self._faces = None
+
+    # face ID of every trapezoid as an int array indexed by trapezoid ID, also stored in Trapezoid.face.
+    # The faces are the groups of trapezoids connected through their vertical walls, so every group
+    # takes the label of the segments above and below its trapezoids. Recomputed after every edit
+    def face_ids(self):
+        trap_ids = self.trapezoid_ids()
+        if self._faces is not None and self._faces[0] is trap_ids:
+            return self._faces[1]
+        trapezoids = self.DAG.trapezoids()
+        faces = np.full(len(trapezoids), self.outer_face, dtype=np.int64)
+        seen = set()
+        for t in trapezoids:
+            if id(t) in seen:
+                continue
+            # flood fill through the walls
+            group, stack = [], [t]
+            seen.add(id(t))
+            while stack:
+                u = stack.pop()
+                group.append(u)
+                for n in (u.upper_left, u.lower_left, u.upper_right, u.lower_right):
+                    if n is not None and id(n) not in seen:
+                        seen.add(id(n))
+                        stack.append(n)
+            face = source = None
+            for u in group:
+                for label, segment in ((self._segment_faces.get(u.top, (None, None))[1], u.top),
+                                       (self._segment_faces.get(u.bottom, (None, None))[0], u.bottom)):
+                    if label is None:
+                        continue
+                    if face is None:
+                        face, source = label, segment
+                    elif label != face:
+                        raise ValueError('%s and %s give the same face the labels %d and %d' % (source, segment, face, label))
+            if face is None:
+                face = self.outer_face
+            for u in group:
+                u.face = face
+                faces[trap_ids[id(u)]] = face
+        self._faces = (trap_ids, faces)
+        return faces
+
+    # face ID of the face containing query_point, None when locate returns -1
+    def locate_face(self, query_point):
+        i = self.locate(query_point)
+        return None if i < 0 else int(self.face_ids()[i])
+
+    # face IDs for arrays of x and y coordinates, missing for queries on the wall through an end point
+    # (locate_many returns -1 for those, -1 is also the default outer face)
+    def locate_faces(self, xs, ys, missing=-2):
+        faces = self.face_ids()
+        ids = self.locate_many(xs, ys)
+        return np.where(ids >= 0, faces[ids], missing)
+
+    # batch version of locate for arrays of x and y coordinates, returns an int array of trapezoid IDs
+    def locate_many(self, xs, ys):
+        return self.freeze().locate_many(xs, ys)
+
+    # compiles the DAG into a FrozenDAG, which answers queries from flat arrays. The result is cached
+    # until the DAG changes. With release=True the object DAG is dropped afterwards to free its memory,
+    # the map can then only be queried
+    def freeze(self, release=False):
+        if self._frozen is None:
+            self._frozen = FrozenDAG.from_dag(self.DAG)
+            self._frozen.seed = self.seed
+            self._frozen.source_checksum = self.source_checksum()
+        if release:
+            self.DAG = None
+            self._trap_ids = None
+        return self._frozen
+
+    # drops what only the construction needs, for a map that is queried from now on: the neighbor slots
+    # and DAG node references of the trapezoids (see Trapezoid.compact), the end point counts and the
+    # segment index of insert and delete, and the cached frozen copy, which freeze builds again when
+    # asked. The face IDs of a labeled map are computed first, as they need the neighbor slots.
+    # Afterwards the map can no longer be edited, and LocatorSession walks find no neighbors and fall
+    # back to the DAG. Returns the number of trapezoids, the number of unreachable objects the garbage
+    # collector released (trapezoids retired during the build that still reference each other) and,
+    # while tracemalloc is tracing, the traced heap size in bytes before and after
+    def compact(self):
+        if self.DAG is None:
+            raise ValueError('the map was frozen with release=True, there is nothing left to compact')
+        heap_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        if self._segment_faces:
+            self.face_ids()
+        count = 0
+        for t in self.DAG.trapezoids():
+            t.compact()
+            count += 1
+        self._endpoint_counts = None
+        self._segment_index = None
+        self._frozen = None
+        self._compacted = True
+        released = gc.collect()
+        heap_after = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        return {'trapezoids': count, 'released_objects': released, 'heap_before': heap_before, 'heap_after': heap_after}
+
+    # raises ValueError when the map can no longer be edited
+    def _assertModifiable(self):
+        if self.DAG is None:
+            raise ValueError('the map was frozen with release=True and can no longer be modified')
+        if self._compacted:
+            raise ValueError('the map was compacted and can no longer be modified')
+
+    # SHA-256 of the input segments (see SegmentFile.checksum)
+    def source_checksum(self):
+        return self.segments_checksum(self.segment_array if self.segment_array is not None else self.segements)
+
+    # SHA-256 of a list of LineSegments or of an (n, 4) segment array
+    @staticmethod
+    def segments_checksum(segments):
+        if not isinstance(segments, np.ndarray):
+            segments = [(s.left.x, s.left.y, s.right.x, s.right.y) for s in segments]
+        return SegmentFile.checksum(segments)
+
+    # writes the frozen map to file_path (see FrozenDAG.save)
+    def save(self, file_path):
+        self.freeze().save(file_path)
+
+    # reads a map written by save. The returned map answers queries straight from the
+    # memory-mapped file and cannot be modified. When segments are given, the file must have been
+    # built from them
+    @classmethod
+    def load(cls, file_path, segments=None):
+        frozen = FrozenDAG.load(file_path, None if segments is None else cls.segments_checksum(segments))
+        R = cls.__new__(cls)
+        R.segements = None
+        R.segment_array = None
+        R.endpoints = None
+        R.DAG = None
+        R.boundBottomLeft = R.boundTopRight = None
+        R.seed = frozen.seed
+        R.depth_factor = None
+        R.max_attempts = None
+        R.conflict_lists = False
+        R._conflicts = None
+        R.build_report = None
+        R._frozen = frozen
+        R._trap_ids = None
+        R._segment_index = None
+        R._segment_faces = {}
+        R.outer_face = -1
+        R._faces = None
+        R._compacted = False
+        R.edit_rebuilds = 0
+        R._depth = R._edit_nodes = 0
+        return R
+
+    # adds segment to the map in place. The segment must not cross the segments already in the map.
+    # An edit drops the trapezoid IDs and the frozen map, so the next query or freeze rebuilds them in
+    # O(n); batch the edits before querying. An edit can also rebuild the map, see _rebuildIfDegraded
+    def insert(self, segment):
+        assert isinstance(segment, LineSegment)
+        self._assertModifiable()
+        index = self._segmentIndex()
+        if segment in index:
+            raise ValueError('%s is already in the map' % segment)
+        self.insert_segment(segment)
+        index[segment] = len(self.segements)
+        self.segements.append(segment)
+        self._rebuildIfDegraded()
+
+    # removes segment from the map in place. The trapezoids above and below the segment (and the ones
+    # next to an end point no other segment uses) are replaced by the trapezoids of the region without
+    # it. Their DAG leaves become small X-node trees over the new trapezoids, so the DAG keeps the
+    # nodes of deleted segments until the map is rebuilt. Walls are ordered like in insert_segment
+    # (see leftOf), so walls through points with the same x bound trapezoids of zero width.
+    # The new region is worked out before anything changes, a failed delete leaves the map as it was
+    def delete(self, segment):
+        assert isinstance(segment, LineSegment)
+        self._assertModifiable()
+        index = self._segmentIndex()
+        if segment not in index:
+            raise ValueError('%s is not in the map' % segment)
+        # the trapezoids reference the inserted object, which can differ from the argument
+        segment = self.segements[index[segment]]
+
+        above, below = self.getAdjacentTrapezoids(segment)
+        if not above or not below or above[0].left_p != segment.left or below[0].left_p != segment.left \
+                or above[-1].right_p != segment.right or below[-1].right_p != segment.right:
+            raise ValueError('the trapezoids next to %s do not span it' % segment)
+        # without another segment ending in it, the wall through an end point goes away as well and
+        # the trapezoid on its far side joins the region. Its wall runs through the end point, so
+        # above[0] and below[0] (above[-1] and below[-1]) are its neighbors
+        leftTrap = rightTrap = None
+        if self._endpoint_counts[segment.left] == 1:
+            leftTrap = above[0].upper_left
+            if leftTrap is None or leftTrap is not below[0].lower_left:
+                raise ValueError('no single trapezoid left of the end point %s' % segment.left)
+        if self._endpoint_counts[segment.right] == 1:
+            rightTrap = above[-1].upper_right
+            if rightTrap is None or rightTrap is not below[-1].lower_right:
+                raise ValueError('no single trapezoid right of the end point %s' % segment.right)
+        ends = [t for t in (leftTrap, rightTrap) if t is not None]
+        old = above + below + ends
+
+        # every wall left inside the region reaches from its top to its bottom. Each one comes from
+        # the top chain or the bottom chain, with the old trapezoids on its two sides
+        inner = sorted([(t.right_p, t, n, True) for t, n in zip(above[:-1], above[1:])] +
+                       [(t.right_p, t, n, False) for t, n in zip(below[:-1], below[1:])],
+                       key=lambda wall: (wall[0].x, wall[0].y))
+        walls = [leftTrap.left_p if leftTrap else segment.left] + [wall[0] for wall in inner] + \
+                [rightTrap.right_p if rightTrap else segment.right]
+        tops = ([leftTrap] if leftTrap else []) + above + ([rightTrap] if rightTrap else [])
+        bottoms = ([leftTrap] if leftTrap else []) + below + ([rightTrap] if rightTrap else [])
+        newTrapezoids = []
+        i = j = 0
+        for left_p, right_p in zip(walls[:-1], walls[1:]):
+            if not leftOf(left_p, right_p):
+                raise ValueError('the walls next to %s are out of order at %s' % (segment, right_p))
+            while i < len(tops) and not leftOf(left_p, tops[i].right_p):
+                i += 1
+            while j < len(bottoms) and not leftOf(left_p, bottoms[j].right_p):
+                j += 1
+            if i == len(tops) or j == len(bottoms):
+                raise ValueError('the trapezoids next to %s do not reach past %s' % (segment, left_p))
+            newTrapezoids.append(Trapezoid(left_p, right_p, tops[i].top, bottoms[j].bottom))
+        # the new trapezoids every old one overlaps, its leaf becomes a search over them
+        overlaps = [[n for n in newTrapezoids if leftOf(n.left_p, t.right_p) and leftOf(t.left_p, n.right_p)]
+                    for t in old]
+
+        # from here on the map changes
+        i = index.pop(segment)
+        last = self.segements.pop()
+        if i < len(self.segements):
+            self.segements[i] = last
+            index[last] = i
+        self._frozen = None
+        self._trap_ids = None
+        for p in (segment.left, segment.right):
+            self._endpoint_counts[p] -= 1
+            if self._endpoint_counts[p] == 0:
+                del self._endpoint_counts[p]
+
+        # neighbors across the region's left and right walls: the old trapezoids' outside neighbors
+        first, last = newTrapezoids[0], newTrapezoids[-1]
+        upper, lower = (leftTrap, leftTrap) if leftTrap else (above[0], below[0])
+        first.upper_left = upper.upper_left
+        replaceRightNeighbor(upper.upper_left, upper, first)
+        first.lower_left = lower.lower_left
+        replaceRightNeighbor(lower.lower_left, lower, first)
+        upper, lower = (rightTrap, rightTrap) if rightTrap else (above[-1], below[-1])
+        last.upper_right = upper.upper_right
+        replaceLeftNeighbor(upper.upper_right, upper, last)
+        last.lower_right = lower.lower_right
+        replaceLeftNeighbor(lower.lower_right, lower, last)
+        # across an inner wall from the top chain, the part above its point borders the old
+        # trapezoids' outside neighbors and the part below it the next new trapezoid
+        for (_, t, n, fromTop), left, right in zip(inner, newTrapezoids[:-1], newTrapezoids[1:]):
+            if fromTop:
+                left.upper_right = t.upper_right
+                replaceLeftNeighbor(t.upper_right, t, left)
+                left.lower_right, right.lower_left = right, left
+                right.upper_left = n.upper_left
+                replaceRightNeighbor(n.upper_left, n, right)
+            else:
+                left.lower_right = t.lower_right
+                replaceLeftNeighbor(t.lower_right, t, left)
+                left.upper_right, right.upper_left = right, left
+                right.lower_left = n.lower_left
+                replaceRightNeighbor(n.lower_left, n, right)
+
+        # the leaf of every old trapezoid becomes a search over the new trapezoids it overlaps
+        for t, parts in zip(old, overlaps):
+            if len(parts) == 1:
+                # a leaf cannot be shared by copying it, so route through an X-node whose point lies
+                # at or left of the old trapezoid
+                t.node = DAGNode(parts[0].left_p, parts[0].node, parts[0].node)
+                parts[0].depth = max(parts[0].depth, t.depth + 1)
+                self._edit_nodes += 1
+            else:
+                t.node = self._wallTree(parts, t.depth)
+                self._edit_nodes += len(parts) - 1
+        self._depth = max(self._depth, max(n.depth for n in newTrapezoids))
+        self._rebuildIfDegraded()
+
+    # Conflict lists (Clarkson and Shor): during a build every trapezoid knows the left end points of the
+    # segments still to be inserted that lie in it, so the insertion of a segment starts from its
+    # trapezoid without a DAG search. The k-th segment in insertion order has the end points
+    # self._ends[k] (also row k of self._end_array) and its left end point lies in self._owner[k];
+    # self._conflicts maps id() of a trapezoid to the list of the k it holds. Every point goes where
+    # locateLeftEndpoint would send it, so the map is the one of a build with DAG searches
+    def _initConflicts(self, order):
+        self._ends = [(s.left.x, s.left.y, s.right.x, s.right.y) for s in (self.getSegment(i) for i in order)]
+        self._end_array = np.array(self._ends, dtype=np.float64).reshape(-1, 4)
+        box = self.DAG.root.graph_object
+        self._owner = [box] * len(order)
+        self._conflicts = {id(box): list(range(len(order)))}
+
+    # trapezoid of the left end point of the k-th segment, which leaves its conflict list
+    def _conflictStart(self, k):
+        t = self._owner[k]
+        self._conflicts[id(t)].remove(k)
+        return t
+
+    # moves the points of the crossed trapezoids into the trapezoids that replace them: left of the
+    # segment's left end point into newLeft, right of its right end point into newRight (both None
+    # when the end point was already in the map) and the others into the top or bottom part of the
+    # crossed trapezoid they were in, by the side of the segment they lie on. A point on the segment
+    # is its shared left end point, its own right end point decides, as in locateLeftEndpoint.
+    # Batches of at least CONFLICT_BATCH points are classified with array operations, smaller ones
+    # (most of them, a trapezoid holds O(n / k) points after k insertions) one by one
+    def _redistribute(self, segment, crossed, tops, bottoms, newLeft, newRight):
+        parts = []
+        for i, t in enumerate(crossed):
+            pending = self._conflicts.pop(id(t), None)
+            if pending:
+                parts.append((i, pending))
+        if not parts:
+            return
+        l, r = segment.left, segment.right
+        lists = {}
+        if sum(len(pending) for _, pending in parts) < CONFLICT_BATCH:
+            lx, ly, rx, ry = l.x, l.y, r.x, r.y
+            ends = self._ends
+            bound = Predicates.ORIENT_BOUND
+            last = len(crossed) - 1
+            for i, pending in parts:
+                above = lists.setdefault(id(tops[i]), (tops[i], []))[1]
+                below = lists.setdefault(id(bottoms[i]), (bottoms[i], []))[1]
+                # only the first and the last crossed trapezoid reach past the segment's end points
+                left = lists.setdefault(id(newLeft), (newLeft, []))[1] if i == 0 and newLeft is not None else None
+                right = lists.setdefault(id(newRight), (newRight, []))[1] if i == last and newRight is not None else None
+                for k in pending:
+                    x, y, qx, qy = ends[k]
+                    if left is not None and (x < lx or (x == lx and y < ly)):
+                        left.append(k)
+                        continue
+                    if right is not None and (x > rx or (x == rx and y >= ry)):
+                        right.append(k)
+                        continue
+                    # orientation(l, r, (x, y)) with the float filter written out, as in the walk
+                    detleft = (lx - x) * (ry - y)
+                    detright = (ly - y) * (rx - x)
+                    det = detleft - detright
+                    if abs(det) < bound * (abs(detleft) + abs(detright)):
+                        det = Predicates.orient2d_exact(lx, ly, rx, ry, x, y)
+                    if det == 0:
+                        det = Predicates.orient2d(lx, ly, rx, ry, qx, qy)
+                    (above if det >= 0 else below).append(k)
+        else:
+            pending = np.array([k for _, p in parts for k in p], dtype=np.int64)
+            where = np.repeat([i for i, _ in parts], [len(p) for _, p in parts])
+            x, y, rx, ry = self._end_array[pending].T
+            side = orient2d_signs(l.x, l.y, r.x, r.y, x, y)
+            on = np.nonzero(side == 0)[0]
+            if len(on):
+                side[on] = orient2d_signs(l.x, l.y, r.x, r.y, rx[on], ry[on])
+            # destination 0 is newLeft, 1 newRight, 2 + i the top and 2 + len(crossed) + i the bottom
+            # part of crossed[i]
+            destination = np.where(side >= 0, 2 + where, 2 + len(crossed) + where)
+            if newLeft is not None:
+                destination[(x < l.x) | ((x == l.x) & (y < l.y))] = 0
+            if newRight is not None:
+                destination[(x > r.x) | ((x == r.x) & (y >= r.y))] = 1
+            targets = [newLeft, newRight] + tops + bottoms
+            order = np.argsort(destination, kind='stable')
+            destination = destination[order]
+            bounds = np.flatnonzero(np.diff(destination)) + 1
+            for d, group in zip(destination[np.concatenate([[0], bounds])].tolist(), np.split(pending[order], bounds)):
+                # runs of crossed trapezoids share one part, their points end up in one list
+                lists.setdefault(id(targets[d]), (targets[d], []))[1].extend(group.tolist())
+        owner = self._owner
+        for t, pending in lists.values():
+            if pending:
+                for k in pending:
+                    owner[k] = t
+                self._conflicts[id(t)] = pending
+
+    # balanced X-node tree over the walls between consecutive trapezoids, its root at the given depth
+    def _wallTree(self, trapezoids, depth):
+        if len(trapezoids) == 1:
+            trapezoids[0].depth = max(trapezoids[0].depth, depth)
+            return trapezoids[0].node
+        mid = len(trapezoids) // 2
+        return DAGNode(trapezoids[mid].left_p, self._wallTree(trapezoids[:mid], depth + 1),
+                       self._wallTree(trapezoids[mid:], depth + 1))
+
+    # Edits only make the map deeper: they extend search paths, and delete leaves the nodes of the
+    # removed segment behind. The map is rebuilt from its current segments (see computeDecomposition)
+    # once its depth exceeds depth_factor (EDIT_DEPTH_FACTOR without one) times ln(n + 1) and twice the
+    # depth of the last build, or once deletes have added more nodes than the map has segments.
+    # Rebuilds happen at most every n / O(1) deletes, so an edit costs O(log n) amortized expected time
+    def _rebuildIfDegraded(self):
+        n = len(self.segements)
+        factor = self.depth_factor if self.depth_factor is not None else EDIT_DEPTH_FACTOR
+        if self._depth > max(factor * math.log(n + 1), 2 * self.build_report['depth']) or self._edit_nodes > n:
+            self.computeDecomposition()
+            self.edit_rebuilds += 1
+
+    # trapezoids directly above and directly below segment, each list ordered left to right. The DAG
+    # is searched with the whole segment: X-nodes narrow down its x-range, Y-nodes of other segments
+    # compare the two segments somewhere in that range and the segment's own Y-nodes lead to both sides
+    def getAdjacentTrapezoids(self, segment):
+        above, below = {}, {}
+        seen = set()
+        stack = [(self.DAG.root, segment.left, segment.right)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if (id(node), lo, hi) in seen:
+                continue
+            seen.add((id(node), lo, hi))
+            obj = node.graph_object
+            if isinstance(obj, Point):
+                # lo and hi are points, ordered like in locateLeftEndpoint
+                if leftOf(lo, obj):
+                    stack.append((node.left_child, lo, hi if leftOf(hi, obj) else obj))
+                if leftOf(obj, hi):
+                    stack.append((node.right_child, obj if leftOf(lo, obj) else lo, hi))
+            elif isinstance(obj, LineSegment):
+                if obj is segment:
+                    stack.append((node.left_child, lo, hi))
+                    stack.append((node.right_child, lo, hi))
+                else:
+                    if segmentAbove(segment, obj):
+                        stack.append((node.left_child, lo, hi))
+                    else:
+                        stack.append((node.right_child, lo, hi))
+            elif obj.bottom is segment:
+                above[id(obj)] = obj
+            elif obj.top is segment:
+                below[id(obj)] = obj
+        return (sorted(above.values(), key=lambda t: (t.left_p.x, t.left_p.y)),
+                sorted(below.values(), key=lambda t: (t.left_p.x, t.left_p.y)))
+
+    # segment -> position in self.segements, built on the first edit. A map given as an array keeps
+    # its segments as LineSegments from then on
+    def _segmentIndex(self):
+        if self._segment_index is None:
+            self.segements = [self.getSegment(i) for i in range(len(self.segements))]
+            self.segment_array = None
+            # edits reorder the segments, the point IDs of the table no longer fit them
+            self.endpoints = None
+            self._segment_index = {s: i for i, s in enumerate(self.segements)}
+        return self._segment_index
 
     def computeBoundingBox(self, bottomLeftPoint, topRightPoint):
         topRight = topRightPoint
@@ -29,258 +614,245 @@ class RandomizedIncrementalConstruction:
                       LineSegment(Point(bottomLeft.x, topRight.y), topRight),
                       LineSegment(bottomLeft, Point(topRight.x, bottomLeft.y)))
         
-        self.DAG = DAG(DAGNode(B))
+        self.DAG = DAG(B.node)
+        # number of inserted segments ending in each point
+        self._endpoint_counts = {}
+        self._compacted = False
+        # max depth of the DAG (see Trapezoid.depth) and the number of nodes delete added
+        self._depth = 0
+        self._edit_nodes = 0
 
-    def getIntersectingTrapezoids(self, line_seg):
-        assert isinstance(line_seg, LineSegment)
-        left_trap = self.DAG.root.getQueryResult(line_seg.left, line_seg)
-        right_trap = self.DAG.root.getQueryResult(line_seg.right, line_seg)
-        current_trapezoid = left_trap[0].graph_object
-        intersecting_trapezoids = [current_trapezoid]
-        count = 0
-        while current_trapezoid != right_trap[0].graph_object:
-            if count == 7:
-                raise ValueError("This is a custom error message.")
-            print(line_seg)
-            print("CURR:",current_trapezoid)
-            for right_nei in current_trapezoid.right_neighbors:
-                print("RIGHT NEI: ", right_nei)
-            print()
-            print("RIGHT:",right_trap[0].graph_object)
-            print()
-            for right_nei in current_trapezoid.right_neighbors:
-                if right_nei == current_trapezoid:
-                    continue
-                if right_nei.left_p == right_nei.bottom.left:
-                    l = right_nei.top
-                    y = l.slope * right_nei.left_p.x + l.intercept
-                    l = LineSegment(right_nei.left_p, Point(right_nei.left_p.x, y))
-                elif right_nei.left_p == right_nei.top.left:
-                    l = right_nei.bottom
-                    y = l.slope * right_nei.left_p.x + l.intercept
-                    l = LineSegment(Point(right_nei.left_p.x, y), right_nei.left_p)
+    # DAG search for the trapezoid that segment starts in: the one containing the points of segment just
+    # right of its left end point. An end point shared with a segment already in the map is resolved
+    # by the side of that segment on which the new segment's right end point lies
+    def locateLeftEndpoint(self, segment):
+        p = segment.left
+        node = self.DAG.root
+        while True:
+            obj = node.graph_object
+            if isinstance(obj, Point):
+                # points with the same x are ordered by y, as if the plane were sheared slightly
+                if p.x < obj.x or (p.x == obj.x and p.y < obj.y):
+                    node = node.left_child
                 else:
-                    l = right_nei.bottom
-                    bottom_y = l.slope * right_nei.left_p.x + l.intercept
-                    l = right_nei.top
-                    top_y = l.slope * right_nei.left_p.x + l.intercept
-                    l = LineSegment(Point(right_nei.left_p.x, bottom_y), Point(right_nei.left_p.x, top_y))
-
-                if l.intersects(line_seg):
-                    intersecting_trapezoids.append(right_nei)
-                    current_trapezoid = right_nei
-                    break
-            count += 1
-        return intersecting_trapezoids, left_trap, right_trap
+                    node = node.right_child
+            elif isinstance(obj, LineSegment):
+                side = orientation(obj.left, obj.right, p)
+                if side == 0:
+                    side = orientation(obj.left, obj.right, segment.right)
+                # same convention as LineSegment.aboveLine: above goes left
+                node = node.left_child if side >= 0 else node.right_child
+            else:
+                return obj
+
+    # trapezoids crossed by line_seg from left to right. From each trapezoid the walk continues into its
+    # lower right neighbor when the trapezoid's right point lies above the segment, and into its upper
+    # right neighbor otherwise, until the trapezoid that contains the right end point. start_trapezoid is
+    # the trapezoid of the left end point when it is already known, otherwise the DAG is searched
+    def getIntersectingTrapezoids(self, line_seg, start_trapezoid=None):
+        assert isinstance(line_seg, LineSegment)
+        left, right = line_seg.left, line_seg.right
+        profiler = Instrumentation.profiler
+        if profiler is not None:
+            start = time.perf_counter()
+        trapezoid = self.locateLeftEndpoint(line_seg) if start_trapezoid is None else start_trapezoid
+        if profiler is not None:
+            start = profiler.lap('locate', start)
+        intersecting_trapezoids = [trapezoid]
+        while True:
+            r = trapezoid.right_p
+            if r.x > right.x or (r.x == right.x and r.y >= right.y):
+                break
+            # orientation(left, right, r) with the float filter written out, this is the inner loop of
+            # every insertion
+            detleft = (left.x - r.x) * (right.y - r.y)
+            detright = (left.y - r.y) * (right.x - r.x)
+            det = detleft - detright
+            if abs(det) < Predicates.ORIENT_BOUND * (abs(detleft) + abs(detright)):
+                det = Predicates.orient2d_exact(left.x, left.y, right.x, right.y, r.x, r.y)
+            if det > 0:
+                trapezoid = trapezoid.lower_right
+            else:
+                trapezoid = trapezoid.upper_right
+            intersecting_trapezoids.append(trapezoid)
+        if profiler is not None:
+            profiler.lap('walk', start)
+        return intersecting_trapezoids
 
-    def insert_segment(self, segment):
+    # start_trapezoid: see getIntersectingTrapezoids
+    def insert_segment(self, segment, start_trapezoid=None):
         # assert segment
         assert isinstance(segment, LineSegment)
-        
+        self._assertModifiable()
+        self._frozen = None
+        self._trap_ids = None
+
         # find all trapezoids intersected by segment
-        intersectingTrapezoids, (leftTrapNode, leftPointExists), (rightTrapNode, rightPointExists) = self.getIntersectingTrapezoids(segment)
-        leftTrapezoid, rightTrapezoid = leftTrapNode.graph_object, rightTrapNode.graph_object
-
-        # CASE 1: p and q lie in the same trapezoid
-        if leftTrapezoid == rightTrapezoid:
-            print(segment)
-            # we always need to split the trapezoid
-            newTopTrapezoid = Trapezoid(segment.left, segment.right, leftTrapezoid.top, segment)
-            newBottomTrapezoid = Trapezoid(segment.left, segment.right, segment, leftTrapezoid.bottom)
-
-            # if the right point of the segment already existed within the DAG, a right trapezoid would not be created so we have to update the neighbors of the top and bottom trapezoids
-            if rightPointExists:
-                newBottomTrapezoid.updateRightNeighbors(leftTrapezoid.right_neighbors)
-                newTopTrapezoid.updateRightNeighbors(leftTrapezoid.right_neighbors)
-            # else create right trapezoid, set neighbors 
-            else:
-                newRightTrapezoid = Trapezoid(segment.right, leftTrapezoid.right_p, leftTrapezoid.top, leftTrapezoid.bottom)
-                # Set neigbors for new right trapezoid
-                # This also sets right trapezoid as neigbors for top and bottom trapezoid. see logic in trapezoid.py
-                newRightTrapezoid.updateLeftNeighbors({newBottomTrapezoid, newTopTrapezoid})
-                newRightTrapezoid.updateRightNeighbors(leftTrapezoid.right_neighbors)
-            
-            # repeat process for left point, left trapezoid
-            if leftPointExists:
-                newBottomTrapezoid.updateLeftNeighbors(leftTrapezoid.left_neighbors)
-                newTopTrapezoid.updateLeftNeighbors(leftTrapezoid.left_neighbors)
-            else:
-                newLeftTrapezoid = Trapezoid(leftTrapezoid.left_p, segment.left, leftTrapezoid.top, leftTrapezoid.bottom)
-                print()
-                print("NEW LEFT TRAP FORMED", newLeftTrapezoid)
-                # Set neigbors for new left trapezoid
-                newLeftTrapezoid.updateRightNeighbors({newBottomTrapezoid, newTopTrapezoid})
-                for right_nei in newLeftTrapezoid.right_neighbors:
-                    print("RIGHT NEI OF LEFT TRAP: ", right_nei)
-                newLeftTrapezoid.updateLeftNeighbors(leftTrapezoid.left_neighbors)
-
-            for n in leftTrapezoid.left_neighbors:
-                n.right_neighbors.discard(leftTrapezoid)
-            for n in leftTrapezoid.right_neighbors:
-                n.left_neighbors.discard(leftTrapezoid)
-            # create node replacement for trapezoids (see slides for naming conventions, case 2)
-            if leftPointExists and rightPointExists:
-                s_node = DAGNode(segment, newTopTrapezoid.node, newBottomTrapezoid.node)
-                leftTrapNode.modify(s_node)
-            elif leftPointExists:
-                s_node = DAGNode(segment, newTopTrapezoid.node, newBottomTrapezoid.node)
-                q_node = DAGNode(segment.right, s_node, newRightTrapezoid.node)
-                leftTrapNode.modify(q_node)
-            elif rightPointExists:
-                s_node = DAGNode(segment, newTopTrapezoid.node, newBottomTrapezoid.node)    
-                p_node = DAGNode(segment.left, newLeftTrapezoid.node, s_node)
-                leftTrapNode.modify(p_node)
-            else:
-                s_node = DAGNode(segment, newTopTrapezoid.node, newBottomTrapezoid.node)
-                q_node = DAGNode(segment.right, s_node, newRightTrapezoid.node)
-                p_node = DAGNode(segment.left, newLeftTrapezoid.node, q_node)
-                leftTrapNode.modify(p_node)
-            
-        
+        intersectingTrapezoids = self.getIntersectingTrapezoids(segment, start_trapezoid)
+        leftTrapezoid, rightTrapezoid = intersectingTrapezoids[0], intersectingTrapezoids[-1]
+        # an end point that is already in the map has its wall already
+        leftPointExists = leftTrapezoid.left_p == segment.left
+        rightPointExists = rightTrapezoid.right_p == segment.right
+        for p in (segment.left, segment.right):
+            self._endpoint_counts[p] = self._endpoint_counts.get(p, 0) + 1
+        profiler = Instrumentation.profiler
+        if profiler is not None:
+            start = time.perf_counter()
+
+        # Divide every crossed trapezoid into a top and a bottom part. A run of crossed trapezoids with
+        # the same top (bottom) segment shares one top (bottom) part: the walls between them are cut
+        # away by the segment. A part is created once its run ends, tops[i] and bottoms[i] are the
+        # parts of the i-th crossed trapezoid
+        last = len(intersectingTrapezoids) - 1
+        tops, bottoms = [None] * len(intersectingTrapezoids), [None] * len(intersectingTrapezoids)
+        topStart = bottomStart = 0
+        for i, t in enumerate(intersectingTrapezoids):
+            n = intersectingTrapezoids[i + 1] if i < last else None
+            if n is None or n.top is not t.top:
+                left_p = segment.left if topStart == 0 else intersectingTrapezoids[topStart].left_p
+                right_p = segment.right if n is None else t.right_p
+                tops[topStart:i + 1] = [Trapezoid(left_p, right_p, t.top, segment)] * (i + 1 - topStart)
+                topStart = i + 1
+            if n is None or n.bottom is not t.bottom:
+                left_p = segment.left if bottomStart == 0 else intersectingTrapezoids[bottomStart].left_p
+                right_p = segment.right if n is None else t.right_p
+                bottoms[bottomStart:i + 1] = [Trapezoid(left_p, right_p, segment, t.bottom)] * (i + 1 - bottomStart)
+                bottomStart = i + 1
+        if profiler is not None:
+            start = profiler.lap('split', start)
+
+        # Neighbors along the segment. A top part ends at a wall through a point above the segment:
+        # its upper right neighbor is the old trapezoid's, its lower right neighbor the next top part
+        for i in range(last):
+            t, n = intersectingTrapezoids[i], intersectingTrapezoids[i + 1]
+            top, bottom, nextTop, nextBottom = tops[i], bottoms[i], tops[i + 1], bottoms[i + 1]
+            if top is not nextTop:
+                top.upper_right = t.upper_right
+                replaceLeftNeighbor(t.upper_right, t, top)
+                top.lower_right = nextTop
+                nextTop.lower_left = top
+                nextTop.upper_left = n.upper_left
+                replaceRightNeighbor(n.upper_left, n, nextTop)
+            if bottom is not nextBottom:
+                bottom.lower_right = t.lower_right
+                replaceLeftNeighbor(t.lower_right, t, bottom)
+                bottom.upper_right = nextBottom
+                nextBottom.upper_left = bottom
+                nextBottom.lower_left = n.lower_left
+                replaceRightNeighbor(n.lower_left, n, nextBottom)
+
+        # Neighbors at the end points: a new end point gets a trapezoid between the old wall and its
+        # own wall, an existing one keeps the neighbors across its wall
+        top, bottom = tops[0], bottoms[0]
+        if leftPointExists:
+            top.upper_left = leftTrapezoid.upper_left
+            replaceRightNeighbor(leftTrapezoid.upper_left, leftTrapezoid, top)
+            bottom.lower_left = leftTrapezoid.lower_left
+            replaceRightNeighbor(leftTrapezoid.lower_left, leftTrapezoid, bottom)
         else:
-            # Divide left trapezoid into bottom, top trapezoids (left trapezoid only exists if leftPoint does not exist)
-            newLeftBottomTrapezoid = Trapezoid(segment.left, leftTrapezoid.right_p, segment, leftTrapezoid.bottom)
+            newLeftTrapezoid = Trapezoid(leftTrapezoid.left_p, segment.left, leftTrapezoid.top, leftTrapezoid.bottom)
+            newLeftTrapezoid.upper_left = leftTrapezoid.upper_left
+            replaceRightNeighbor(leftTrapezoid.upper_left, leftTrapezoid, newLeftTrapezoid)
+            newLeftTrapezoid.lower_left = leftTrapezoid.lower_left
+            replaceRightNeighbor(leftTrapezoid.lower_left, leftTrapezoid, newLeftTrapezoid)
+            newLeftTrapezoid.upper_right, newLeftTrapezoid.lower_right = top, bottom
+            top.upper_left = bottom.lower_left = newLeftTrapezoid
 
-            
-            newLeftBottomTrapezoid.updateRightNeighbors(
-                {n for n in leftTrapezoid.right_neighbors if not segment.aboveLine(n.top.right)})
+        top, bottom = tops[-1], bottoms[-1]
+        if rightPointExists:
+            top.upper_right = rightTrapezoid.upper_right
+            replaceLeftNeighbor(rightTrapezoid.upper_right, rightTrapezoid, top)
+            bottom.lower_right = rightTrapezoid.lower_right
+            replaceLeftNeighbor(rightTrapezoid.lower_right, rightTrapezoid, bottom)
+        else:
+            newRightTrapezoid = Trapezoid(segment.right, rightTrapezoid.right_p, rightTrapezoid.top, rightTrapezoid.bottom)
+            newRightTrapezoid.upper_right = rightTrapezoid.upper_right
+            replaceLeftNeighbor(rightTrapezoid.upper_right, rightTrapezoid, newRightTrapezoid)
+            newRightTrapezoid.lower_right = rightTrapezoid.lower_right
+            replaceLeftNeighbor(rightTrapezoid.lower_right, rightTrapezoid, newRightTrapezoid)
+            newRightTrapezoid.upper_left, newRightTrapezoid.lower_left = top, bottom
+            top.upper_right = bottom.lower_right = newRightTrapezoid
 
-            newLeftTopTrapezoid = Trapezoid(segment.left, leftTrapezoid.right_p, leftTrapezoid.top, segment)
-            
-            
-            newLeftTopTrapezoid.updateRightNeighbors(
-                {n for n in leftTrapezoid.right_neighbors if segment.aboveLine(n.bottom.right)})
+        if profiler is not None:
+            start = profiler.lap('neighbors', start)
 
+        # Updating the DAG (see slides for naming conventions): every crossed trapezoid becomes a
+        # segment node over its two parts, behind point nodes for new end points
+        for t, top, bottom in zip(intersectingTrapezoids, tops, bottoms):
+            node = DAGNode(segment, top.node, bottom.node)
+            wrapRight = t is rightTrapezoid and not rightPointExists
+            wrapLeft = t is leftTrapezoid and not leftPointExists
+            if wrapRight:
+                node = DAGNode(segment.right, node, newRightTrapezoid.node)
+                newRightTrapezoid.depth = t.depth + 1 + wrapLeft
+            if wrapLeft:
+                node = DAGNode(segment.left, newLeftTrapezoid.node, node)
+                newLeftTrapezoid.depth = t.depth + 1
+            t.node = node
+            # a part shared by a run of crossed trapezoids is as deep as the deepest of them
+            depth = t.depth + 1 + wrapRight + wrapLeft
+            if depth > top.depth:
+                top.depth = depth
+            if depth > bottom.depth:
+                bottom.depth = depth
+            if depth > self._depth:
+                self._depth = depth
+        if profiler is not None:
+            start = profiler.lap('dag', start)
 
-            if not leftPointExists:
-                newLeftTrapezoid = Trapezoid(leftTrapezoid.left_p, segment.left, leftTrapezoid.top, leftTrapezoid.bottom)
-                newLeftTrapezoid.updateLeftNeighbors(leftTrapezoid.left_neighbors)
-                newLeftTrapezoid.updateRightNeighbors({newLeftTopTrapezoid, newLeftBottomTrapezoid})
-            else:
-                # update neighbours if right point exists
-                newLeftTopTrapezoid.updateLeftNeighbors(leftTrapezoid.left_neighbors)
-                newLeftBottomTrapezoid.updateLeftNeighbors(leftTrapezoid.left_neighbors)
+        if self._conflicts is not None:
+            self._redistribute(segment, intersectingTrapezoids, tops, bottoms,
+                               None if leftPointExists else newLeftTrapezoid,
+                               None if rightPointExists else newRightTrapezoid)
+            if profiler is not None:
+                profiler.lap('conflicts', start)
 
-            # repeat process for right point trapezoids
-            newRightBottomTrapezoid = Trapezoid(rightTrapezoid.left_p, segment.right, segment, rightTrapezoid.bottom)
+        stats = Instrumentation.sink
+        if stats is not None:
+            parts = len({id(part) for part in tops}) + len({id(part) for part in bottoms})
+            newEnds = (not leftPointExists) + (not rightPointExists)
+            stats.record('segments_inserted', 1)
+            stats.record('walk_length', len(intersectingTrapezoids))
+            stats.record('trapezoids_created', parts + newEnds)
+            stats.record('trapezoids_merged', 2 * len(intersectingTrapezoids) - parts)
+            # a segment node per crossed trapezoid, a point node per new end point and the new leaves
+            stats.record('dag_nodes_added', len(intersectingTrapezoids) + newEnds + parts + newEnds)
 
-           
-            newRightBottomTrapezoid.updateLeftNeighbors(
-                {n for n in rightTrapezoid.left_neighbors if not segment.aboveLine(n.top.right)})
 
-            newRightTopTrapezoid = Trapezoid(rightTrapezoid.left_p, segment.right, rightTrapezoid.top, segment)
+# segment lies above other where their x-ranges overlap. The two do not cross, so the side of the
+# one that starts later against the other decides, like in locateLeftEndpoint by the orientation of
+# its left end point or, when that lies on the other segment, of its right end point
+def segmentAbove(segment, other):
+    if leftOf(segment.left, other.left):
+        side = orientation(segment.left, segment.right, other.left)
+        if side == 0:
+            side = orientation(segment.left, segment.right, other.right)
+        return side <= 0
+    side = orientation(other.left, other.right, segment.left)
+    if side == 0:
+        side = orientation(other.left, other.right, segment.right)
+    return side >= 0
 
-            
-            newRightTopTrapezoid.updateLeftNeighbors(
-                {n for n in rightTrapezoid.left_neighbors if segment.aboveLine(n.bottom.right)})
 
-            if not rightPointExists:
-                newRightTrapezoid = Trapezoid(segment.right, rightTrapezoid.right_p, rightTrapezoid.top, rightTrapezoid.bottom)
-                newRightTrapezoid.updateLeftNeighbors({newRightTopTrapezoid, newRightBottomTrapezoid})
-                newRightTrapezoid.updateRightNeighbors(rightTrapezoid.right_neighbors)
-            else:
-                newRightTopTrapezoid.updateRightNeighbors(rightTrapezoid.right_neighbors)
-                newRightBottomTrapezoid.updateRightNeighbors(rightTrapezoid.right_neighbors)
-            
-            # Walk to the right along the new segment and split
-            # each trapezoid into upper and lower ones
-            newTopTrapezoids, newBottomTrapezoids = [newLeftTopTrapezoid], [newLeftBottomTrapezoid]
-            trap_dict = dict()
-            trap_dict[leftTrapezoid] = (newLeftTopTrapezoid, newLeftBottomTrapezoid)
-            for t in intersectingTrapezoids[1:-1]:
-                # create new top and bottom trapezoids
-                newTopTrapezoid = Trapezoid(t.left_p, t.right_p, t.top, segment)
-                newBottomTrapezoid = Trapezoid(t.left_p, t.right_p, segment, t.bottom)
-                
-                
-                # Update neighbors of the new top and bottom
-                for n in t.left_neighbors:
-                    if segment.aboveLine(n.bottom.right):
-                        newTopTrapezoid.updateLeftNeighbors({n})
-                    if not segment.aboveLine(n.top.right):
-                        newBottomTrapezoid.updateLeftNeighbors({n})
-                # For our new trapezoids, assign left neigbours to be the last added trapezoid
-                newTopTrapezoid.updateLeftNeighbors({newTopTrapezoids[-1]})
-                newBottomTrapezoid.updateLeftNeighbors({newBottomTrapezoids[-1]})
-
-                newTopTrapezoid.updateRightNeighbors(t.right_neighbors)
-                newBottomTrapezoid.updateRightNeighbors(t.right_neighbors)
-
-                # Add it to the list and dict
-                newTopTrapezoids.append(newTopTrapezoid)
-                newBottomTrapezoids.append(newBottomTrapezoid)
-                trap_dict[t] = (newTopTrapezoid, newBottomTrapezoid)
-
-            # repeat for right top, bottom trapezoids
-            newRightTopTrapezoid.updateLeftNeighbors({newTopTrapezoids[-1]})
-            newRightBottomTrapezoid.updateLeftNeighbors({newBottomTrapezoids[-1]})
-            newTopTrapezoids.append(newRightTopTrapezoid)
-            newBottomTrapezoids.append(newRightBottomTrapezoid)
-            trap_dict[rightTrapezoid] = (newRightTopTrapezoid, newRightBottomTrapezoid)
-
-            # Merge trapezoids with the same top and bottom line segments
-            for k, g in groupby(newTopTrapezoids, lambda x: x.top):
-                g = list(g)
-                if len(g) > 1:
-                    # create new merged trapezoid
-                    t = Trapezoid(g[0].left_p, g[-1].right_p, k, g[0].bottom)
-
-                    # remove the unmerged left trapezoid from trapezoids that have it as a neighbour and replace with merged trapezoid
-                    for n in g[0].left_neighbors:
-                        n.right_neighbors.discard(g[0])
-                    for n in g[-1].right_neighbors:
-                        n.left_neighbors.discard(g[-1])
-                    # set new neighbours for new trapezoid
-                    t.updateLeftNeighbors(g[0].left_neighbors)
-                    t.updateRightNeighbors(g[-1].right_neighbors)
-
-                    # Update list and dictionary
-                    for k, v in trap_dict.items():
-                        # if one of the top trapezoids is part of the group, update trap_dict 
-                        if v[0] in g:
-                            trap_dict[k] = (t, v[1])
-            
-            # Repeat for bottom trapezoids
-            for k, g in groupby(newBottomTrapezoids, lambda x: x.bottom):
-                g = list(g)
-                if len(g) > 1:
-                    # create new merged trapezoid
-                    t = Trapezoid(g[0].left_p, g[-1].right_p, g[0].top, k)
-                    for n in g[0].left_neighbors:
-                        n.right_neighbors.discard(g[0])
-                    for n in g[-1].right_neighbors:
-                        n.left_neighbors.discard(g[-1])
-                    t.updateLeftNeighbors(g[0].left_neighbors)
-                    t.updateRightNeighbors(g[-1].right_neighbors)
-
-                    # Update list and dictionary
-                    for k, v in trap_dict.items():
-                        if v[1] in g:
-                            trap_dict[k] = (v[0], t)
-            
-            # Updating the DAG (case 1 - see slides for naming conventions)
-            if not leftPointExists:
-                for n in leftTrapezoid.left_neighbors:
-                    n.right_neighbors.discard(leftTrapezoid)
-                for n in leftTrapezoid.right_neighbors:
-                    n.left_neighbors.discard(leftTrapezoid)
-                s_node = DAGNode(segment, trap_dict[leftTrapezoid][0].node, trap_dict[leftTrapezoid][1].node)
-                p_node =DAGNode(segment.left, newLeftTrapezoid.node, s_node)
-                leftTrapNode.modify(p_node)
-            if not rightPointExists:
-                for n in rightTrapezoid.left_neighbors:
-                    n.right_neighbors.discard(rightTrapezoid)
-                for n in rightTrapezoid.right_neighbors:
-                    n.left_neighbors.discard(rightTrapezoid)
-                s_node = DAGNode(segment, trap_dict[rightTrapezoid][0].node, trap_dict[rightTrapezoid][1].node)
-                q_node = DAGNode(segment.right, s_node, newRightTrapezoid.node)
-                rightTrapNode.modify(q_node)
-            # case 3 - see slides for naming conventions
-            for t in intersectingTrapezoids[0 if leftPointExists else 1: len(intersectingTrapezoids) if rightPointExists else -1]:
-                s_node = DAGNode(segment, trap_dict[t][0].node, trap_dict[t][1].node)
-                t.node = s_node
-            for t in intersectingTrapezoids:
-                for n in t.left_neighbors:
-                    n.right_neighbors.discard(t)
-                for n in t.right_neighbors:
-                    n.left_neighbors.discard(t)
\ No newline at end of file
+# p comes before q in the order of the X-nodes: by x, points with the same x by y, as if the plane
+# were sheared slightly
+def leftOf(p, q):
+    return p.x < q.x or (p.x == q.x and p.y < q.y)
+
+
+# points the right neighbor slot of trapezoid that holds old to new
+def replaceRightNeighbor(trapezoid, old, new):
+    if trapezoid is not None:
+        if trapezoid.upper_right is old:
+            trapezoid.upper_right = new
+        if trapezoid.lower_right is old:
+            trapezoid.lower_right = new
+
+
+# points the left neighbor slot of trapezoid that holds old to new
+def replaceLeftNeighbor(trapezoid, old, new):
+    if trapezoid is not None:
+        if trapezoid.upper_left is old:
+            trapezoid.upper_left = new
+        if trapezoid.lower_left is old:
+            trapezoid.lower_left = new
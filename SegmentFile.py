@@ -0,0 +1,85 @@
+import hashlib
+import struct
+
+import numpy as np
+
+# Binary segment file layout (little endian):
+#   header (64 bytes): magic, format version, segment count, bounding box (bottom left x, y, top right x, y)
+#   body: one row of 4 float64 per segment (left x, left y, right x, right y)
+BINARY_MAGIC = b'TRAPSEG\x00'
+BINARY_VERSION = 1
+_HEADER = struct.Struct('<8sIIQ4d')
+HEADER_SIZE = 64
+
+
+# parses the text format read by main.load_input: the number of segments, the bounding box
+# and one segment per line. Returns the segments as an (n, 4) float64 array and the bounding box
+# as (bottom left x, bottom left y, top right x, top right y)
+def load_text(file_path):
+    with open(file_path, 'r') as file:
+        count = int(file.readline().split()[0])
+        bbox = tuple(float(v) for v in file.readline().split())
+        if len(bbox) != 4:
+            raise ValueError('%s: the second line must hold the bounding box' % file_path)
+        if count == 0:
+            # np.loadtxt would return an empty array of shape (0, 1)
+            return np.empty((0, 4), dtype=np.float64), bbox
+        # empty lines are skipped and do not count towards max_rows
+        segments = np.loadtxt(file, dtype=np.float64, max_rows=count, ndmin=2)
+    if segments.shape != (count, 4):
+        raise ValueError('%s: expected %d segments of 4 coordinates, found %s' % (file_path, count, segments.shape))
+    return segments, bbox
+
+
+def save_binary(file_path, segments, bbox):
+    segments = np.ascontiguousarray(segments, dtype='<f8')
+    if segments.ndim != 2 or segments.shape[1] != 4:
+        raise ValueError('segments must be an (n, 4) array')
+    with open(file_path, 'wb') as file:
+        header = _HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, len(segments), *bbox)
+        file.write(header.ljust(HEADER_SIZE, b'\x00'))
+        file.write(segments.tobytes())
+
+
+# reads a binary segment file. With mmap=True the segments are a read-only view on the
+# memory-mapped file, nothing is copied
+def load_binary(file_path, mmap=True):
+    with open(file_path, 'rb') as file:
+        header = file.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or header[:8] != BINARY_MAGIC:
+        raise ValueError('%s is not a binary segment file' % file_path)
+    magic, version, _, count, *bbox = _HEADER.unpack_from(header)
+    if version != BINARY_VERSION:
+        raise ValueError('%s: unsupported segment file version %d' % (file_path, version))
+    if mmap:
+        if count == 0:
+            segments = np.empty((0, 4), dtype='<f8')
+        else:
+            segments = np.memmap(file_path, dtype='<f8', mode='r', offset=HEADER_SIZE, shape=(count, 4))
+    else:
+        segments = np.fromfile(file_path, dtype='<f8', count=count * 4, offset=HEADER_SIZE).reshape(count, 4)
+    if len(segments) != count:
+        raise ValueError('%s: truncated segment file' % file_path)
+    return segments, tuple(bbox)
+
+
+def is_binary(file_path):
+    with open(file_path, 'rb') as file:
+        return file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+# loads a segment file in either format
+def load(file_path, mmap=True):
+    if is_binary(file_path):
+        return load_binary(file_path, mmap)
+    return load_text(file_path)
+
+
+# SHA-256 of the segments as little endian float64 rows, in input order. Every row is first put in
+# the (left x, left y, right x, right y) order LineSegment uses, so the direction a segment was
+# written in does not change the checksum
+def checksum(segments):
+    segments = np.array(segments, dtype='<f8').reshape(-1, 4)
+    swap = (segments[:, 0] > segments[:, 2]) | ((segments[:, 0] == segments[:, 2]) & (segments[:, 1] >= segments[:, 3]))
+    segments[swap] = segments[swap][:, [2, 3, 0, 1]]
+    return hashlib.sha256(segments.tobytes()).digest()
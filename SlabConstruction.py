@@ -0,0 +1,179 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+
+
+# orients every row left to right, the way LineSegment orders its end points
+def _oriented(segments):
+    segments = np.array(segments, dtype=np.float64).reshape(-1, 4)
+    swap = (segments[:, 0] > segments[:, 2]) | ((segments[:, 0] == segments[:, 2]) & (segments[:, 1] >= segments[:, 3]))
+    segments[swap] = segments[swap][:, [2, 3, 0, 1]]
+    return segments
+
+
+# vertical slab boundaries between the bounding box sides that give every slab about the same
+# number of segment end points. No boundary is placed on the x of an end point
+def slab_boundaries(segments, bbox, slabs):
+    xs = np.unique(np.concatenate([segments[:, 0], segments[:, 2], [bbox[0], bbox[2]]]))
+    inner = []
+    for k in range(1, slabs):
+        i = int(round(k * (len(xs) - 1) / slabs))
+        if 0 < i < len(xs):
+            inner.append((xs[i - 1] + xs[i]) / 2)
+    return np.unique(np.concatenate([[bbox[0]], inner, [bbox[2]]]))
+
+
+# clips the (oriented) segments to the slab low <= x <= high. Returns the clipped rows and the
+# index of the input segment each row came from
+def clip_segments(segments, low, high):
+    inside = (segments[:, 2] > low) & (segments[:, 0] < high)
+    rows = segments[inside].copy()
+    source = np.nonzero(inside)[0]
+    x1, y1, x2, y2 = rows.T.copy()
+    # vertical segments are never cut, their slope is not used
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (y2 - y1) / (x2 - x1)
+    cut_left = x1 < low
+    rows[cut_left, 0] = low
+    rows[cut_left, 1] = y1[cut_left] + slope[cut_left] * (low - x1[cut_left])
+    cut_right = x2 > high
+    rows[cut_right, 2] = high
+    rows[cut_right, 3] = y1[cut_right] + slope[cut_right] * (high - x1[cut_right])
+    return rows, source
+
+
+def _build_slab(job):
+    rows, source, bbox, seed = job
+    R = RandomizedIncrementalConstruction(rows, Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3]), seed=seed)
+    frozen = R.freeze()
+    frozen.source_checksum = None
+    # map the rows of the slab's segment table back to input segments, the slab's own bounding box
+    # top and bottom become the rows n and n + 1 of the global table (set by the caller)
+    row_of = {tuple(r): i for i, r in enumerate(rows.tolist())}
+    table_source = np.array([source[row_of[tuple(r)]] if tuple(r) in row_of else -1 for r in frozen.segments.tolist()],
+                            dtype=np.int64)
+    return frozen, table_source
+
+
+class SlabPartitionedMap:
+    """
+    Trapezoidal map built in parallel: the bounding box is cut into vertical slabs, the segments
+    are clipped to every slab they cross and each slab gets its own RandomizedIncrementalConstruction,
+    built in a process pool. A query first finds its slab by binary search on the boundaries and
+    then descends that slab's frozen DAG.
+    A trapezoid of the serial map that crosses slab boundaries is built as one piece per slab;
+    the pieces are joined again, so locate_many reports every trapezoid under a single ID and
+    the trapezoid table holds the geometry of the serial trapezoid.
+    """
+
+    def __init__(self, segments, bbox, slabs=None, workers=None, seed=None):
+        self.segments = _oriented(segments)
+        self.bbox = tuple(float(v) for v in bbox)
+        workers = workers or os.cpu_count()
+        self.boundaries = slab_boundaries(self.segments, self.bbox, slabs or workers)
+        n = len(self.segments)
+        # global segment table: the input segments, then the bounding box top and bottom
+        x0, y0, x1, y1 = self.bbox
+        self.segment_table = np.vstack([self.segments, [[x0, y1, x1, y1], [x0, y0, x1, y0]]])
+
+        jobs = []
+        for i, (low, high) in enumerate(zip(self.boundaries[:-1], self.boundaries[1:])):
+            rows, source = clip_segments(self.segments, low, high)
+            jobs.append((rows, source, (low, y0, high, y1), None if seed is None else seed + i))
+        if workers == 1 or len(jobs) == 1:
+            results = [_build_slab(job) for job in jobs]
+        else:
+            with multiprocessing.Pool(min(workers, len(jobs))) as pool:
+                results = pool.map(_build_slab, jobs)
+        self.slab_maps = [frozen for frozen, _ in results]
+
+        # table row -> global segment row, the slab bounding box top / bottom are the rows n / n + 1
+        self._slab_rows = []
+        for frozen, table_source in results:
+            rows = table_source.copy()
+            unknown = np.nonzero(rows < 0)[0]
+            for r in unknown:
+                rows[r] = n if frozen.segments[r, 1] == y1 and frozen.segments[r, 3] == y1 else n + 1
+            self._slab_rows.append(rows)
+        self._join_pieces()
+
+    # gives the pieces of one serial trapezoid the same global ID
+    def _join_pieces(self):
+        offsets = np.cumsum([0] + [m.trapezoid_count for m in self.slab_maps])
+        parent = np.arange(offsets[-1])
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i in range(len(self.slab_maps) - 1):
+            boundary = self.boundaries[i + 1]
+            left, right = self.slab_maps[i], self.slab_maps[i + 1]
+            # pieces touching the boundary from the left, keyed by their top and bottom segment
+            ending = {}
+            for t in np.nonzero((left.trap_points[:, 2] == boundary) & (left.trap_points[:, 0] < boundary))[0]:
+                top, bottom = self._slab_rows[i][left.trap_segments[t]]
+                ending[(top, bottom)] = offsets[i] + t
+            for t in np.nonzero((right.trap_points[:, 0] == boundary) & (right.trap_points[:, 2] > boundary))[0]:
+                top, bottom = self._slab_rows[i + 1][right.trap_segments[t]]
+                if (top, bottom) in ending:
+                    parent[find(offsets[i + 1] + t)] = find(ending[(top, bottom)])
+
+        # zero-width pieces between a slab boundary and the wall through a clipped end point on it
+        # get no ID (-1), so the IDs count the trapezoids of the serial map
+        roots = np.array([find(i) for i in range(len(parent))], dtype=np.int64)
+        width = np.concatenate([m.trap_points[:, 2] - m.trap_points[:, 0] for m in self.slab_maps])
+        unique_roots, ids = np.unique(roots[width > 0], return_inverse=True)
+        global_ids = np.full(len(roots), -1, dtype=np.int32)
+        global_ids[width > 0] = ids
+        self._global_ids = [global_ids[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+
+        # geometry of the joined trapezoids: left corner of the leftmost piece, right corner of
+        # the rightmost piece, top and bottom as rows of segment_table
+        count = len(unique_roots)
+        self.trap_points = np.zeros((count, 4), dtype=np.float64)
+        self.trap_points[:, 0] = np.inf
+        self.trap_points[:, 2] = -np.inf
+        self.trap_segments = np.zeros((count, 2), dtype=np.int64)
+        for m, ids, rows in zip(self.slab_maps, self._global_ids, self._slab_rows):
+            for t, g in enumerate(ids):
+                if g < 0:
+                    continue
+                lx, ly, rx, ry = m.trap_points[t]
+                if lx < self.trap_points[g, 0]:
+                    self.trap_points[g, 0:2] = lx, ly
+                if rx > self.trap_points[g, 2]:
+                    self.trap_points[g, 2:4] = rx, ry
+                self.trap_segments[g] = rows[m.trap_segments[t]]
+
+    @property
+    def trapezoid_count(self):
+        return len(self.trap_points)
+
+    # global trapezoid IDs for arrays of query coordinates, -1 on a wall (see FrozenDAG.locate). A
+    # point on a slab boundary is searched in the slab to its right, where it lies on the left side
+    # of the slab map, not on a wall
+    def locate_many(self, xs, ys):
+        xs = np.ascontiguousarray(xs, dtype=np.float64)
+        ys = np.ascontiguousarray(ys, dtype=np.float64)
+        if xs.shape != ys.shape or xs.ndim != 1:
+            raise ValueError('xs and ys must be 1-d arrays of the same length')
+        result = np.full(len(xs), -1, dtype=np.int32)
+        slab = np.searchsorted(self.boundaries, xs, side='right') - 1
+        slab = np.clip(slab, 0, len(self.slab_maps) - 1)
+        for i, m in enumerate(self.slab_maps):
+            mask = slab == i
+            if not mask.any():
+                continue
+            local = m.locate_many(xs[mask], ys[mask])
+            result[mask] = np.where(local >= 0, self._global_ids[i][local], -1)
+        return result
+
+    def locate(self, x, y):
+        return int(self.locate_many(np.array([x]), np.array([y]))[0])
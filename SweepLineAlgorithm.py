@@ -0,0 +1,333 @@
+import functools
+
+import numpy as np
+
+from FrozenDAG import FrozenDAG, X_NODE, Y_NODE, LEAF
+from LineSegment import LineSegment
+from Predicates import orient2d
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from SlabConstruction import _oriented
+
+# both subtrees of a status tree node hold at least ALPHA of its leaves. Joins keep this balance for
+# any ALPHA up to 1 - 1/sqrt(2), so a tree with n leaves is at most log(n) / log(1 / (1 - ALPHA)),
+# about 2 log2(n), deep
+ALPHA = 0.29
+
+
+class SweepLineConstruction:
+    """
+    Deterministic trapezoidal map for a static set of segments, built by a sweep from left to right
+    in O(n log n). The sweep status, the segments crossing the sweep line ordered from top to bottom
+    with the trapezoid between every two of them, is a weight-balanced tree that is never modified:
+    every end point event splits and joins it into a new version that shares all untouched nodes with
+    the old one. The search structure is a balanced tree of X-nodes over the end point x values whose
+    leaves are the versions valid between them, so every query compares against O(log n) points and
+    segments, whatever the input order.
+    The result is a FrozenDAG with the same query interface as RandomizedIncrementalConstruction:
+    locate and locate_many return trapezoid IDs (leaves in breadth-first order), -1 for a point on the
+    wall through an end point (see FrozenDAG.locate) or outside the bounding box, the same answers as
+    the randomized map gives with any seed. The trapezoids are those of the randomized map; zero-width trapezoids between end points with the same x are not kept, no query
+    can reach them. End points are swept in (x, y) order, the shear order the randomized map compares
+    points in, so end points with the same x, vertical segments (which open and close only zero-width
+    trapezoids) and end points on the bounding box are handled like there.
+    """
+
+    def __init__(self, segments, boundBottomLeft, boundTopRight):
+        if isinstance(segments, np.ndarray):
+            if segments.ndim != 2 or segments.shape[1] != 4:
+                raise ValueError('segment array must have shape (n, 4)')
+        else:
+            for segment in segments:
+                assert isinstance(segment, LineSegment)
+        self.segment_array = segments if isinstance(segments, np.ndarray) else \
+            np.array([(s.left.x, s.left.y, s.right.x, s.right.y) for s in segments], dtype=np.float64).reshape(-1, 4)
+        self.segements = segments
+        self.DAG = None
+        self.boundBottomLeft = boundBottomLeft
+        self.boundTopRight = boundTopRight
+        self.seed = None
+        self._frozen = self.computeDecomposition()
+        self._frozen.source_checksum = self.source_checksum()
+        self.build_report = {'seed': None, 'depth': self._frozen.max_depth(), 'attempts': 1}
+
+    def computeDecomposition(self):
+        rows = _oriented(self.segment_array)
+        x0, y0 = self.boundBottomLeft.x, self.boundBottomLeft.y
+        x1, y1 = self.boundTopRight.x, self.boundTopRight.y
+        if len(rows) and (rows[:, [0, 2]].min() < x0 or rows[:, [0, 2]].max() > x1 or
+                          rows[:, [1, 3]].min() < y0 or rows[:, [1, 3]].max() > y1):
+            raise ValueError('segment end points must lie inside the bounding box')
+        # segment table: the input segments, then the bounding box top and bottom
+        n = len(rows)
+        TOP, BOTTOM = n, n + 1
+        table = rows.tolist() + [[x0, y1, x1, y1], [x0, y0, x1, y0]]
+
+        # events: every end point with the segments starting and ending in it, in (x, y) order
+        events = {}
+        for s, (lx, ly, rx, ry) in enumerate(table[:n]):
+            events.setdefault((lx, ly), ([], []))[0].append(s)
+            events.setdefault((rx, ry), ([], []))[1].append(s)
+
+        # trapezoid t: left point, right point, top and bottom segment. Trapezoid 0 is the bounding
+        # box, the status tree starts out as the leaf -1 (outside) above the top, trapezoid 0 and
+        # -1 again below the bottom
+        left_p, right_p, tops, bottoms = [(x0, y0)], [None], [TOP], [BOTTOM]
+        status = _node(TOP, -1, _node(BOTTOM, 0, -1))
+        # versions[i] is the status between xs[i - 1] and xs[i]
+        versions, xs = [status], []
+        order = sorted(events)
+        for e, p in enumerate(order):
+            px, py = p
+            starting, ending = events[p]
+            # the segments starting in p from top to bottom: s1 is below s2 when the right end point
+            # of s2 lies above the line from p through the right end point of s1
+            def below_of(s1, s2):
+                return 1 if orient2d(px, py, table[s1][2], table[s1][3], table[s2][2], table[s2][3]) > 0 else -1
+
+            starting.sort(key=functools.cmp_to_key(below_of))
+
+            # closes the trapezoids of the gaps around p and opens one between every two segments of
+            # above, starting and below
+            def event(closed, above, below):
+                for t in _leaves_in_order(closed):
+                    right_p[t] = p
+                walls = [above] + starting + [below]
+                new = list(range(len(left_p), len(left_p) + len(walls) - 1))
+                for top, bottom in zip(walls[:-1], walls[1:]):
+                    left_p.append(p)
+                    right_p.append(None)
+                    tops.append(top)
+                    bottoms.append(bottom)
+                return _block(new, starting)
+
+            # the gaps from first to last are those around p: above, between and below the segments
+            # ending in p. An end point on the bounding box top or bottom does not open the outside
+            first = max(_position(status, table, px, py, True), 1)
+            last = min(_position(status, table, px, py, False), _leaves(status) - 2)
+            status = _replace(status, first, last, None, None, event)
+            if e + 1 == len(order) or order[e + 1][0] != px:
+                versions.append(status)
+                xs.append(px)
+        for t in _leaves_in_order(status):
+            if t >= 0:
+                right_p[t] = (x1, y1)
+
+        return self._flatten(_x_tree(versions, xs, 0, len(xs)), table, left_p, right_p, tops, bottoms)
+
+    # numbers the nodes in breadth-first order and stores them as a FrozenDAG. Leaves are numbered as
+    # trapezoid IDs in the order they are first met, trapezoids no leaf refers to are dropped
+    @staticmethod
+    def _flatten(root, table, left_p, right_p, tops, bottoms):
+        order = [root]
+        # node number of every inner node by id() and of every leaf by its trapezoid
+        index = {id(root): 0}
+        leaf_index = {}
+        trap_ids = {}
+        kind, key, seg, left, right, trap = [], [], [], [], [], []
+        for node in order:
+            if type(node) is int:
+                kind.append(LEAF)
+                key.append(0.0)
+                seg.append(-1)
+                left.append(-1)
+                right.append(-1)
+                trap.append(trap_ids.get(node, -1))
+                continue
+            children = []
+            for child in node[1:3]:
+                if type(child) is int:
+                    if child not in leaf_index:
+                        leaf_index[child] = len(order)
+                        order.append(child)
+                        if child >= 0:
+                            trap_ids[child] = len(trap_ids)
+                    children.append(leaf_index[child])
+                else:
+                    if id(child) not in index:
+                        index[id(child)] = len(order)
+                        order.append(child)
+                    children.append(index[id(child)])
+            if len(node) == 3:
+                kind.append(X_NODE)
+                key.append(node[0])
+                seg.append(-1)
+            else:
+                kind.append(Y_NODE)
+                key.append(0.0)
+                seg.append(node[0])
+            left.append(children[0])
+            right.append(children[1])
+            trap.append(-1)
+
+        kept = sorted(trap_ids, key=trap_ids.get)
+        trap_points = np.array([left_p[t] + right_p[t] for t in kept], dtype=np.float64).reshape(-1, 4)
+        trap_segments = np.array([(tops[t], bottoms[t]) for t in kept], dtype=np.int32).reshape(-1, 2)
+        return FrozenDAG(np.array(kind, dtype=np.uint8), np.array(key, dtype=np.float64),
+                         np.array(seg, dtype=np.int32), np.array(left, dtype=np.int32),
+                         np.array(right, dtype=np.int32), np.array(trap, dtype=np.int32),
+                         np.array(table, dtype=np.float64).reshape(-1, 4), trap_points, trap_segments)
+
+    # trapezoid ID of the trapezoid containing query_point, see FrozenDAG.locate
+    def locate(self, query_point):
+        return self._frozen.locate(query_point.x, query_point.y)
+
+    def locate_many(self, xs, ys):
+        return self._frozen.locate_many(xs, ys)
+
+    # the map is built as a FrozenDAG, there is nothing to compile or release
+    def freeze(self, release=False):
+        return self._frozen
+
+    def source_checksum(self):
+        return RandomizedIncrementalConstruction.segments_checksum(
+            self.segment_array if isinstance(self.segements, np.ndarray) else self.segements)
+
+    # writes the map to file_path (see FrozenDAG.save), RandomizedIncrementalConstruction.load reads it
+    def save(self, file_path):
+        self._frozen.save(file_path)
+
+
+# Status tree: a leaf is a trapezoid ID (-1 outside the bounding box), an inner node is a tuple
+# (segment, upper subtree, lower subtree, number of leaves). Nodes are never modified
+
+def _leaves(t):
+    return 1 if type(t) is int else t[3]
+
+
+def _node(segment, upper, lower):
+    return segment, upper, lower, _leaves(upper) + _leaves(lower)
+
+
+def _balanced(a, b):
+    least = ALPHA * (a + b)
+    return a >= least and b >= least
+
+
+def _rotate_up(t):
+    # the lower child becomes the root
+    segment, upper, (segment2, upper2, lower2, _), _ = t
+    return _node(segment2, _node(segment, upper, upper2), lower2)
+
+
+def _rotate_down(t):
+    # the upper child becomes the root
+    segment, (segment1, upper1, lower1, _), lower, _ = t
+    return _node(segment1, upper1, _node(segment, lower1, lower))
+
+
+# the tree of upper, segment and lower in this order, rebalanced along one path (the join of weight
+# balanced trees by Blelloch, Ferizovic and Sun)
+def _join(upper, segment, lower):
+    a, b = _leaves(upper), _leaves(lower)
+    if _balanced(a, b):
+        return _node(segment, upper, lower)
+    return _join_lower(upper, segment, lower) if a > b else _join_upper(upper, segment, lower)
+
+
+# upper is the heavier tree: hang lower on its lowest path
+def _join_lower(upper, segment, lower):
+    if _balanced(_leaves(upper), _leaves(lower)):
+        return _node(segment, upper, lower)
+    s, u, c, _ = upper
+    t = _join_lower(c, segment, lower)
+    if _balanced(_leaves(u), t[3]):
+        return _node(s, u, t)
+    _, u1, l1, _ = t
+    if _balanced(_leaves(u), _leaves(u1)) and _balanced(_leaves(u) + _leaves(u1), _leaves(l1)):
+        return _rotate_up(_node(s, u, t))
+    return _rotate_up(_node(s, u, _rotate_down(t)))
+
+
+# lower is the heavier tree: hang upper on its highest path
+def _join_upper(upper, segment, lower):
+    if _balanced(_leaves(upper), _leaves(lower)):
+        return _node(segment, upper, lower)
+    s, c, l, _ = lower
+    t = _join_upper(upper, segment, c)
+    if _balanced(t[3], _leaves(l)):
+        return _node(s, t, l)
+    _, u1, l1, _ = t
+    if _balanced(_leaves(l1), _leaves(l)) and _balanced(_leaves(u1), _leaves(l1) + _leaves(l)):
+        return _rotate_down(_node(s, t, l))
+    return _rotate_down(_node(s, _rotate_up(t), l))
+
+
+# splits t into the tree of its first i leaves, the segment after them and the tree of the rest
+def _split(t, i):
+    segment, upper, lower, _ = t
+    a = _leaves(upper)
+    if i == a:
+        return upper, segment, lower
+    if i < a:
+        upper_part, s, lower_part = _split(upper, i)
+        return upper_part, s, _join(lower_part, segment, lower)
+    upper_part, s, lower_part = _split(lower, i - a)
+    return _join(upper, segment, upper_part), s, lower_part
+
+
+# t with its leaves first to last and the segments between them replaced by the tree make(closed,
+# above, below) returns for the tree closed of the replaced part and the segments above and below it.
+# The path down to the smallest subtree holding the part is copied, the part is split off and joined
+# in only there. above and below are the segments bounding t
+def _replace(t, first, last, above, below, make):
+    if type(t) is not int:
+        segment, upper, lower, _ = t
+        a = _leaves(upper)
+        if last < a:
+            return _join(_replace(upper, first, last, above, segment, make), segment, lower)
+        if first >= a:
+            return _join(upper, segment, _replace(lower, first - a, last - a, segment, below, make))
+    upper = lower = None
+    if first > 0:
+        upper, above, t = _split(t, first)
+    if last - first + 1 < _leaves(t):
+        t, below, lower = _split(t, last - first + 1)
+    t = make(t, above, below)
+    if lower is not None:
+        t = _join(t, below, lower)
+    if upper is not None:
+        t = _join(upper, above, t)
+    return t
+
+
+# number of leaves above the one containing (x, y). A point on a segment counts as above it with
+# ties_up, as below it otherwise
+def _position(t, table, x, y, ties_up):
+    i = 0
+    while type(t) is not int:
+        lx, ly, rx, ry = table[t[0]]
+        side = orient2d(lx, ly, rx, ry, x, y)
+        if side > 0 or (side == 0 and ties_up):
+            t = t[1]
+        else:
+            i += _leaves(t[1])
+            t = t[2]
+    return i
+
+
+def _leaves_in_order(t):
+    stack = [t]
+    while stack:
+        t = stack.pop()
+        if type(t) is int:
+            yield t
+        else:
+            stack.append(t[2])
+            stack.append(t[1])
+
+
+# perfectly balanced tree of the leaves with the segments between them
+def _block(leaves, segments):
+    if not segments:
+        return leaves[0]
+    mid = len(segments) // 2
+    return _node(segments[mid], _block(leaves[:mid + 1], segments[:mid]), _block(leaves[mid + 1:], segments[mid + 1:]))
+
+
+# X-node tree over the versions: xs[i] separates versions[i] and versions[i + 1], a point with x equal
+# to xs[i] searches versions[i + 1]. X-nodes are the tuples (x, left, right)
+def _x_tree(versions, xs, lo, hi):
+    if lo == hi:
+        return versions[lo]
+    mid = (lo + hi) // 2
+    return xs[mid], _x_tree(versions, xs, lo, mid), _x_tree(versions, xs, mid + 1, hi)
@@ -12,6 +12,8 @@ class Trapezoid(GraphObject):
     Class representing a trapezoid with top, bottom, left_p and right_p
     (2 line segments and 2 endpoints respectively)
     """
+    __slots__ = ('left_p', 'right_p', 'top', 'bottom', 'upper_left', 'lower_left', 'upper_right', 'lower_right',
+                 'face', 'depth', '_node', '_hash')
 
     def __init__(self, left_p, right_p, top, bottom):
         super().__init__()
@@ -22,9 +24,20 @@ class Trapezoid(GraphObject):
         self.right_p = right_p
         self.top = top
         self.bottom = bottom
-        self.left_neighbors = set()
-        self.right_neighbors = set()
+        # neighbors across the left wall above and below left_p, and across the right wall above and
+        # below right_p. A slot is None when that part of the wall is empty or lies on the bounding box
+        self.upper_left = None
+        self.lower_left = None
+        self.upper_right = None
+        self.lower_right = None
+        # face ID, set by RandomizedIncrementalConstruction.face_ids
+        self.face = None
+        # number of comparisons on the longest DAG path to this trapezoid's leaf, kept by
+        # RandomizedIncrementalConstruction.insert_segment and delete
+        self.depth = 0
         self._node = dag.DAGNode(self)
+        # the corners and the bounding segments never change, so the hash is computed once
+        self._hash = hash((left_p, right_p, top, bottom))
 
     @property
     def node(self):
@@ -41,126 +54,27 @@ class Trapezoid(GraphObject):
     def modify_node(self):
         pass
 
-    def updateLeftNeighbors(self, neighbors, auto=False):
-        assert isinstance(neighbors, set) and all(isinstance(n, Trapezoid) for n in neighbors)
-
-        # there are no left neighbors
-        if not neighbors or self.top.left == self.bottom.left:
-            return
-        if self.is_zero_width:
-            y_high = self.left_p.y
-            y_low = self.right_p.y
-        # if my left point is the same as my top segment left point
-        elif self.left_p == self.top.left:
-            l = self.bottom
-            y_high = self.left_p.y
-            y_low = l.slope * self.left_p.x + l.intercept
-        elif self.left_p == self.bottom.left:
-            l = self.top
-            y_high = l.slope * self.left_p.x + l.intercept
-            y_low = self.left_p.y
-        else:
-            l = self.bottom
-            y_low = l.slope * self.left_p.x + l.intercept
-            l = self.top
-            y_high = l.slope * self.left_p.x + l.intercept
-
-        for n in neighbors:
-            # if the neighbor already exists or its not directly adjacent to self, then skip
-            # get new neighbor's right top, bottom points
-            if n in self.left_neighbors or self.left_p.x != n.right_p.x:
-                continue
-            if n.is_zero_width:
-                ny_high = n.left_p.y
-                ny_low = n.right_p.y
-            elif n.right_p == n.top.right:
-                l = n.bottom
-                ny_high = n.right_p.y
-                ny_low = l.slope * n.right_p.x + l.intercept
-            elif n.right_p == n.bottom.right:
-                l = n.top
-                ny_high = l.slope * n.right_p.x + l.intercept
-                ny_low = n.right_p.y
-            else:
-                l = n.bottom
-                ny_low = l.slope * n.right_p.x + l.intercept
-                l = n.top
-                ny_high = l.slope * n.right_p.x + l.intercept
-
-            # if sides overlap, then n is a valid neighbor
-            if ny_low < y_high < ny_high or ny_low < y_low < ny_high \
-                    or y_low < ny_low < y_high or y_low < ny_high < y_high \
-                    or (y_low == ny_low and y_high == ny_high):
-                self.left_neighbors.add(n)
-                if not auto:
-                    n.updateRightNeighbors({self}, auto=True)
-
-    def updateRightNeighbors(self, neighbors, auto=False):
-        assert isinstance(neighbors, set) and all(isinstance(n, Trapezoid) for n in neighbors)
-
-        # there are no right neighbors
-        if not neighbors or self.top.right == self.bottom.right:
-            return
-
-        if self.is_zero_width:
-            y_high = self.left_p.y
-            y_low = self.right_p.y
-        elif self.right_p == self.top.right:
-            l = self.bottom
-            y_high = self.right_p.y
-            y_low = l.slope * self.right_p.x + l.intercept
-        elif self.right_p == self.bottom.right:
-            l = self.top
-            y_high = l.slope * self.right_p.x + l.intercept
-            y_low = self.right_p.y
-        else:
-            l = self.bottom
-            y_low = l.slope * self.right_p.x + l.intercept
-            l = self.top
-            y_high = l.slope * self.right_p.x + l.intercept
-
-        for n in neighbors:
-            # if the neighbor already exists or its not directly adjacent to self, then skip
-            if n in self.right_neighbors or self.right_p.x != n.left_p.x:
-                continue
-            if n.is_zero_width:
-                ny_high = n.left_p.y
-                ny_low = n.right_p.y
-            elif n.left_p == n.top.left:
-                l = n.bottom
-                ny_high = n.left_p.y
-                ny_low = l.slope * n.left_p.x + l.intercept
-            elif n.left_p == n.bottom.left:
-                l = n.top
-                ny_high = l.slope * n.left_p.x + l.intercept
-                ny_low = n.left_p.y
-            else:
-                l = n.bottom
-                ny_low = l.slope * n.left_p.x + l.intercept
-                l = n.top
-                ny_high = l.slope * n.left_p.x + l.intercept
-
-            # sides overlap
-            if ny_low < y_high < ny_high or ny_low < y_low < ny_high \
-                    or y_low < ny_low < y_high or y_low < ny_high < y_high \
-                    or (y_low == ny_low and y_high == ny_high):
-                self.right_neighbors.add(n)
-                if not auto:
-                    n.updateLeftNeighbors({self})
+    # clears the neighbor slots and the reference to the DAG leaf, which only the construction uses.
+    # The trapezoid can still be found through the DAG, but no longer be split or walked from
+    def compact(self):
+        self.upper_left = self.lower_left = self.upper_right = self.lower_right = None
+        self._node = None
 
     def __hash__(self):
-        return super().__hash__()
+        return self._hash
 
     def __eq__(self, other):
         """Override the default Equals behavior"""
-        if isinstance(other, self.__class__):
-            return self.left_p == other.left_p and self.right_p == other.right_p \
+        if self is other:
+            return True
+        if isinstance(other, Trapezoid):
+            return self._hash == other._hash and self.left_p == other.left_p and self.right_p == other.right_p \
                    and self.top == other.top and self.bottom == other.bottom
-        return super().__eq__(other)
+        return NotImplemented
 
     def __ne__(self, other):
         """Define a non-equality test"""
-        if isinstance(other, self.__class__):
+        if isinstance(other, Trapezoid):
             return not self == other
         return NotImplemented
 
@@ -0,0 +1,61 @@
+# Heap of a built map before and after RandomizedIncrementalConstruction.compact, traced with
+# tracemalloc, for every generator and size, and for comparison the heap once the map is frozen with
+# release=True, which keeps only the FrozenDAG arrays. Checks that the compacted map answers queries
+# like before and refuses edits.
+# Run from the repository root: python -m benchmarks.compact [--generators road random] [--sizes 1e4 1e5]
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from benchmarks.generators import GENERATORS
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--generators', nargs='+', choices=sorted(GENERATORS), default=sorted(GENERATORS))
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e4, 1e5])
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print('%-10s %8s %10s %12s %12s %8s %10s %10s %12s' % ('generator', 'segments', 'trapezoids', 'heap before',
+                                                          'heap after', 'saved', 'released', 'compact s', 'frozen'))
+    for name in args.generators:
+        for n in map(int, args.sizes):
+            rng = np.random.default_rng(args.seed)
+            rows, bbox = GENERATORS[name](n, rng)
+            xs = rng.uniform(bbox[0], bbox[2], args.queries).tolist()
+            ys = rng.uniform(bbox[1], bbox[3], args.queries).tolist()
+            gc.collect()
+            tracemalloc.start()
+            R = RandomizedIncrementalConstruction(rows, Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3]), seed=args.seed)
+            expected = [R.locate(Point(x, y)) for x, y in zip(xs, ys)]
+            start = time.perf_counter()
+            report = R.compact()
+            compact_time = time.perf_counter() - start
+            if [R.locate(Point(x, y)) for x, y in zip(xs, ys)] != expected:
+                raise AssertionError('the compacted map answers differently')
+            try:
+                R.insert(R.segements[0])
+            except ValueError:
+                pass
+            else:
+                raise AssertionError('the compacted map accepted an edit')
+            R.freeze(release=True)
+            gc.collect()
+            frozen = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            before, after = report['heap_before'], report['heap_after']
+            print('%-10s %8d %10d %10.1fMB %10.1fMB %7.1f%% %10d %10.3f %10.1fMB' % (
+                name, n, report['trapezoids'], before / 1e6, after / 1e6, 100 * (before - after) / before,
+                report['released_objects'], compact_time, frozen / 1e6))
+            del R, expected
+
+
+if __name__ == '__main__':
+    main()
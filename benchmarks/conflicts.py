@@ -0,0 +1,84 @@
+# Build time and peak heap of RandomizedIncrementalConstruction with conflict lists against the
+# default build that finds every left end point by a DAG search, on the same inputs and seed. Time is
+# the best of --repeats builds (--no-gc switches the collector off while timing), the peak heap is
+# traced with tracemalloc in a separate build. Checks that both builds freeze to the same arrays.
+# Run from the repository root: python -m benchmarks.conflicts [--generators road random] [--sizes 1e4 1e5]
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+
+import Instrumentation
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from benchmarks.generators import GENERATORS
+
+FROZEN_ARRAYS = ('kind', 'key', 'seg', 'left', 'right', 'trap', 'segments', 'trap_points', 'trap_segments')
+
+
+def build(rows, bbox, seed, conflict_lists):
+    return RandomizedIncrementalConstruction(rows, Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3]), seed=seed,
+                                             conflict_lists=conflict_lists)
+
+
+# best build time and the seconds the best build spent finding start trapezoids (locate and conflicts phases)
+def timed(rows, bbox, seed, conflict_lists, repeats, no_gc):
+    best = None
+    for _ in range(repeats):
+        gc.collect()
+        if no_gc:
+            gc.disable()
+        try:
+            with Instrumentation.profiling() as profiler:
+                start = time.perf_counter()
+                R = build(rows, bbox, seed, conflict_lists)
+                elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        seconds = profiler.seconds
+        if best is None or elapsed < best[0]:
+            best = (elapsed, seconds['locate'] + seconds['conflicts'])
+    return best, R
+
+
+def peak_heap(rows, bbox, seed, conflict_lists):
+    gc.collect()
+    tracemalloc.start()
+    R = build(rows, bbox, seed, conflict_lists)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del R
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--generators', nargs='+', choices=sorted(GENERATORS), default=sorted(GENERATORS))
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e4, 1e5])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--no-gc', action='store_true', help="switch the garbage collector off while timing")
+    args = parser.parse_args()
+
+    print('%-10s %8s %-10s %9s %10s %10s %8s' % ('generator', 'segments', 'build', 'build s', 'search s',
+                                                 'peak heap', 'speedup'))
+    for name in args.generators:
+        for n in map(int, args.sizes):
+            rows, bbox = GENERATORS[name](n, np.random.default_rng(args.seed))
+            (dag_time, dag_search), dag = timed(rows, bbox, args.seed, False, args.repeats, args.no_gc)
+            (cl_time, cl_search), cl = timed(rows, bbox, args.seed, True, args.repeats, args.no_gc)
+            a, b = dag.freeze(), cl.freeze()
+            if not all(np.array_equal(getattr(a, k), getattr(b, k)) for k in FROZEN_ARRAYS):
+                raise AssertionError('the conflict list build differs on %s with %d segments' % (name, n))
+            del dag, cl, a, b
+            for label, elapsed, search, conflict_lists in (('dag', dag_time, dag_search, False),
+                                                           ('conflicts', cl_time, cl_search, True)):
+                peak = peak_heap(rows, bbox, args.seed, conflict_lists)
+                print('%-10s %8d %-10s %9.3f %10.3f %8.1fMB %7.2fx' % (
+                    name, n, label, elapsed, search, peak / 1e6, dag_time / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+# Cost of RandomizedIncrementalConstruction.insert / delete against the map size, and a check that
+# the edited map equals a full rebuild of the same segments and still exports its adjacency. Reports the
+# depth of the edited map against a fresh build and how often the edits rebuilt it.
+# The maps are built from the first n segments of the file for every n in --sizes; random edits then
+# delete a segment of the map or insert one of the deleted segments again.
+# With --grid SIZE the maps are instead --trials random sets of --sizes segments on a SIZE x SIZE
+# integer grid (see generators.integer_grid), where end points share x-coordinates and segments share
+# end points, and every edit is checked against a rebuild.
+# Run from the repository root: python -m benchmarks.dynamic_edits test.txt [--sizes 2 3 4] [--edits N]
+#                               python -m benchmarks.dynamic_edits --grid 6 [--sizes 12] [--trials 200]
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+import SegmentFile
+from LineSegment import LineSegment
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from Trapezoid import Trapezoid
+from benchmarks.generators import integer_grid
+
+
+def trapezoid_rows(R):
+    return sorted((t.left_p.x, t.left_p.y, t.right_p.x, t.right_p.y, t.top.left.x, t.top.left.y, t.top.right.x,
+                   t.top.right.y, t.bottom.left.x, t.bottom.left.y, t.bottom.right.x, t.bottom.right.y)
+                  for t in R.DAG.trapezoids())
+
+
+# the edge list and CSR exports name every node, those of deleted segments included
+def check_exports(R):
+    edges = list(R.DAG.iter_edges(R.segements))
+    names, indptr, indices = R.DAG.build_adjacency_csr(R.segements)
+    inner = sum(1 for node in R.DAG.bfs_nodes() if not isinstance(node.graph_object, Trapezoid))
+    if len(edges) != 2 * inner or len(set(names)) != len(names) or indptr[-1] != len(indices):
+        raise AssertionError('the adjacency exports of the edited map are inconsistent')
+
+
+# (left point, right point, top segment, bottom segment) of the trapezoid every query landed in,
+# rows of NaN for queries on a wall
+def query_geometry(R, xs, ys):
+    frozen = R.freeze()
+    ids = frozen.locate_many(xs, ys)
+    rows = frozen.trap_segments[ids]
+    geometry = np.hstack([frozen.trap_points[ids], frozen.segments[rows[:, 0]], frozen.segments[rows[:, 1]]])
+    geometry[ids < 0] = np.nan
+    return geometry
+
+
+def check(R, segments, bl, tr, xs, ys):
+    check_exports(R)
+    rebuilt = RandomizedIncrementalConstruction(list(segments), bl, tr, seed=0)
+    if trapezoid_rows(R) != trapezoid_rows(rebuilt):
+        raise AssertionError('edited map and rebuilt map have different trapezoids')
+    got, expected = query_geometry(R, xs, ys), query_geometry(rebuilt, xs, ys)
+    # the X-nodes of deleted end points stay in the edited map, a query on their vertical line goes
+    # right like any other and gets the same answer
+    if not np.array_equal(got, expected, equal_nan=True):
+        raise AssertionError('edited map and rebuilt map answer queries differently')
+
+
+# random edits on small maps with shared x-coordinates, each checked against a rebuild
+def run_grid(args):
+    rng = random.Random(args.seed)
+    np_rng = np.random.default_rng(args.seed)
+    for n in args.sizes or [12]:
+        edits = 0
+        for trial in range(args.trials):
+            rows, bbox = integer_grid(n, args.grid, np_rng)
+            bl, tr = Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3])
+            # half of the queries on the vertical lines through the grid points
+            xs = np_rng.uniform(bbox[0], bbox[2], args.queries)
+            xs[::2] = np_rng.integers(1, args.grid + 1, len(xs[::2]))
+            ys = np_rng.uniform(bbox[1], bbox[3], args.queries)
+            present = [LineSegment(Point(x1, y1), Point(x2, y2)) for x1, y1, x2, y2 in rows.tolist()]
+            deleted = []
+            R = RandomizedIncrementalConstruction(list(present), bl, tr, seed=trial)
+            for _ in range(args.edits):
+                if deleted and (rng.random() < 0.5 or len(present) == 1):
+                    segment = deleted.pop(rng.randrange(len(deleted)))
+                    R.insert(segment)
+                    present.append(segment)
+                else:
+                    segment = present.pop(rng.randrange(len(present)))
+                    R.delete(segment)
+                    deleted.append(segment)
+                try:
+                    check(R, present, bl, tr, xs, ys)
+                except AssertionError as e:
+                    raise AssertionError('%s (trial %d, segments %s)' % (e, trial, present + deleted))
+                edits += 1
+        print('grid %d, %d segments: %d trials, %d edits checked against a rebuild' % (args.grid, n, args.trials, edits))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('segments', nargs='?')
+    parser.add_argument('--sizes', type=int, nargs='+', help="map sizes, default the whole file")
+    parser.add_argument('--edits', type=int, default=200)
+    parser.add_argument('--check-every', type=int, default=10, help="compare with a full rebuild every N edits, 0 to skip")
+    parser.add_argument('--queries', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--grid', type=int, metavar='SIZE', help="random maps on a SIZE x SIZE integer grid instead of a file")
+    parser.add_argument('--trials', type=int, default=200, help="number of random maps for --grid")
+    args = parser.parse_args()
+    if args.grid:
+        return run_grid(args)
+    if args.segments is None:
+        parser.error("segments is required unless --grid is given")
+
+    rows, bbox = SegmentFile.load(args.segments)
+    bl, tr = Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3])
+    all_segments = [LineSegment(Point(x1, y1), Point(x2, y2)) for x1, y1, x2, y2 in np.asarray(rows).tolist()]
+    rng = random.Random(args.seed)
+    query_rng = np.random.default_rng(args.seed)
+    xs = query_rng.uniform(bbox[0], bbox[2], args.queries)
+    ys = query_rng.uniform(bbox[1], bbox[3], args.queries)
+
+    for n in args.sizes or [len(all_segments)]:
+        R = RandomizedIncrementalConstruction(list(all_segments[:n]), bl, tr, seed=args.seed)
+        present, deleted = list(all_segments[:n]), []
+        insert_time = delete_time = 0.0
+        inserts = deletes = checks = 0
+        for edit in range(1, args.edits + 1):
+            if deleted and (rng.random() < 0.5 or len(present) == 1):
+                segment = deleted.pop(rng.randrange(len(deleted)))
+                start = time.perf_counter()
+                R.insert(segment)
+                insert_time += time.perf_counter() - start
+                inserts += 1
+                present.append(segment)
+            else:
+                segment = present.pop(rng.randrange(len(present)))
+                start = time.perf_counter()
+                R.delete(segment)
+                delete_time += time.perf_counter() - start
+                deletes += 1
+                deleted.append(segment)
+            if args.check_every and edit % args.check_every == 0:
+                check(R, present, bl, tr, xs, ys)
+                checks += 1
+        fresh = RandomizedIncrementalConstruction(list(present), bl, tr, seed=args.seed)
+        print('n=%6d: insert %8.1f us, delete %8.1f us, per ln(n + 1): %6.1f us, %d checks against a rebuild, '
+              'depth %d (fresh build %d), %d rebuilds'
+              % (n, 1e6 * insert_time / max(inserts, 1), 1e6 * delete_time / max(deletes, 1),
+                 1e6 * (insert_time + delete_time) / args.edits / math.log(n + 1), checks,
+                 R.DAG.max_depth(), fresh.DAG.max_depth(), R.edit_rebuilds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# Builds of RandomizedIncrementalConstruction with end points interned by an EndpointTable against
+# one Point object per segment end, on road-network input where most vertices are shared by three or
+# four segments. Reports the vertex degrees, the number of Point objects the segments hold, the time
+# to build the table, the build time (best of --repeats) and the traced heap of the built map. Checks
+# that both builds freeze to the same arrays.
+# Run from the repository root: python -m benchmarks.endpoints [--sizes 1e4 1e5] [--generator road]
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+
+from EndpointTable import EndpointTable
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from benchmarks.generators import GENERATORS
+
+FROZEN_ARRAYS = ('kind', 'key', 'seg', 'left', 'right', 'trap', 'segments', 'trap_points', 'trap_segments')
+
+
+def build(rows, bbox, seed, intern_endpoints):
+    return RandomizedIncrementalConstruction(rows, Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3]), seed=seed,
+                                             intern_endpoints=intern_endpoints)
+
+
+def best_time(rows, bbox, seed, intern_endpoints, repeats):
+    best = None
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        build(rows, bbox, seed, intern_endpoints)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# traced heap of the built map and the number of distinct Point objects its segments end in
+def heap(rows, bbox, seed, intern_endpoints):
+    gc.collect()
+    tracemalloc.start()
+    R = build(rows, bbox, seed, intern_endpoints)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    objects = len({id(p) for s in R.segements for p in (s.left, s.right)})
+    return size, objects, R
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--generator', choices=sorted(GENERATORS), default='road')
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e4, 1e5])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    print('%8s %9s %8s %-9s %9s %9s %9s %10s' % ('segments', 'vertices', 'deg>=3', 'points', 'objects',
+                                                 'table s', 'build s', 'heap'))
+    for n in map(int, args.sizes):
+        rows, bbox = GENERATORS[args.generator](n, np.random.default_rng(args.seed))
+        start = time.perf_counter()
+        table = EndpointTable(rows)
+        table_time = time.perf_counter() - start
+        degrees = table.degrees()
+        shared = 100 * np.count_nonzero(degrees >= 3) / len(table)
+        frozen = None
+        for label, intern_endpoints in (('per end', False), ('interned', True)):
+            elapsed = best_time(rows, bbox, args.seed, intern_endpoints, args.repeats)
+            size, objects, R = heap(rows, bbox, args.seed, intern_endpoints)
+            if frozen is None:
+                frozen = R.freeze()
+            elif not all(np.array_equal(getattr(frozen, k), getattr(R.freeze(), k)) for k in FROZEN_ARRAYS):
+                raise AssertionError('the interned build differs with %d segments' % n)
+            del R
+            print('%8d %9d %7.1f%% %-9s %9d %9s %9.3f %8.1fMB' % (
+                n, len(table), shared, label, objects, '%.4f' % table_time if intern_endpoints else '-', elapsed,
+                size / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# Face lookup through the trapezoid map against point-in-polygon tests. The map holds all edges of a
+# jittered grid (benchmarks.generators.labeled_grid) with the grid cells as labeled faces. Two
+# polygon baselines: one query at a time against every cell whose bounding box holds the point, as a
+# caller without a spatial index does, and a batch test of the 3 x 3 cells around the point's grid
+# position, which uses the grid layout and serves as the reference. Checks that every query gets the
+# same face from the map and from the polygons.
+# Run from the repository root: python -m benchmarks.faces [--grid K] [--queries N] [--single N]
+import argparse
+import time
+
+import numpy as np
+
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from benchmarks.generators import labeled_grid
+
+
+# face of every query by convex polygon tests against the 3 x 3 cells around floor(x), floor(y)
+def polygon_faces(corners, k, xs, ys):
+    faces = np.full(len(xs), -1, dtype=np.int64)
+    ci, cj = np.floor(xs).astype(np.int64), np.floor(ys).astype(np.int64)
+    for di in (-1, 0, 1):
+        for dj in (-1, 0, 1):
+            i, j = ci + di, cj + dj
+            valid = (i >= 0) & (i < k - 1) & (j >= 0) & (j < k - 1)
+            cell = np.where(valid, i * (k - 1) + j, 0)
+            quad = corners[cell]
+            inside = valid.copy()
+            for a in range(4):
+                p, q = quad[:, a], quad[:, (a + 1) % 4]
+                inside &= (q[:, 0] - p[:, 0]) * (ys - p[:, 1]) - (q[:, 1] - p[:, 1]) * (xs - p[:, 0]) > 0
+            faces[inside] = cell[inside]
+    return faces
+
+
+# face of one query: the cells whose bounding box holds the point, then the polygon test on those
+def polygon_face(corners, lows, highs, x, y):
+    for cell in np.nonzero((lows[:, 0] <= x) & (highs[:, 0] >= x) & (lows[:, 1] <= y) & (highs[:, 1] >= y))[0]:
+        quad = corners[cell]
+        if all((q[0] - p[0]) * (y - p[1]) - (q[1] - p[1]) * (x - p[0]) > 0 for p, q in zip(quad, np.roll(quad, -1, axis=0))):
+            return int(cell)
+    return -1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--grid', type=int, default=60, help="grid points per side, 2k(k - 1) segments")
+    parser.add_argument('--queries', type=int, default=200000)
+    parser.add_argument('--single', type=int, default=5000, help="queries timed one at a time")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    k = args.grid
+    rows, above, below, bbox, corners = labeled_grid(k, rng)
+    R = RandomizedIncrementalConstruction(rows, Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3]), seed=args.seed)
+    start = time.perf_counter()
+    R.set_face_labels(above, below)
+    R.face_ids()
+    label_time = time.perf_counter() - start
+    R.freeze()
+    xs = rng.uniform(bbox[0], bbox[2], args.queries)
+    ys = rng.uniform(bbox[1], bbox[3], args.queries)
+
+    start = time.perf_counter()
+    faces = R.locate_faces(xs, ys)
+    map_time = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = polygon_faces(corners, k, xs, ys)
+    polygon_time = time.perf_counter() - start
+    if not np.array_equal(faces, expected):
+        raise AssertionError('%d queries got a different face from the map' % np.count_nonzero(faces != expected))
+
+    single = list(zip(xs[:args.single].tolist(), ys[:args.single].tolist()))
+    start = time.perf_counter()
+    map_single = [R.locate_face(Point(x, y)) for x, y in single]
+    map_single_time = time.perf_counter() - start
+    lows, highs = corners.min(axis=1), corners.max(axis=1)
+    start = time.perf_counter()
+    polygon_single = [polygon_face(corners, lows, highs, x, y) for x, y in single]
+    polygon_single_time = time.perf_counter() - start
+    if map_single != polygon_single or map_single != expected[:len(single)].tolist():
+        raise AssertionError('single queries got a different face from the map')
+
+    n, m = args.queries, len(single)
+    print('%d segments, %d faces, %d trapezoids, labeling %.3fs' % (len(rows), (k - 1) ** 2, len(R.face_ids()), label_time))
+    print('one at a time:  map %8.2f us/query, polygons %8.2f us/query, %.1fx'
+          % (1e6 * map_single_time / m, 1e6 * polygon_single_time / m, polygon_single_time / map_single_time))
+    print('batch:          map %8.2f us/query, 3 x 3 grid cells %8.2f us/query'
+          % (1e6 * map_time / n, 1e6 * polygon_time / n))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# Memory and query time of the object DAG against its frozen array form, on generated inputs (see
+# generators.py) or a segment file. The object heap is what tracemalloc traces while the map is built,
+# the frozen size the bytes of the FrozenDAG arrays, ratio the first over the second. Queries are
+# answered one at a time by the object DAG and by FrozenDAG.locate, and as one batch by
+# FrozenDAG.locate_many.
+# Run from the repository root: python -m benchmarks.freeze [--generators road random] [--sizes 1e4 5e4]
+#                               python -m benchmarks.freeze test.txt
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+import SegmentFile
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from benchmarks.generators import GENERATORS
+
+
+def measure(label, rows, bbox, queries, seed):
+    rng = np.random.default_rng(seed)
+    xs = rng.uniform(bbox[0], bbox[2], queries)
+    ys = rng.uniform(bbox[1], bbox[3], queries)
+    bl, tr = Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3])
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    R = RandomizedIncrementalConstruction(rows, bl, tr, seed=seed)
+    object_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    frozen = R.freeze()
+
+    start = time.perf_counter()
+    expected = [R.locate(Point(x, y)) for x, y in zip(xs.tolist(), ys.tolist())]
+    object_time = time.perf_counter() - start
+    start = time.perf_counter()
+    got = [frozen.locate(x, y) for x, y in zip(xs.tolist(), ys.tolist())]
+    frozen_time = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = frozen.locate_many(xs, ys)
+    batch_time = time.perf_counter() - start
+    if got != expected or batch.tolist() != expected:
+        raise AssertionError('frozen map disagrees with the object DAG on %s' % label)
+
+    print('%-10s %8d %9d %10.1fMB %10.1fMB %6.1fx %9.2f %9.2f %9.2f' % (
+        label, len(rows), len(frozen), object_bytes / 1e6, frozen.nbytes / 1e6, object_bytes / frozen.nbytes,
+        object_time / queries * 1e6, frozen_time / queries * 1e6, batch_time / queries * 1e6))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('segments', nargs='?', help="segment file, instead of the generators")
+    parser.add_argument('--generators', nargs='+', choices=sorted(GENERATORS), default=sorted(GENERATORS))
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e4, 5e4])
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print('%-10s %8s %9s %12s %12s %7s %9s %9s %9s' % ('input', 'segments', 'nodes', 'object heap', 'frozen size',
+                                                       'ratio', 'object us', 'frozen us', 'batch us'))
+    if args.segments:
+        rows, bbox = SegmentFile.load(args.segments)
+        return measure(args.segments, np.asarray(rows), bbox, args.queries, args.seed)
+    for name in args.generators:
+        for n in map(int, args.sizes):
+            rows, bbox = GENERATORS[name](n, np.random.default_rng(args.seed))
+            measure(name, rows, bbox, args.queries, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+# Synthetic sets of non-crossing segments for the benchmarks. Every generator takes the number of
+# segments and a numpy Generator and returns the segments as an (n, 4) float64 array of
+# (x1, y1, x2, y2) rows and the bounding box as (bottom left x, bottom left y, top right x, top right y).
+# No segment is vertical, segments only touch in shared end points.
+import math
+
+import numpy as np
+
+
+# one segment inside every cell of a square grid of unit cells, in random cell order
+def random_disjoint(n, rng):
+    k = max(1, math.ceil(math.sqrt(n)))
+    cells = rng.permutation(k * k)[:n]
+    i, j = (cells // k).astype(np.float64), (cells % k).astype(np.float64)
+    # end points stay 0.05 away from the cell walls, x1 != x2 but for a measure zero draw
+    x1, x2 = i + rng.uniform(0.05, 0.95, n), i + rng.uniform(0.05, 0.95, n)
+    y1, y2 = j + rng.uniform(0.05, 0.95, n), j + rng.uniform(0.05, 0.95, n)
+    x2 = np.where(x1 == x2, x2 + 0.01, x2)
+    return np.column_stack([x1, y1, x2, y2]), (-1.0, -1.0, k + 1.0, k + 1.0)
+
+
+# road-network-like: the edges of a grid graph with jittered vertices, a random subset of n of them.
+# Edges meet in shared end points of degree up to 4. The jitter stays below a quarter of the grid
+# spacing, so every grid cell stays a convex quadrilateral and no two edges cross
+def road_network(n, rng):
+    # a k x k grid has 2k(k - 1) edges
+    k = 2
+    while 2 * k * (k - 1) < n:
+        k += 1
+    gx, gy = np.meshgrid(np.arange(k, dtype=np.float64), np.arange(k, dtype=np.float64), indexing='ij')
+    px = gx + rng.uniform(-0.2, 0.2, gx.shape)
+    py = gy + rng.uniform(-0.2, 0.2, gy.shape)
+    # horizontal edges (i, j)-(i + 1, j), then vertical edges (i, j)-(i, j + 1)
+    horizontal = np.column_stack([px[:-1, :].ravel(), py[:-1, :].ravel(), px[1:, :].ravel(), py[1:, :].ravel()])
+    vertical = np.column_stack([px[:, :-1].ravel(), py[:, :-1].ravel(), px[:, 1:].ravel(), py[:, 1:].ravel()])
+    edges = np.vstack([horizontal, vertical])
+    return edges[rng.permutation(len(edges))[:n]], (-1.0, -1.0, float(k), float(k))
+
+
+# nearly vertical: one long segment per column of width 1, leaning by at most 1e-3 across its
+# height. The map consists of long thin trapezoids
+def nearly_vertical(n, rng):
+    height = float(max(n, 1))
+    x1 = np.arange(n, dtype=np.float64) + rng.uniform(0.1, 0.9, n)
+    lean = rng.uniform(1e-6, 1e-3, n) * rng.choice([-1.0, 1.0], n)
+    y1 = rng.uniform(0.0, 0.3 * height, n)
+    y2 = rng.uniform(0.7 * height, height, n)
+    rows = np.column_stack([x1, y1, x1 + lean, y2])
+    return rows[rng.permutation(n)], (-1.0, -1.0, n + 1.0, height + 1.0)
+
+
+# the segments of random_disjoint sorted by their left x. The builder shuffles the insertion order,
+# so this shows whether the input order still leaks into the build
+def sorted_by_x(n, rng):
+    rows, bbox = random_disjoint(n, rng)
+    return rows[np.argsort(np.minimum(rows[:, 0], rows[:, 2]), kind='stable')], bbox
+
+
+GENERATORS = {
+    'random': random_disjoint,
+    'road': road_network,
+    'vertical': nearly_vertical,
+    'sorted': sorted_by_x,
+}
+
+
+# all edges of a k x k jittered grid graph (as in road_network) with face labels: the (k - 1)^2 grid
+# cells are the faces, cell (i, j) has face ID i * (k - 1) + j and the outside of the grid is -1.
+# Returns the segments, the faces above and below every segment, the bounding box and the corners of
+# every cell as a ((k - 1)^2, 4, 2) array in counterclockwise order
+def labeled_grid(k, rng):
+    px = np.arange(k, dtype=np.float64)[:, None] + rng.uniform(-0.2, 0.2, (k, k))
+    py = np.arange(k, dtype=np.float64)[None, :] + rng.uniform(-0.2, 0.2, (k, k))
+
+    def face(i, j):
+        return i * (k - 1) + j if 0 <= i < k - 1 and 0 <= j < k - 1 else -1
+
+    rows, above, below = [], [], []
+    for i in range(k):
+        for j in range(k):
+            if i + 1 < k:
+                # (i, j) is the left end point, the cell above lies left of the direction of the segment
+                rows.append((px[i, j], py[i, j], px[i + 1, j], py[i + 1, j]))
+                above.append(face(i, j))
+                below.append(face(i, j - 1))
+            if j + 1 < k:
+                rows.append((px[i, j], py[i, j], px[i, j + 1], py[i, j + 1]))
+                west, east = face(i - 1, j), face(i, j)
+                # running up to the right the west cell lies above the segment, running down to the right the east one
+                upward = px[i, j] < px[i, j + 1]
+                above.append(west if upward else east)
+                below.append(east if upward else west)
+    i, j = np.divmod(np.arange((k - 1) ** 2), k - 1)
+    corners = np.stack([np.column_stack([px[a, b], py[a, b]]) for a, b in ((i, j), (i + 1, j), (i + 1, j + 1), (i, j + 1))],
+                       axis=1)
+    return np.array(rows), np.array(above), np.array(below), (-1.0, -1.0, float(k), float(k)), corners
+
+
+# up to n segments between the points of a size x size integer grid, drawn at random and kept when
+# they meet the segments kept so far at most in a shared end point. Many end points share their x
+# and many segments share end points, the degenerate input the general position generators avoid.
+# With vertical=True segments with both end points at the same x are drawn too.
+# Returns the segments and the bounding box (0, 0, size + 1, size + 1)
+def integer_grid(n, size, rng, attempts=None, vertical=False):
+    def orient(p, q, r):
+        return (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+
+    def on(p, q, r):
+        return min(p[0], q[0]) <= r[0] <= max(p[0], q[0]) and min(p[1], q[1]) <= r[1] <= max(p[1], q[1])
+
+    def compatible(a, b):
+        (p, q), (r, s) = a, b
+        shared = {p, q} & {r, s}
+        if len(shared) == 2:
+            return False
+        o1, o2, o3, o4 = orient(p, q, r), orient(p, q, s), orient(r, s, p), orient(r, s, q)
+        if o1 * o2 < 0 and o3 * o4 < 0:
+            return False
+        for o, u, v, point in ((o1, p, q, r), (o2, p, q, s), (o3, r, s, p), (o4, r, s, q)):
+            if o == 0 and point not in shared and on(u, v, point):
+                return False
+        if shared and o1 == o2 == o3 == o4 == 0:
+            # collinear through the shared end point: they may only continue to opposite sides
+            c = shared.pop()
+            e, f = q if p == c else p, s if r == c else r
+            return (e[0] - c[0]) * (f[0] - c[0]) + (e[1] - c[1]) * (f[1] - c[1]) < 0
+        return True
+
+    kept = []
+    for _ in range(attempts or 50 * n):
+        if len(kept) == n:
+            break
+        x1, y1, x2, y2 = (int(v) for v in rng.integers(1, size + 1, 4))
+        if x1 == x2 and (not vertical or y1 == y2):
+            continue
+        segment = ((x1, y1), (x2, y2))
+        if all(compatible(segment, other) for other in kept):
+            kept.append(segment)
+    rows = np.array([(p[0], p[1], q[0], q[1]) for p, q in kept], dtype=np.float64).reshape(-1, 4)
+    return rows, (0.0, 0.0, size + 1.0, size + 1.0)
@@ -0,0 +1,61 @@
+# Memory of GridAccelerator against the DAG levels it skips and the query time it saves, for a range of
+# grid resolutions over one map. Checks that the accelerated queries answer like the plain frozen map.
+# Run from the repository root: python -m benchmarks.grid [--generator random] [--segments N] [--resolutions 16 64 256]
+import argparse
+import time
+
+import numpy as np
+
+from GridAccelerator import GridAccelerator
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from benchmarks.generators import GENERATORS
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--generator', choices=sorted(GENERATORS), default='random')
+    parser.add_argument('--segments', type=int, default=20000)
+    parser.add_argument('--resolutions', type=int, nargs='+', default=[4, 16, 64, 256, 1024])
+    parser.add_argument('--queries', type=int, default=200000)
+    parser.add_argument('--single', type=int, default=20000, help="queries timed one at a time")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    rows, bbox = GENERATORS[args.generator](args.segments, rng)
+    R = RandomizedIncrementalConstruction(rows, Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3]), seed=args.seed)
+    frozen = R.freeze()
+    xs = rng.uniform(bbox[0], bbox[2], args.queries)
+    ys = rng.uniform(bbox[1], bbox[3], args.queries)
+    single = list(zip(xs[:args.single].tolist(), ys[:args.single].tolist()))
+
+    expected, batch_time = timed(lambda: frozen.locate_many(xs, ys))
+    _, single_time = timed(lambda: [frozen.locate(x, y) for x, y in single])
+    print('%s map, %d segments, DAG %d nodes (%d bytes), max depth %d' % (
+        args.generator, args.segments, len(frozen), frozen.nbytes, frozen.max_depth()))
+    # levels skipped: the mean over the cells and over the queries
+    print('%10s %10s %10s %13s %13s %12s %12s' % ('grid', 'bytes', 'build s', 'skipped/cell', 'skipped/query',
+                                                 'batch ns/q', 'single us/q'))
+    print('%10s %10d %10s %13.2f %13.2f %12.1f %12.2f' % ('none', 0, '-', 0, 0, 1e9 * batch_time / len(xs),
+                                                     1e6 * single_time / len(single)))
+    for resolution in args.resolutions:
+        grid, build_time = timed(lambda: GridAccelerator(frozen, resolution))
+        got, batch_time = timed(lambda: grid.locate_many(xs, ys))
+        got_single, single_time = timed(lambda: [grid.locate(x, y) for x, y in single])
+        if not np.array_equal(got, expected) or got_single != expected[:len(single)].tolist():
+            raise AssertionError('the grid answers differently from the frozen map')
+        report = grid.report(xs, ys)
+        print('%10s %10d %10.3f %13.2f %13.2f %12.1f %12.2f' % (
+            '%dx%d' % (grid.nx, grid.ny), report['bytes'], build_time, report['mean_levels_skipped'],
+            report['query_levels_skipped'], 1e9 * batch_time / len(xs), 1e6 * single_time / len(single)))
+
+
+if __name__ == '__main__':
+    main()
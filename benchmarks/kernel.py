@@ -0,0 +1,54 @@
+# Microbenchmark of the geometry kernel operations the construction leans on: creating points,
+# segments and trapezoids, hashing them into the neighbor sets and dicts, and evaluating the
+# supporting line of a segment. Also times complete builds of a small map.
+# Run from the repository root: python -m benchmarks.kernel [--segments N] [--builds N]
+import argparse
+import random
+import time
+
+from Point import Point
+from LineSegment import LineSegment
+from Trapezoid import Trapezoid
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from main import load_input
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print('%-28s %8.3fs' % (label, time.perf_counter() - start))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--segments', type=int, default=100000)
+    parser.add_argument('--builds', type=int, default=200)
+    parser.add_argument('--input', default='test.txt')
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    coords = [(rnd.uniform(0, 1000), rnd.uniform(0, 1000), rnd.uniform(0, 1000), rnd.uniform(0, 1000))
+              for _ in range(args.segments)]
+
+    total = time.perf_counter()
+    segments = timed('create segments', lambda: [LineSegment(Point(a, b), Point(c, d)) for a, b, c, d in coords])
+    traps = timed('create trapezoids', lambda: [Trapezoid(s.left, s.right, s, segments[i - 1])
+                                                for i, s in enumerate(segments)])
+    timed('hash segments into dict', lambda: {s: i for i, s in enumerate(segments)})
+    neighbors = timed('hash trapezoids into sets', lambda: [{traps[i - 1], traps[i - 2]} for i in range(len(traps))])
+    timed('set membership', lambda: sum(traps[i - 1] in n for i, n in enumerate(neighbors)))
+    timed('supporting line y(x)', lambda: [s.slope * t.left_p.x + s.intercept
+                                            for s, t in zip(segments, traps) if not s.isVertical])
+    print('%-28s %8.3fs' % ('kernel total', time.perf_counter() - total))
+
+    input_segments, boundBottomLeft, boundTopRight = load_input(args.input)
+
+    def build():
+        for seed in range(args.builds):
+            RandomizedIncrementalConstruction(input_segments, boundBottomLeft, boundTopRight, seed=seed)
+    timed('%d builds of %s' % (args.builds, args.input), build)
+
+
+if __name__ == '__main__':
+    main()
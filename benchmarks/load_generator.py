@@ -0,0 +1,109 @@
+# Load generator for LocationServer: many concurrent clients send query batches and the
+# throughput and per-request latency percentiles are reported.
+# Start a server first (python LocationServer.py test.txt) or let the generator start one:
+#   python -m benchmarks.load_generator --spawn test.txt [--clients 64] [--requests 200] [--points 16]
+import argparse
+import asyncio
+import json
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from Histogram import Histogram
+from LocationServer import BINARY_FRAME
+
+
+async def connect(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def client(args, seed, latency):
+    reader, writer = await connect(args)
+    rng = np.random.default_rng(seed)
+    bbox = args.bbox
+    for _ in range(args.requests):
+        xs = rng.uniform(bbox[0], bbox[2], args.points)
+        ys = rng.uniform(bbox[1], bbox[3], args.points)
+        start = time.perf_counter()
+        if args.binary:
+            points = np.column_stack([xs, ys]).astype('<f8')
+            writer.write(struct.pack('<BI', BINARY_FRAME, args.points) + points.tobytes())
+            await writer.drain()
+            header = await reader.readexactly(5)
+            count = struct.unpack('<I', header[1:])[0]
+            await reader.readexactly(4 * count)
+        else:
+            writer.write(('LOCATE ' + ' '.join('%r %r' % p for p in zip(xs.tolist(), ys.tolist())) + '\n').encode())
+            await writer.drain()
+            line = await reader.readline()
+            if not line.startswith(b'OK'):
+                raise RuntimeError(line.decode())
+        latency.record(time.perf_counter() - start)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def stats(args):
+    reader, writer = await connect(args)
+    writer.write(b'STATS\n')
+    line = await reader.readline()
+    writer.close()
+    return json.loads(line[3:])
+
+
+async def run(args):
+    latency = Histogram()
+    start = time.perf_counter()
+    await asyncio.gather(*(client(args, seed, latency) for seed in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    requests = args.clients * args.requests
+    server = await stats(args)
+    print('%d clients x %d requests x %d points (%s)' % (args.clients, args.requests, args.points,
+                                                       'binary' if args.binary else 'text'))
+    print('throughput:  %.0f requests/s, %.0f queries/s' % (requests / elapsed, requests * args.points / elapsed))
+    print('latency:     p50 %.3fms, p99 %.3fms, p99.9 %.3fms, max %.3fms' % (
+        latency.percentile(50) * 1e3, latency.percentile(99) * 1e3, latency.percentile(99.9) * 1e3, latency.max * 1e3))
+    print('server:      %d batches, mean batch size %.1f points' % (server['batches'], server['mean_batch_size']))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH')
+    parser.add_argument('--spawn', metavar='SEGMENTS', help="start a server for this segment file on a temporary Unix socket")
+    parser.add_argument('--window', type=float, default=0.001, help="batching window of the spawned server")
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--points', type=int, default=16)
+    parser.add_argument('--binary', action='store_true', help="send binary frames instead of text lines")
+    parser.add_argument('--bbox', type=float, nargs=4, default=[0, 0, 100, 100], help="area the query points are drawn from")
+    args = parser.parse_args()
+
+    if not args.spawn:
+        asyncio.run(run(args))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        args.unix = os.path.join(tmp, 'server.sock')
+        server = subprocess.Popen([sys.executable, 'LocationServer.py', args.spawn, '--unix', args.unix,
+                                   '--window', str(args.window)], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            # the server prints one line once it is listening
+            server.stdout.readline()
+            while not os.path.exists(args.unix):
+                time.sleep(0.01)
+            asyncio.run(run(args))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
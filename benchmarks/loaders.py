@@ -0,0 +1,60 @@
+# Times main.load_input against the bulk text loader and the memory-mapped binary loader, and checks
+# that all of them read the same segments and that a file without segments loads.
+# Run from the repository root: python -m benchmarks.loaders [--segments N]
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import SegmentFile
+from main import load_input
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print('%-24s %8.3fs' % (label, time.perf_counter() - start))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--segments', type=int, default=1000000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    coords = np.round(rng.uniform(0, 1000, (args.segments, 4)), 3)
+    bbox = (0.0, 0.0, 1000.0, 1000.0)
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = os.path.join(tmp, 'segments.txt')
+        binary_path = os.path.join(tmp, 'segments.bin')
+        with open(text_path, 'w') as file:
+            file.write('%d\n%g %g %g %g\n' % ((args.segments,) + bbox))
+            np.savetxt(file, coords, fmt='%.3f')
+        SegmentFile.save_binary(binary_path, coords, bbox)
+
+        objects = timed('main.load_input', lambda: load_input(text_path))[0]
+        text = timed('SegmentFile.load_text', lambda: SegmentFile.load_text(text_path))[0]
+        binary = timed('SegmentFile.load_binary', lambda: SegmentFile.load_binary(binary_path))[0]
+        # touch every page of the mapping so the comparison includes reading the data
+        timed('read mapped segments', lambda: float(binary.sum()))
+
+        assert np.array_equal(text, coords) and np.array_equal(binary, coords)
+        assert len(objects) == args.segments
+        print('text file %d bytes, binary file %d bytes' % (os.path.getsize(text_path), os.path.getsize(binary_path)))
+        del binary
+
+        # a file without segments loads as an empty (0, 4) array, in both formats
+        empty_text, empty_binary = os.path.join(tmp, 'empty.txt'), os.path.join(tmp, 'empty.bin')
+        with open(empty_text, 'w') as file:
+            file.write('0\n%g %g %g %g\n' % bbox)
+        SegmentFile.save_binary(empty_binary, np.empty((0, 4)), bbox)
+        for loaded in (SegmentFile.load_text(empty_text), SegmentFile.load_binary(empty_binary)):
+            assert loaded[0].shape == (0, 4) and loaded[1] == bbox
+        assert load_input(empty_text)[0] == []
+
+
+if __name__ == '__main__':
+    main()
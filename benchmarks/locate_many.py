@@ -0,0 +1,46 @@
+# Compares the scalar query path with the batch locate_many API.
+# Run from the repository root: python -m benchmarks.locate_many test.txt [--queries N]
+import argparse
+import time
+
+import numpy as np
+
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from main import load_input
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('segments')
+    parser.add_argument('--queries', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    segments, boundBottomLeft, boundTopRight = load_input(args.segments)
+    R = RandomizedIncrementalConstruction(segments, boundBottomLeft, boundTopRight)
+    R.freeze()
+
+    rng = np.random.default_rng(args.seed)
+    xs = rng.uniform(boundBottomLeft.x, boundTopRight.x, args.queries)
+    ys = rng.uniform(boundBottomLeft.y, boundTopRight.y, args.queries)
+
+    start = time.perf_counter()
+    scalar = [R.locate(Point(float(x), float(y))) for x, y in zip(xs, ys)]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = R.locate_many(xs, ys)
+    batch_time = time.perf_counter() - start
+
+    if not np.array_equal(np.asarray(scalar, dtype=np.int32), batch):
+        raise AssertionError('locate_many disagrees with the scalar query path')
+
+    print('segments: %d, DAG nodes: %d, queries: %d' % (len(segments), len(R.freeze()), args.queries))
+    print('scalar:      %.3fs (%.0f queries/s)' % (scalar_time, args.queries / scalar_time))
+    print('locate_many: %.3fs (%.0f queries/s)' % (batch_time, args.queries / batch_time))
+    print('speedup:     %.1fx' % (scalar_time / batch_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# Cost of inserting long segments into dense maps. A map is built from benchmarks.generators.random_disjoint
+# (one segment per unit grid cell), then segments across the whole bounding box are inserted in the
+# free band between two rows of cells, each crossing thousands of trapezoids. With a linear split
+# and merge the insertion time per crossed trapezoid stays flat as the map grows.
+# Run from the repository root: python -m benchmarks.long_segments [--sizes 1e3 1e4 1e5] [--inserts N]
+import argparse
+import gc
+import math
+import time
+
+import numpy as np
+
+import Instrumentation
+from LineSegment import LineSegment
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from benchmarks.generators import random_disjoint
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=lambda s: int(float(s)), nargs='+', default=[1000, 10000, 40000])
+    parser.add_argument('--inserts', type=int, default=10, help="long segments inserted into every map")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--disable-gc', action='store_true',
+                        help="time without the cyclic garbage collector, its full collections grow with the map")
+    args = parser.parse_args()
+    if args.disable_gc:
+        gc.disable()
+
+    print('%8s %10s %12s %12s %14s' % ('n', 'crossed', 'insert ms', 'us/crossed', 'profile split'))
+    for n in args.sizes:
+        rows, bbox = random_disjoint(n, np.random.default_rng(args.seed))
+        R = RandomizedIncrementalConstruction(rows, Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3]), seed=args.seed)
+        k = math.ceil(math.sqrt(n))
+        rng = np.random.default_rng(args.seed)
+        # one long segment per band between cell rows j and j + 1, the cell segments keep 0.05 away from it
+        bands = rng.permutation(k - 1)[:args.inserts]
+        sink = Instrumentation.HistogramSink()
+        elapsed = 0.0
+        with Instrumentation.recording(sink), Instrumentation.profiling() as profiler:
+            for j in bands.tolist():
+                y = j + 0.97 + rng.uniform(0, 0.02, 2)
+                segment = LineSegment(Point(-0.5, float(y[0])), Point(k + 0.5, float(y[1])))
+                start = time.perf_counter()
+                R.insert(segment)
+                elapsed += time.perf_counter() - start
+        crossed = sink.histograms['walk_length'].sum
+        if len(R.DAG.trapezoids()) != 3 * (n + len(bands)) + 1:
+            raise AssertionError('map has the wrong number of trapezoids after the insertions')
+        split = profiler.totals()['split']['seconds']
+        print('%8d %10.0f %12.2f %12.3f %13.1f%%' % (n, crossed / len(bands), 1e3 * elapsed / len(bands),
+                                                  1e6 * elapsed / crossed, 100 * split / elapsed))
+
+
+if __name__ == '__main__':
+    main()
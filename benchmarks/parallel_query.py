@@ -0,0 +1,69 @@
+# Query throughput of ParallelLocator from 1 to N worker processes on one batch, for a segment file
+# or for generated inputs (see generators.py) of several sizes.
+# Run from the repository root: python -m benchmarks.parallel_query test.txt [--queries N] [--max-workers N]
+#                               python -m benchmarks.parallel_query [--generators road random] [--sizes 1e4 1e5]
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import SegmentFile
+from ParallelQuery import ParallelLocator
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from benchmarks.generators import GENERATORS
+
+
+def run(label, segments, bbox, args):
+    R = RandomizedIncrementalConstruction(segments, Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3]), seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    xs = rng.uniform(bbox[0], bbox[2], args.queries)
+    ys = rng.uniform(bbox[1], bbox[3], args.queries)
+
+    start = time.perf_counter()
+    expected = R.locate_many(xs, ys)
+    single = time.perf_counter() - start
+    print('%s, %d segments, cpus: %d, queries: %d, in-process locate_many: %.0f queries/s' % (
+        label, len(segments), os.cpu_count(), args.queries, args.queries / single))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        map_path = None
+        if args.mmap:
+            map_path = os.path.join(tmp, 'map.bin')
+            R.save(map_path)
+        counts = sorted({2 ** i for i in range(args.max_workers.bit_length()) if 2 ** i <= args.max_workers} | {args.max_workers})
+        for workers in counts:
+            with ParallelLocator(R, workers, map_path=map_path, min_parallel=0) as locator:
+                locator.locate_many(xs[:1000], ys[:1000])
+                start = time.perf_counter()
+                got = locator.locate_many(xs, ys)
+                elapsed = time.perf_counter() - start
+            if not np.array_equal(got, expected):
+                raise AssertionError('parallel results differ from locate_many on %s' % label)
+            print('%3d workers: %10.0f queries/s, speedup %.2fx' % (workers, args.queries / elapsed, single / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('segments', nargs='?', help="segment file, instead of the generators")
+    parser.add_argument('--generators', nargs='+', choices=sorted(GENERATORS), default=sorted(GENERATORS))
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e4, 1e5])
+    parser.add_argument('--queries', type=int, default=2000000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mmap', action='store_true', help="share the map through a saved map file instead of fork")
+    args = parser.parse_args()
+
+    if args.segments:
+        segments, bbox = SegmentFile.load(args.segments)
+        return run(args.segments, segments, bbox, args)
+    for name in args.generators:
+        for n in map(int, args.sizes):
+            rows, bbox = GENERATORS[name](n, np.random.default_rng(args.seed))
+            run(name, rows, bbox, args)
+
+
+if __name__ == '__main__':
+    main()
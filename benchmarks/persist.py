@@ -0,0 +1,52 @@
+# Time to build a map against saving it and loading it back, and a check that the reloaded
+# map answers every query like the original.
+# Run from the repository root: python -m benchmarks.persist test.txt [--queries N]
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import SegmentFile
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print('%-12s %8.4fs' % (label, time.perf_counter() - start))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('segments')
+    parser.add_argument('--queries', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    segments, bbox = SegmentFile.load(args.segments)
+    def build():
+        return RandomizedIncrementalConstruction(segments, Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3]),
+                                                 seed=args.seed)
+    R = timed('build', build)
+    timed('freeze', R.freeze)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'map.bin')
+        timed('save', lambda: R.save(path))
+        loaded = timed('load', lambda: RandomizedIncrementalConstruction.load(path, segments))
+
+        rng = np.random.default_rng(args.seed)
+        xs = rng.uniform(bbox[0], bbox[2], args.queries)
+        ys = rng.uniform(bbox[1], bbox[3], args.queries)
+        if not np.array_equal(R.locate_many(xs, ys), loaded.locate_many(xs, ys)):
+            raise AssertionError('the reloaded map disagrees with the original')
+        print('map file %d bytes, %d queries answered identically' % (os.path.getsize(path), args.queries))
+        del loaded
+
+
+if __name__ == '__main__':
+    main()
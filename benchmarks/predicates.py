@@ -0,0 +1,99 @@
+# Cost and exact fallback rate of the filtered orientation test in Predicates against the plain float
+# cross product it replaced, on three kinds of point triples:
+#   random      independent uniform points, the filter never falls back
+#   survey      points at UTM-like coordinates within a millimeter of the line through the other two
+#   collinear   points computed on the line through the other two, the float sign is often wrong
+# Also counts the fallbacks of a complete build of every benchmarks.generators segment set.
+# Run from the repository root: python -m benchmarks.predicates [--triples N] [--segments N]
+import argparse
+import time
+from fractions import Fraction
+
+import numpy as np
+
+import Predicates
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from benchmarks.generators import GENERATORS
+
+
+def triples(kind, n, rng):
+    if kind == 'random':
+        return rng.uniform(0, 1, (6, n))
+    if kind == 'survey':
+        ax, bx = rng.uniform(500000, 501000, n), rng.uniform(500000, 501000, n)
+        ay, by = rng.uniform(4000000, 4001000, n), rng.uniform(4000000, 4001000, n)
+        t = rng.uniform(0, 1, n)
+        return np.array([ax, ay, bx, by, ax + t * (bx - ax), ay + t * (by - ay) + rng.uniform(-5e-4, 5e-4, n)])
+    a, b = rng.uniform(0, 1, (2, n)), rng.uniform(0, 1, (2, n))
+    c = a + rng.uniform(-2, 3, n) * (b - a)
+    return np.array([a[0], a[1], b[0], b[1], c[0], c[1]])
+
+
+# the orientation test of LineSegment.aboveLine before Predicates
+def plain_orientation(ax, ay, bx, by, cx, cy):
+    return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+
+
+def exact_sign(ax, ay, bx, by, cx, cy):
+    v = (Fraction(ax) - Fraction(cx)) * (Fraction(by) - Fraction(cy)) - (Fraction(ay) - Fraction(cy)) * (Fraction(bx) - Fraction(cx))
+    return (v > 0) - (v < 0)
+
+
+def timed(func, rows):
+    start = time.perf_counter()
+    for row in rows:
+        func(*row)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--triples', type=int, default=200000)
+    parser.add_argument('--check', type=int, default=20000, help="triples compared with Fraction arithmetic")
+    parser.add_argument('--segments', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    print('%-10s %10s %10s %10s %9s %13s %13s %11s' % ('triples', 'fallback', 'plain ns', 'filter ns', 'overhead',
+                                                      'vec plain ns', 'vec filter ns', 'float wrong'))
+    for kind in ('random', 'survey', 'collinear'):
+        coords = triples(kind, args.triples, rng)
+        rows = coords.T.tolist()
+        plain = timed(plain_orientation, rows)
+        before = Predicates.exact_evaluations
+        filtered = timed(Predicates.orient2d, rows)
+        fallbacks = Predicates.exact_evaluations - before
+
+        start = time.perf_counter()
+        plain_orientation(*coords)
+        vector_plain = time.perf_counter() - start
+        start = time.perf_counter()
+        signs = Predicates.orient2d_signs(*coords)
+        vector_filtered = time.perf_counter() - start
+
+        checked = rows[:args.check]
+        expected = np.array([exact_sign(*row) for row in checked])
+        if not np.array_equal(signs[:len(checked)], expected):
+            raise AssertionError('orient2d_signs disagrees with exact arithmetic')
+        if any(np.sign(Predicates.orient2d(*row)) != e for row, e in zip(checked, expected)):
+            raise AssertionError('orient2d disagrees with exact arithmetic')
+        float_wrong = np.count_nonzero(np.sign(plain_orientation(*coords[:, :len(checked)])) != expected)
+
+        n = args.triples
+        print('%-10s %9.4f%% %10.1f %10.1f %8.2fx %13.1f %13.1f %10.2f%%' % (
+            kind, 100 * fallbacks / n, 1e9 * plain / n, 1e9 * filtered / n, filtered / plain,
+            1e9 * vector_plain / n, 1e9 * vector_filtered / n, 100 * float_wrong / len(checked)))
+
+    for name, generator in GENERATORS.items():
+        segments, bbox = generator(args.segments, np.random.default_rng(args.seed))
+        before = Predicates.exact_evaluations
+        start = time.perf_counter()
+        RandomizedIncrementalConstruction(segments, Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3]), seed=args.seed)
+        print('build %-9s %d segments: %.3fs, %d exact fallbacks' % (
+            name, args.segments, time.perf_counter() - start, Predicates.exact_evaluations - before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# Build time of SlabPartitionedMap from 1 to N worker processes against the serial build, and a
+# check that both maps answer random queries with the same trapezoid, for a segment file or for
+# generated inputs (see generators.py) of several sizes.
+# Run from the repository root: python -m benchmarks.slab_build test.txt [--max-workers N] [--slabs N]
+#                               python -m benchmarks.slab_build [--generators road random] [--sizes 1e4 1e5]
+import argparse
+import os
+import time
+
+import numpy as np
+
+import SegmentFile
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from SlabConstruction import SlabPartitionedMap
+from benchmarks.generators import GENERATORS
+
+
+# (left point, right point, top segment, bottom segment) of the trapezoid every query landed in
+def serial_geometry(frozen, ids):
+    rows = frozen.trap_segments[ids]
+    return np.hstack([frozen.trap_points[ids], frozen.segments[rows[:, 0]], frozen.segments[rows[:, 1]]])
+
+
+def slab_geometry(slab_map, ids):
+    rows = slab_map.trap_segments[ids]
+    return np.hstack([slab_map.trap_points[ids], slab_map.segment_table[rows[:, 0]],
+                      slab_map.segment_table[rows[:, 1]]])
+
+
+def run(label, segments, bbox, args):
+    segments = np.array(segments)
+    rng = np.random.default_rng(args.seed)
+    xs = rng.uniform(bbox[0], bbox[2], args.queries)
+    ys = rng.uniform(bbox[1], bbox[3], args.queries)
+
+    def serial_build():
+        return RandomizedIncrementalConstruction(segments, Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3]),
+                                                 seed=args.seed)
+
+    serial = min(timed(serial_build) for _ in range(args.repeat))
+    frozen = serial_build().freeze()
+    expected = frozen.locate_many(xs, ys)
+    print('%s, cpus: %d, segments: %d, serial build: %.4fs, %d trapezoids'
+          % (label, os.cpu_count(), len(segments), serial, frozen.trapezoid_count))
+
+    counts = sorted({2 ** i for i in range(args.max_workers.bit_length()) if 2 ** i <= args.max_workers} | {args.max_workers})
+    for workers in counts:
+        slabs = args.slabs or workers
+        elapsed = min(timed(lambda: SlabPartitionedMap(segments, bbox, slabs, workers, args.seed))
+                      for _ in range(args.repeat))
+        slab_map = SlabPartitionedMap(segments, bbox, slabs, workers, args.seed)
+        got = slab_map.locate_many(xs, ys)
+        found = expected >= 0
+        if not np.array_equal(got >= 0, found) or \
+                not np.allclose(slab_geometry(slab_map, got[found]), serial_geometry(frozen, expected[found])):
+            raise AssertionError('slab map and serial map disagree on %s' % label)
+        print('%3d workers, %3d slabs: %.4fs, speedup %.2fx, %d trapezoids, %d queries checked'
+              % (workers, len(slab_map.slab_maps), elapsed, serial / elapsed, slab_map.trapezoid_count, found.sum()))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('segments', nargs='?', help="segment file, instead of the generators")
+    parser.add_argument('--generators', nargs='+', choices=sorted(GENERATORS), default=sorted(GENERATORS))
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e4, 1e5])
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--slabs', type=int, help="number of slabs, default one per worker")
+    parser.add_argument('--queries', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.segments:
+        segments, bbox = SegmentFile.load(args.segments)
+        return run(args.segments, segments, bbox, args)
+    for name in args.generators:
+        for n in map(int, args.sizes):
+            rows, bbox = GENERATORS[name](n, np.random.default_rng(args.seed))
+            run(name, rows, bbox, args)
+
+
+def timed(build):
+    start = time.perf_counter()
+    build()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+# Build and query scaling of RandomizedIncrementalConstruction on the synthetic segment sets of
+# benchmarks.generators. For every generator and size it records the build time, DAG node count,
+# trapezoid count, max query depth, peak traced memory of the build, and single and batch query
+# throughput. Results go to a JSON file; --compare checks them against an earlier results file and
+# exits with status 1 when a metric regressed by more than --tolerance.
+# Run from the repository root:
+#   python -m benchmarks.suite [--generators random road] [--sizes 1e2 1e3 1e4] [--out results.json]
+#   python -m benchmarks.suite --sizes 1e2 1e3 --compare results.json
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from benchmarks.generators import GENERATORS
+
+# metrics where a larger value is a regression, and where a smaller one is. The counts are exact
+# for a fixed seed, any change in them is reported
+LOWER_IS_BETTER = ('build_s', 'peak_bytes')
+HIGHER_IS_BETTER = ('single_qps', 'batch_qps')
+EXACT = ('dag_nodes', 'trapezoids', 'max_depth')
+
+
+def measure(rows, bbox, args):
+    bl, tr = Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3])
+
+    def build():
+        return RandomizedIncrementalConstruction(rows, bl, tr, seed=args.seed)
+
+    build_s = float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        R = build()
+        build_s = min(build_s, time.perf_counter() - start)
+    result = {'build_s': build_s}
+
+    if args.memory:
+        # tracing slows the build down, so the peak is taken from a build of its own
+        del R
+        tracemalloc.start()
+        R = build()
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    frozen = R.freeze()
+    result['dag_nodes'] = len(frozen)
+    result['trapezoids'] = frozen.trapezoid_count
+    result['max_depth'] = frozen.max_depth()
+
+    rng = np.random.default_rng(args.seed)
+    xs = rng.uniform(bbox[0], bbox[2], args.queries)
+    ys = rng.uniform(bbox[1], bbox[3], args.queries)
+    points = [Point(x, y) for x, y in zip(xs.tolist(), ys.tolist())]
+    start = time.perf_counter()
+    for point in points:
+        R.locate(point)
+    result['single_qps'] = args.queries / (time.perf_counter() - start)
+    start = time.perf_counter()
+    frozen.locate_many(xs, ys)
+    result['batch_qps'] = args.queries / (time.perf_counter() - start)
+    return result
+
+
+# prints the change of every metric against the matching entry of baseline, returns the number of regressions
+def compare(results, baseline, tolerance):
+    old = {(entry['generator'], entry['n']): entry for entry in baseline['results']}
+    regressions = 0
+    for entry in results:
+        before = old.get((entry['generator'], entry['n']))
+        if before is None:
+            print('%-9s %8d: not in the baseline' % (entry['generator'], entry['n']))
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER + EXACT:
+            if metric not in entry or metric not in before:
+                continue
+            new_value, old_value = entry[metric], before[metric]
+            if metric in EXACT:
+                bad = new_value != old_value
+            else:
+                ratio = new_value / old_value if old_value else float('inf')
+                bad = ratio > 1 + tolerance if metric in LOWER_IS_BETTER else ratio < 1 / (1 + tolerance)
+            if bad:
+                regressions += 1
+                print('%-9s %8d: %-11s %12.6g -> %12.6g  REGRESSION' % (entry['generator'], entry['n'], metric,
+                                                                       old_value, new_value))
+            else:
+                print('%-9s %8d: %-11s %12.6g -> %12.6g' % (entry['generator'], entry['n'], metric, old_value, new_value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--generators', nargs='+', choices=sorted(GENERATORS), default=list(GENERATORS))
+    parser.add_argument('--sizes', type=lambda s: int(float(s)), nargs='+', default=[100, 1000, 10000, 100000],
+                        help="numbers of segments, 1e6 is accepted (default 1e2 1e3 1e4 1e5)")
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=1, help="builds per size, the fastest is reported")
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help="skip the traced build for the peak memory")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', metavar='PATH', help="write the results to PATH as JSON")
+    parser.add_argument('--compare', metavar='PATH', help="compare with the results in PATH")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative slowdown for --compare")
+    args = parser.parse_args()
+
+    results = []
+    print('%-9s %8s %9s %9s %9s %5s %11s %11s %11s' % ('generator', 'n', 'build s', 'nodes', 'traps', 'depth',
+                                                      'peak MB', 'single q/s', 'batch q/s'))
+    for name in args.generators:
+        for n in args.sizes:
+            rows, bbox = GENERATORS[name](n, np.random.default_rng(args.seed))
+            entry = {'generator': name, 'n': n}
+            entry.update(measure(rows, bbox, args))
+            results.append(entry)
+            print('%-9s %8d %9.3f %9d %9d %5d %11s %11.0f %11.0f' % (
+                name, n, entry['build_s'], entry['dag_nodes'], entry['trapezoids'], entry['max_depth'],
+                '%.1f' % (entry['peak_bytes'] / 2 ** 20) if 'peak_bytes' in entry else '-',
+                entry['single_qps'], entry['batch_qps']), flush=True)
+
+    report = {
+        'meta': {'date': datetime.datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                 'numpy': np.__version__, 'platform': platform.platform(), 'cpus': os.cpu_count(),
+                 'seed': args.seed, 'queries': args.queries, 'repeat': args.repeat},
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w') as file:
+            json.dump(report, file, indent=1)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        print('%d regression(s) against %s' % (regressions, args.compare))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
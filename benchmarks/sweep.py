@@ -0,0 +1,135 @@
+# Build time and query depth of SweepLineConstruction against RandomizedIncrementalConstruction on the
+# same inputs. The randomized map is built with several seeds, its build time includes freeze (the
+# sweep builds the frozen arrays directly). Depth is the longest root to leaf path of the search
+# structure; the mean and max number of nodes random queries visit show what queries pay. Checks that
+# both maps give every query a trapezoid with the same corners and segments.
+# With --grid SIZE the check runs instead on --trials random maps on a SIZE x SIZE integer grid (see
+# generators.integer_grid) with vertical segments, shared x-coordinates and end points on the
+# bounding box. Half of the queries there lie on the vertical lines through end points and slab
+# boundaries: the sweep, the randomized maps and a SlabPartitionedMap must give them the same
+# trapezoids, and -1 exactly for the points on_wall finds on a wall.
+# Run from the repository root: python -m benchmarks.sweep [--generators road random] [--sizes 1e3 1e4] [--seeds 3]
+#                               python -m benchmarks.sweep --grid 6 [--trials 200] [--queries 1000]
+import argparse
+import time
+
+import numpy as np
+
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from SlabConstruction import SlabPartitionedMap, _oriented
+from SweepLineAlgorithm import SweepLineConstruction
+from benchmarks.generators import GENERATORS, integer_grid
+from benchmarks.slab_build import slab_geometry
+
+
+# (left point, right point, top segment, bottom segment) of the trapezoid every query landed in
+def geometry(frozen, ids):
+    rows = frozen.trap_segments[ids]
+    return np.hstack([frozen.trap_points[ids], frozen.segments[rows[:, 0]], frozen.segments[rows[:, 1]]])
+
+
+def query_stats(frozen, xs, ys):
+    start = time.perf_counter()
+    ids = frozen.locate_many(xs, ys)
+    elapsed = time.perf_counter() - start
+    _, visits = frozen._descend(xs, ys, True)
+    return ids, 1e9 * elapsed / len(xs), float(visits.mean()), int(visits.max())
+
+
+# True for the points on a wall: the vertical line through an end point at x > x0, up and down to the
+# next segments crossing that line (or the bounding box top and bottom). A point on such a segment
+# belongs to the part above it, like on the segments of the DAG
+def on_wall(rows, bbox, xs, ys):
+    x0, y0, _, y1 = bbox
+    result = np.zeros(len(xs), dtype=bool)
+    for i, (x, y) in enumerate(zip(xs.tolist(), ys.tolist())):
+        ends = [py for px, py in np.vstack([rows[:, 0:2], rows[:, 2:4]]).tolist() if px == x]
+        if x <= x0 or not ends:
+            continue
+        crossing = [ly + (ry - ly) * (x - lx) / (rx - lx) for lx, ly, rx, ry in rows.tolist() if lx < x < rx]
+        low = max([b for b in crossing if b <= y] + [y0])
+        high = min([b for b in crossing if b > y] + [y1])
+        result[i] = any(low <= e <= high for e in ends)
+    return result
+
+
+def run_grid(args):
+    rng = np.random.default_rng(0)
+    size = args.grid
+    for trial in range(args.trials):
+        rows, _ = integer_grid(int(rng.integers(1, 3 * size)), size, rng, vertical=True)
+        rows = _oriented(rows)
+        # the bounding box runs through the outer grid points, so end points lie on it. Segments along
+        # its sides are dropped
+        along = ((rows[:, 1] == rows[:, 3]) & np.isin(rows[:, 1], (1, size))) | \
+                ((rows[:, 0] == rows[:, 2]) & np.isin(rows[:, 0], (1, size)))
+        rows = rows[~along]
+        bbox = (1.0, 1.0, float(size), float(size))
+        bl, tr = Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3])
+        slab_map = SlabPartitionedMap(rows, bbox, 3, 1, trial)
+        # random points, then random points on the vertical lines through the end points and the slab
+        # boundaries inside the bounding box
+        lines = np.unique(np.concatenate([rows[:, [0, 2]].ravel(), slab_map.boundaries]))
+        lines = lines[(lines > 1) & (lines < size)]
+        xs = np.concatenate([rng.uniform(1, size, args.queries), rng.choice(lines, args.queries) if len(lines) else []])
+        ys = rng.uniform(1, size, len(xs))
+
+        sweep = SweepLineConstruction(rows, bl, tr).freeze()
+        expected = sweep.locate_many(xs, ys)
+        found = expected >= 0
+        if not np.array_equal(~found, on_wall(rows, bbox, xs, ys)):
+            raise AssertionError('trial %d: the sweep answers -1 off the walls of %s' % (trial, rows.tolist()))
+        maps = [('seed %d' % seed, RandomizedIncrementalConstruction(rows, bl, tr, seed=seed).freeze(), geometry)
+                for seed in range(args.seeds)]
+        for label, m, m_geometry in maps + [('slabs', slab_map, slab_geometry)]:
+            ids = m.locate_many(xs, ys)
+            if not (np.array_equal(ids >= 0, found) and
+                    np.array_equal(m_geometry(m, ids[found]), geometry(sweep, expected[found]))):
+                raise AssertionError('trial %d, %s: the maps disagree on %s' % (trial, label, rows.tolist()))
+    print('grid %d: %d maps, %d seeds and the slab map agree with the sweep, -1 exactly on the walls' % (
+        size, args.trials, args.seeds))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--generators', nargs='+', choices=sorted(GENERATORS), default=sorted(GENERATORS))
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e3, 1e4])
+    parser.add_argument('--seeds', type=int, default=3, help="randomized builds per input")
+    parser.add_argument('--queries', type=int, default=100000)
+    parser.add_argument('--grid', type=int, metavar='SIZE', help="random maps on a SIZE x SIZE integer grid instead")
+    parser.add_argument('--trials', type=int, default=200, help="number of random maps for --grid")
+    args = parser.parse_args()
+    if args.grid:
+        return run_grid(args)
+
+    print('%-10s %8s %-12s %9s %9s %7s %11s %10s %10s' % ('generator', 'segments', 'engine', 'build s', 'nodes',
+                                                           'depth', 'mean visits', 'max visits', 'batch ns/q'))
+    for name in args.generators:
+        for n in map(int, args.sizes):
+            rng = np.random.default_rng(0)
+            rows, bbox = GENERATORS[name](n, rng)
+            bl, tr = Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3])
+            xs = rng.uniform(bbox[0], bbox[2], args.queries)
+            ys = rng.uniform(bbox[1], bbox[3], args.queries)
+
+            start = time.perf_counter()
+            sweep = SweepLineConstruction(rows, bl, tr).freeze()
+            sweep_time = time.perf_counter() - start
+            expected, ns, mean_visits, max_visits = query_stats(sweep, xs, ys)
+            print('%-10s %8d %-12s %9.3f %9d %7d %11.1f %10d %10.1f' % (
+                name, n, 'sweep', sweep_time, len(sweep), sweep.max_depth(), mean_visits, max_visits, ns))
+
+            for seed in range(args.seeds):
+                start = time.perf_counter()
+                frozen = RandomizedIncrementalConstruction(rows, bl, tr, seed=seed).freeze()
+                build_time = time.perf_counter() - start
+                ids, ns, mean_visits, max_visits = query_stats(frozen, xs, ys)
+                if not np.array_equal(geometry(frozen, ids), geometry(sweep, expected)):
+                    raise AssertionError('seed %d: the maps disagree on %s with %d segments' % (seed, name, n))
+                print('%-10s %8d %-12s %9.3f %9d %7d %11.1f %10d %10.1f' % (
+                    name, n, 'seed %d' % seed, build_time, len(frozen), frozen.max_depth(), mean_visits, max_visits, ns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# Query time of LocatorSession on coherent query streams against independent DAG queries. The map is
+# a benchmarks.generators segment set; the queries are simulated GPS tracks: every vehicle moves a
+# small step per fix with a slowly turning heading and stands still (the same fix again) now and then.
+# Checks that the session returns the same trapezoid IDs as RandomizedIncrementalConstruction.locate.
+# Run from the repository root: python -m benchmarks.trajectory [--generator road] [--segments N] [--fixes N]
+import argparse
+import time
+
+import numpy as np
+
+from LocatorSession import LocatorSession
+from Point import Point
+from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from benchmarks.generators import GENERATORS
+
+
+# fixes of one vehicle after another as (x, y) arrays
+def tracks(bbox, vehicles, fixes, step, stop_rate, rng):
+    xs, ys = [], []
+    for _ in range(vehicles):
+        x, y = rng.uniform(bbox[0], bbox[2]), rng.uniform(bbox[1], bbox[3])
+        heading = rng.uniform(0, 2 * np.pi)
+        for _ in range(fixes // vehicles):
+            if rng.random() >= stop_rate:
+                heading += rng.normal(0, 0.2)
+                x = min(max(x + step * np.cos(heading), bbox[0]), bbox[2])
+                y = min(max(y + step * np.sin(heading), bbox[1]), bbox[3])
+            xs.append(x)
+            ys.append(y)
+    return np.array(xs), np.array(ys)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--generator', choices=sorted(GENERATORS), default='road')
+    parser.add_argument('--segments', type=int, default=20000)
+    parser.add_argument('--fixes', type=int, default=100000)
+    parser.add_argument('--vehicles', type=int, default=10)
+    parser.add_argument('--step', type=float, default=0.02, help="distance between fixes, in grid cells")
+    parser.add_argument('--stop-rate', type=float, default=0.2, help="share of fixes that repeat the last one")
+    parser.add_argument('--max-steps', type=int, default=8)
+    parser.add_argument('--cache-size', type=int, default=1024)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    rows, bbox = GENERATORS[args.generator](args.segments, rng)
+    R = RandomizedIncrementalConstruction(rows, Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3]), seed=args.seed)
+    frozen = R.freeze()
+    xs, ys = tracks(bbox, args.vehicles, args.fixes, args.step, args.stop_rate, rng)
+    xl, yl = xs.tolist(), ys.tolist()
+    n = len(xl)
+
+    start = time.perf_counter()
+    expected = [R.locate(Point(x, y)) for x, y in zip(xl, yl)]
+    dag_time = time.perf_counter() - start
+    start = time.perf_counter()
+    frozen_ids = [frozen.locate(x, y) for x, y in zip(xl, yl)]
+    frozen_time = time.perf_counter() - start
+    session = LocatorSession(R, args.max_steps, args.cache_size)
+    start = time.perf_counter()
+    got = [session.locate(x, y) for x, y in zip(xl, yl)]
+    session_time = time.perf_counter() - start
+    if got != expected or frozen_ids != expected:
+        raise AssertionError('the session answers differently from the DAG')
+
+    print('%s map, %d segments, %d fixes of %d vehicles' % (args.generator, args.segments, n, args.vehicles))
+    print('object DAG:  %6.2f us/query' % (1e6 * dag_time / n))
+    print('frozen DAG:  %6.2f us/query' % (1e6 * frozen_time / n))
+    print('session:     %6.2f us/query, %.2fx the object DAG, %.2fx the frozen DAG'
+          % (1e6 * session_time / n, dag_time / session_time, frozen_time / session_time))
+    print('answered by: ' + ', '.join('%s %.1f%%' % (source, 100 * rate) for source, rate in session.hit_rates().items()))
+
+
+if __name__ == '__main__':
+    main()
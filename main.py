@@ -1,11 +1,22 @@
+import argparse
+import atexit
+import contextlib
+import itertools
 import sys
-from GraphObject import GraphObject
 from Point import Point
 from LineSegment import LineSegment
-from DAGNode import DAGNode, Trapezoid
+from DAGNode import DAGNode
+import Trapezoid
 from RandomIncrementalAlgorithm import RandomizedIncrementalConstruction
+from SweepLineAlgorithm import SweepLineConstruction
+from Histogram import Histogram
+from ParallelQuery import ParallelLocator
+from LocatorSession import LocatorSession
+from GridAccelerator import GridAccelerator
+import SegmentFile
+import Instrumentation
 import time
-from collections import deque
+import numpy as np
 
 def load_input(file_path):
     with open(file_path, 'r') as file:
@@ -18,33 +29,190 @@ def load_input(file_path):
         boundBottomLeft = Point(float(bottomLeftX), float(bottomLeftY))
         boundTopRight = Point(float(topRightX), float(topRightY))
 
+        # one Point per distinct end point, segments meeting in a vertex share it
+        points = {}
         # Process each subsequent line
         for line in file:
             if len(line.split()) != 0:
                 # Split line into x and y coordinates
                 point1_x, point1_y, point2_x, point2_y = line.split()
-                segments.append(LineSegment(
-                    Point((float(point1_x)), float(point1_y)), 
-                    Point(float(point2_x), float(point2_y))
-                ))
+                p = Point(float(point1_x), float(point1_y))
+                q = Point(float(point2_x), float(point2_y))
+                segments.append(LineSegment(points.setdefault(p, p), points.setdefault(q, q)))
             else:
                 break
     return segments, boundBottomLeft, boundTopRight
+
+
+# answers the queries in query_file ("x y" per line) chunk by chunk and writes one trapezoid ID per
+# line to out_file, so memory use does not depend on the number of queries. R is the map or a
+# ParallelLocator over it. Returns the number of queries, the total time of the chunk queries and a
+# histogram of per-query latency: of every chunk, latency_samples evenly spaced points are located
+# again one at a time and timed on their own, outside the total time
+def run_batch_queries(R, query_file, out_file, chunk_size=65536, latency_samples=256):
+    latency = Histogram()
+    count = 0
+    query_time = 0.0
+    while True:
+        lines = list(itertools.islice(query_file, chunk_size))
+        if not lines:
+            break
+        points = np.loadtxt(lines, dtype=np.float64, ndmin=2)
+        if len(points) == 0:
+            continue
+        if points.shape[1] != 2:
+            raise ValueError('query lines must hold two coordinates, found %d' % points.shape[1])
+        start = time.perf_counter()
+        ids = R.locate_many(points[:, 0], points[:, 1])
+        elapsed = time.perf_counter() - start
+        out_file.write('\n'.join(map(str, ids.tolist())) + '\n')
+        if latency_samples:
+            for i in np.linspace(0, len(points) - 1, min(latency_samples, len(points))).astype(np.int64).tolist():
+                sample_start = time.perf_counter()
+                R.locate_many(points[i:i + 1, 0], points[i:i + 1, 1])
+                latency.record(time.perf_counter() - sample_start)
+        count += len(points)
+        query_time += elapsed
+    return count, query_time, latency
+
+
+# writes the DAG adjacency in the given format: 'edges' streams a tab separated edge list,
+# 'csr' saves the sparse arrays of DAG.build_adjacency_csr to an .npz file and 'matrix' writes the
+# dense matrix, which is only accepted for small DAGs
+def export_adjacency(dag, segments, adjacency_format, file_path):
+    if adjacency_format == 'edges':
+        with open(file_path, 'w') as file:
+            file.write('parent\tchild\n')
+            for parent, child in dag.iter_edges(segments):
+                file.write(f'{parent}\t{child}\n')
+    elif adjacency_format == 'csr':
+        names, indptr, indices = dag.build_adjacency_csr(segments)
+        with open(file_path, 'wb') as file:
+            np.savez(file, names=np.array(names), indptr=indptr, indices=indices)
+    elif adjacency_format == 'matrix':
+        matrix, _ = dag.build_adjacency_matrix(segments)
+        matrix.to_csv(file_path, sep='\t', index=False)
+    else:
+        raise ValueError('unknown adjacency format: %s' % adjacency_format)
         
 
 
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
+    parser = argparse.ArgumentParser(usage="python main.py <file_path> [--seed SEED] [--depth-factor C] [--save-map PATH]\n"
+                                           "       python main.py [<file_path>] --load-map PATH")
+    parser.add_argument('file_path', nargs='?', help="text or binary file with the bounding box and the line segments")
+    parser.add_argument('--engine', choices=['randomized', 'sweep'], default='randomized',
+                        help="builder: randomized incremental (default) or the deterministic sweep with worst-case logarithmic query depth")
+    parser.add_argument('--seed', type=int, help="seed of the random insertion order, use the seed of an earlier build to reproduce it")
+    parser.add_argument('--conflict-lists', action='store_true', help="find the start trapezoid of every insertion from conflict lists instead of a DAG search (an expected O(n log n) bound, not faster)")
+    parser.add_argument('--depth-factor', type=float, help="rebuild with a new seed while the max query depth exceeds C * ln(n + 1)")
+    parser.add_argument('--save-binary', metavar='PATH', help="also write the segments to PATH in the binary segment format")
+    parser.add_argument('--save-map', metavar='PATH', help="write the built map to PATH")
+    parser.add_argument('--adjacency', choices=['edges', 'csr', 'matrix', 'none'],
+                        help="format of the DAG adjacency output: edge list (default, none with --queries), sparse CSR arrays (.npz) or the dense matrix (small inputs only)")
+    parser.add_argument('--adjacency-out', metavar='PATH', help="adjacency output file (default output.txt, output.npz for csr)")
+    parser.add_argument('--queries', metavar='PATH', help="answer the query points in PATH (x y per line, - for stdin) instead of prompting for them")
+    parser.add_argument('--out', metavar='PATH', default='-', help="file for the trapezoid IDs of --queries, one per line (default stdout)")
+    parser.add_argument('--chunk-size', type=int, default=65536, help="number of query points located together")
+    parser.add_argument('--latency-samples', type=int, default=256, help="points per chunk located one at a time to time per-query latency, 0 to skip")
+    parser.add_argument('--workers', type=int, default=1, help="split every chunk of --queries over this many processes")
+    parser.add_argument('--load-map', metavar='PATH', help="query a map written by --save-map instead of building one, "
+                                                           "a given file_path must hold the segments the map was built from")
+    parser.add_argument('--session', action='store_true', help="answer --queries one after the other with a LocatorSession, "
+                                                           "which starts from the last answer (for coherent streams such as GPS tracks)")
+    parser.add_argument('--compact', action='store_true', help="drop the construction state after the build, the map is only queried")
+    parser.add_argument('--grid', type=int, metavar='N', help="answer --queries through an N x N GridAccelerator")
+    parser.add_argument('--profile', action='store_true', help="time the phases of every segment insertion and print them after the build")
+    parser.add_argument('--metrics', metavar='PATH', help="write build and query counters to PATH, one JSON object per line")
+    if len(sys.argv) < 2:
         print("Please add a file path for the line segments. Usage: python main.py <file_path>")
-        
+
     else:
-        file_path = sys.argv[1]
-        segments, boundBottomLeft, boundTopRight = load_input(file_path)
-        # Initialize algorithm 
-        
-        R = RandomizedIncrementalConstruction(segments, boundBottomLeft, boundTopRight)
-        matrix, node_names = R.DAG.build_adjacency_matrix(segments)
-        matrix.to_csv('output.txt', sep='\t', index=False)
+        args = parser.parse_args()
+        file_path = args.file_path
+        if file_path is None and args.load_map is None:
+            parser.error("file_path is required unless --load-map is given")
+        if args.session and (args.load_map or args.workers > 1):
+            parser.error("--session needs a built map and a single worker")
+        if args.grid and (args.session or args.workers > 1):
+            parser.error("--grid cannot be combined with --session or --workers")
+        if args.compact and args.load_map:
+            parser.error("--compact needs a built map, a loaded one holds no construction state")
+        if args.engine == 'sweep':
+            if args.seed is not None or args.depth_factor or args.profile or args.conflict_lists:
+                parser.error("--seed, --depth-factor, --conflict-lists and --profile apply to the randomized engine")
+            if args.session or args.compact or args.adjacency not in (None, 'none'):
+                parser.error("--session, --compact and --adjacency need the object DAG of the randomized engine")
+            args.adjacency = 'none'
+        if args.adjacency is None:
+            args.adjacency = 'none' if args.queries else 'edges'
+        # with query results on stdout, everything else goes to stderr
+        log = sys.stderr if args.queries and args.out == '-' else sys.stdout
+        if args.metrics:
+            metrics_file = open(args.metrics, 'w')
+            Instrumentation.enable(Instrumentation.JsonLinesSink(metrics_file))
+            # sys.exit ends the query mode, flush the counters on the way out
+            atexit.register(metrics_file.close)
+        segment_array, bbox = SegmentFile.load(file_path) if file_path else (None, None)
+        if args.save_binary:
+            SegmentFile.save_binary(args.save_binary, segment_array, bbox)
+
+        build_start = time.perf_counter()
+        if args.load_map:
+            R = RandomizedIncrementalConstruction.load(args.load_map, segment_array)
+            build_time = time.perf_counter() - build_start
+            print("Loaded map with %d DAG nodes, seed %s" % (len(R.freeze()), R.seed), file=log)
+        elif args.engine == 'sweep':
+            R = SweepLineConstruction(segment_array, Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3]))
+            print("Built map by sweep, max query depth %d" % R.build_report['depth'], file=log)
+            build_time = time.perf_counter() - build_start
+            if args.save_map:
+                R.save(args.save_map)
+        else:
+            boundBottomLeft, boundTopRight = Point(bbox[0], bbox[1]), Point(bbox[2], bbox[3])
+            # Initialize algorithm 
+
+            with Instrumentation.profiling() if args.profile else contextlib.nullcontext() as profiler:
+                R = RandomizedIncrementalConstruction(segment_array, boundBottomLeft, boundTopRight,
+                                                      seed=args.seed, depth_factor=args.depth_factor,
+                                                      conflict_lists=args.conflict_lists)
+            if profiler is not None:
+                print(profiler.table(), file=log)
+            segments = R.segements
+            print("Built map with seed %d, max query depth %d (%d build(s))" % (
+                R.build_report['seed'], R.build_report['depth'], R.build_report['attempts']), file=log)
+            build_time = time.perf_counter() - build_start
+            if args.save_map:
+                R.save(args.save_map)
+            if args.adjacency != 'none':
+                adjacency_out = args.adjacency_out or ('output.npz' if args.adjacency == 'csr' else 'output.txt')
+                export_adjacency(R.DAG, segments, args.adjacency, adjacency_out)
+            node_names = R.DAG.node_names(segments)
+            if args.compact:
+                report = R.compact()
+                print("Compacted map: %d trapezoids, %d unreachable objects released" % (
+                    report['trapezoids'], report['released_objects']), file=log)
+
+        if args.queries:
+            with contextlib.ExitStack() as stack:
+                query_file = sys.stdin if args.queries == '-' else stack.enter_context(open(args.queries))
+                out_file = sys.stdout if args.out == '-' else stack.enter_context(open(args.out, 'w'))
+                locator = R
+                if args.workers > 1:
+                    locator = stack.enter_context(ParallelLocator(R, args.workers, map_path=args.load_map))
+                elif args.session:
+                    locator = LocatorSession(R)
+                elif args.grid:
+                    locator = GridAccelerator(R.freeze(), args.grid)
+                count, query_time, latency = run_batch_queries(locator, query_file, out_file, args.chunk_size,
+                                                               args.latency_samples)
+            print("build time:   %.3fs" % build_time if not args.load_map else "load time:    %.3fs" % build_time, file=log)
+            print("queries:      %d in %.3fs (%.0f queries/s)" % (count, query_time, count / query_time if query_time else 0), file=log)
+            if latency.total:
+                print("latency/query p50 %.2fus, p95 %.2fus, p99 %.2fus (%d single queries timed)" % (
+                    latency.percentile(50) * 1e6, latency.percentile(95) * 1e6, latency.percentile(99) * 1e6,
+                    latency.total), file=log)
+            sys.exit(0)
         
         def getQueryResult(root, query_point, path = []):
             # function to determine what trapezoid we are in, when we receive a line segment end points
@@ -57,12 +225,10 @@ if __name__ == '__main__':
                 # if the query point is to our left, we traverse the graph by going into our left child
                 if query_point.x < root.graph_object.x:
                     return getQueryResult(root.left_child, query_point, path)
-                # if the query point is to our right, we traverse the graph by going into our right child
-                elif query_point.x > root.graph_object.x:
-                    return getQueryResult(root.right_child, query_point, path)
-                # if the query point is equal to us, we develop new query point as mentioned above in get_offset_point and use the new point to figure out what trapezoid we are in  
+                # if the query point is to our right or on our vertical line, we traverse the graph by
+                # going into our right child
                 else:
-                    return query_point, path
+                    return getQueryResult(root.right_child, query_point, path)
 
             # if we are a Y-Node, 
             elif isinstance(root.graph_object, LineSegment):
@@ -73,8 +239,11 @@ if __name__ == '__main__':
                 else:
                     return getQueryResult(root.right_child, query_point, path)
 
-            # we are a leaf node
+            # we are a leaf node. If the query point lies on our left wall, it lies on the wall through
+            # a segment end point and no trapezoid contains it
             elif isinstance(root.graph_object, Trapezoid.Trapezoid):
+                if query_point.x == root.graph_object.left_p.x and query_point.x > R.boundBottomLeft.x:
+                    return query_point, path
                 return root, path
 
             # We are neither a point, line or trapezoid
@@ -85,7 +254,10 @@ if __name__ == '__main__':
             # Define the function that processes the input and returns the result
             x, y = user_input.split()
             query_point = Point(float(x), float(y))
-            output = getQueryResult(R.DAG.root, query_point)
+            if R.DAG is None:
+                # a loaded map has no DAG objects to walk, only the trapezoid ID is known
+                return R.locate(query_point), None
+            output = getQueryResult(R.DAG.root, query_point, [])
             return output
 
 
@@ -99,7 +271,10 @@ if __name__ == '__main__':
             
             # Run the function on the user input and output the result
             trapezoid, path = process_input(user_input)
-            print(f"Point found in Trapezoid {trapezoid} through path {path}")
+            if path is None:
+                print(f"Point found in Trapezoid T{trapezoid + 1}" if trapezoid >= 0 else "Point lies on the wall through a segment end point")
+            else:
+                print(f"Point found in Trapezoid {trapezoid} through path {path}")
 
 
         # def bfs_traversal(root):